@@ -0,0 +1,146 @@
+# benchmarks/bench_wordlist.py
+# Guess-budget benchmark for the wordlist generator: how many held-out
+# passwords each candidate ordering cracks within the first K guesses.
+#   python benchmarks/bench_wordlist.py --make-dataset personas.jsonl --people 2000
+#   python benchmarks/bench_wordlist.py --dataset personas.jsonl --budgets 10 100 1000 10000
+#
+# A dataset is JSON lines of personal info plus the person's password. The
+# first --train-fraction of it trains the PCFG model (or --corpus, a plain
+# password list, does); the rest is the held-out test set.
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from password_tool import PCFGModel, WordlistGenerator
+
+FIRST_NAMES = ('james', 'mary', 'john', 'linda', 'robert', 'susan', 'michael', 'karen', 'david', 'lisa', 'daniel',
+               'emma', 'thomas', 'olivia', 'kevin', 'sophie', 'brian', 'laura', 'jason', 'anna', 'eric', 'nina')
+LAST_NAMES = ('smith', 'johnson', 'brown', 'garcia', 'miller', 'davis', 'wilson', 'moore', 'taylor', 'clark',
+              'lewis', 'walker', 'young', 'king', 'wright', 'hill', 'green', 'baker', 'adams', 'nelson')
+PET_NAMES = ('max', 'bella', 'charlie', 'luna', 'rocky', 'daisy', 'buddy', 'molly', 'toby', 'coco', 'simba')
+CITIES = ('boston', 'denver', 'austin', 'dallas', 'miami', 'seattle', 'chicago', 'phoenix', 'atlanta')
+OTHER_WORDS = ('sunshine', 'dragon', 'monkey', 'football', 'shadow', 'master', 'princess', 'summer', 'flower')
+LEET = str.maketrans({'a': '@', 'e': '3', 'i': '1', 'o': '0', 's': '$'})
+DEFAULT_OPTIONS = {'leet_speak': True, 'common_suffixes': True, 'append_years': True, 'common_patterns': True,
+                   'start_year': 1970, 'end_year': 2024}
+
+
+def make_password(rng, person, birth):
+    """One password following a common human habit; about a fifth use no personal info at all."""
+    word = rng.choice([person['first_name']] * 5 + [person['last_name']] * 2 + [person['pet_name']] * 3 +
+                      [person['city']] + [person['nickname']] * 2)
+    case = rng.choices([str.lower, str.capitalize, str.upper], [60, 35, 5])[0]
+    digits = rng.choices([birth.strftime('%Y'), birth.strftime('%y'), birth.strftime('%m%d'), '1', '12', '123',
+                          '1234', str(rng.randint(0, 99)), str(rng.randint(1990, 2024)), ''],
+                         [14, 14, 6, 12, 6, 12, 4, 12, 8, 12])[0]
+    symbol = rng.choices(['', '!', '@', '#', '.', '$', '!!', '*'], [60, 18, 5, 4, 3, 4, 3, 3])[0]
+    habit = rng.random()
+    if habit < 0.2:
+        return rng.choice(OTHER_WORDS) + str(rng.randint(0, 9999)) # Nothing personal to guess from
+    if habit < 0.3:
+        return case(person['first_name'] + person['last_name']) + digits + symbol
+    if habit < 0.37:
+        return case(word).translate(LEET) + digits
+    if habit < 0.45:
+        return case(word) + symbol + digits
+    return case(word) + digits + symbol
+
+
+def make_dataset(path, people, seed):
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        for _ in range(people):
+            birth = date(1970, 1, 1) + timedelta(days=rng.randrange(35 * 365))
+            person = {'first_name': rng.choice(FIRST_NAMES).capitalize(),
+                      'last_name': rng.choice(LAST_NAMES).capitalize(),
+                      'nickname': rng.choice(FIRST_NAMES)[:3], 'pet_name': rng.choice(PET_NAMES).capitalize(),
+                      'birthdate': birth.isoformat(), 'city': rng.choice(CITIES).capitalize()}
+            person['password'] = make_password(rng, {k: v.lower() for k, v in person.items()}, birth)
+            f.write(json.dumps(person) + '\n')
+    print(f"Wrote {people} synthetic personas to {path}")
+
+
+def load_dataset(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def crack_rank(candidates, password):
+    """1-based position of the password in the candidates, or None"""
+    for rank, guess in enumerate(candidates, 1):
+        if guess == password:
+            return rank
+    return None
+
+
+def evaluate(name, generate, test_set, budgets):
+    ranks, sizes = [], []
+    start = time.perf_counter()
+    for person in test_set:
+        candidates = generate({k: v for k, v in person.items() if k != 'password'})
+        ranks.append(crack_rank(candidates, person['password']))
+        sizes.append(len(candidates))
+    elapsed = time.perf_counter() - start
+    cracked = sum(1 for rank in ranks if rank is not None)
+    results = {'seconds': elapsed, 'mean_candidates': sum(sizes) / len(sizes),
+               'whole_list_rate': cracked / len(test_set), 'budgets': {}}
+    for budget in budgets:
+        cracked = sum(1 for rank in ranks if rank is not None and rank <= budget)
+        results['budgets'][budget] = {'cracked': cracked, 'rate': cracked / len(test_set),
+                                      'per_1k_guesses': 1000 * cracked / (budget * len(test_set))}
+    print(f"{name:<10}" + ''.join(f"{results['budgets'][b]['rate']:>10.1%}" for b in budgets) +
+          f"{results['whole_list_rate']:>10.1%}{results['mean_candidates']:>12,.0f}"
+          f"{elapsed / len(test_set) * 1000:>12.1f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare candidate orderings on held-out passwords')
+    parser.add_argument('--make-dataset', metavar='FILE', help='Write a synthetic persona dataset and exit')
+    parser.add_argument('--people', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--dataset', metavar='FILE', help='JSON lines of personal info + password')
+    parser.add_argument('--corpus', metavar='FILE', help='Train on this password list instead of the dataset')
+    parser.add_argument('--train-fraction', type=float, default=0.8)
+    parser.add_argument('--budgets', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--json', metavar='FILE', help='Write results to FILE')
+    args = parser.parse_args()
+
+    if args.make_dataset:
+        make_dataset(args.make_dataset, args.people, args.seed)
+        return
+    if not args.dataset:
+        parser.error('--dataset or --make-dataset is required')
+
+    records = load_dataset(args.dataset)
+    split = int(len(records) * args.train_fraction)
+    test_set = records[split:]
+    model = PCFGModel()
+    if args.corpus:
+        model.train_file(args.corpus)
+    else:
+        model.train(record['password'] for record in records[:split])
+    budgets = sorted(args.budgets)
+    print(f"Trained on {model.total:,} passwords, testing on {len(test_set):,}")
+    print(f"{'ordering':<10}" + ''.join(f"{'@' + str(b):>10}" for b in budgets) + f"{'all':>10}{'list size':>12}{'ms/person':>12}")
+
+    generator = WordlistGenerator()
+    results = {
+        'by_length': evaluate('by_length', lambda info: generator.generate_wordlist(info, DEFAULT_OPTIONS),
+                              test_set, budgets),
+        'pcfg': evaluate('pcfg', lambda info: generator.generate_ranked(info, model, budgets[-1]), test_set, budgets)
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'dataset': args.dataset, 'test_size': len(test_set), 'results': results}, f, indent=4)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
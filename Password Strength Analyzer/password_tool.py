@@ -4,8 +4,20 @@ import argparse
 import sys
 import os
 from datetime import datetime
+from collections import Counter, defaultdict, deque
+import gzip
+import hashlib
+import heapq
+import io
 import itertools
+import json
+import multiprocessing
+import operator
 import re
+import shutil
+import struct
+import tempfile
+import time
 
 # Try to import required libraries
 try:
@@ -27,6 +39,23 @@ except ImportError:
     NLTK_AVAILABLE = False
     print("Warning: nltk not available. Install with: pip install nltk")
 
+try:
+    import bcrypt
+    BCRYPT_AVAILABLE = True
+except ImportError:
+    BCRYPT_AVAILABLE = False  # Only needed to audit bcrypt hashes, warned about then
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False  # Only needed for .zst wordlists, an error names it then
+
+try:
+    import resource  # Peak memory in merge reports; not on Windows
+except ImportError:
+    resource = None
+
 class PasswordAnalyzer:
     def __init__(self):
         self.leet_speak_map = {
@@ -147,6 +176,48 @@ class WordlistGenerator:
         
     def generate_wordlist(self, personal_info, options):
         """Generate custom wordlist based on personal information"""
+        return list(self.iter_wordlist(personal_info, options))
+    
+    def iter_wordlist(self, personal_info, options):
+        """Yield generate_wordlist's candidates longest first, without building and sorting the whole list.
+        
+        Year combinations are produced one length at a time, so only that length's
+        candidates are held (to drop duplicates). Within a length the order is fixed,
+        which keeps an audit's saved position valid across runs.
+        """
+        words = self._transformed_words(personal_info, options)
+        by_length = {}
+        for word in words:
+            by_length.setdefault(len(word), set()).add(word)
+        if options.get('common_patterns', True):
+            for word in self._generate_common_patterns(personal_info):
+                by_length.setdefault(len(word), set()).add(word)
+        
+        # Year suffixes (full and short year, optionally after a separator) grouped by length
+        suffixes = {}
+        if options.get('append_years', True):
+            for year in range(options.get('start_year', 1970), options.get('end_year', 2024) + 1):
+                for digits in (str(year), str(year)[2:]):
+                    for sep in ['', '-', '_', '.']:
+                        suffixes.setdefault(len(sep + digits), []).append(sep + digits)
+        words = sorted(words)
+        lengths = set(by_length)
+        lengths.update(len(word) + n for word in words for n in suffixes)
+        
+        for length in sorted(lengths, reverse=True):
+            seen = set()
+            for word in sorted(by_length.get(length, ())):
+                seen.add(word)
+                yield word
+            for word in words:
+                for suffix in suffixes.get(length - len(word), ()):
+                    candidate = word + suffix
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        yield candidate
+    
+    def _transformed_words(self, personal_info, options):
+        """Personal words with case, leetspeak and suffix variations"""
         words = set()
         
         # Base words from personal info
@@ -170,19 +241,7 @@ class WordlistGenerator:
                     words.add(word + suffix)
                     words.add(word.lower() + suffix)
         
-        # Add year combinations
-        if options.get('append_years', True):
-            year_words = self._append_years(list(words), 
-                                          options.get('start_year', 1970), 
-                                          options.get('end_year', 2024))
-            words.update(year_words)
-        
-        # Add common patterns
-        if options.get('common_patterns', True):
-            pattern_words = self._generate_common_patterns(personal_info)
-            words.update(pattern_words)
-        
-        return sorted(list(words), key=len, reverse=True)
+        return words
     
     def _get_base_words(self, personal_info):
         """Extract base words from personal information"""
@@ -240,22 +299,6 @@ class WordlistGenerator:
         
         return list(variations)
     
-    def _append_years(self, words, start_year, end_year):
-        """Append years to words"""
-        new_words = set()
-        
-        for word in words:
-            for year in range(start_year, end_year + 1):
-                new_words.add(word + str(year))
-                new_words.add(word + str(year)[2:])  # Short year
-                
-                # Also add with common separators
-                for sep in ['', '-', '_', '.']:
-                    new_words.add(word + sep + str(year))
-                    new_words.add(word + sep + str(year)[2:])
-        
-        return new_words
-    
     def _generate_common_patterns(self, personal_info):
         """Generate common password patterns"""
         patterns = set()
@@ -283,6 +326,578 @@ class WordlistGenerator:
         
         return patterns
 
+    def _ranked_terms(self, personal_info, model, combo_weight=0.25, leet_weight=0.05):
+        """Letter-slot candidates with probabilities, and personal digit strings, for PCFGModel"""
+        words = Counter()
+        digits = []
+        for word in self._get_base_words(personal_info):
+            word = word.replace(' ', '')
+            if word.isdigit():
+                digits.append(word)
+            elif word:
+                words[word.lower()] += 1.0
+        first_name = personal_info.get('first_name', '').lower()
+        last_name = personal_info.get('last_name', '').lower()
+        if first_name and last_name:
+            for combo in [first_name + last_name, last_name + first_name,
+                          first_name[0] + last_name, first_name + last_name[0]]:
+                words[combo] += combo_weight
+
+        total = sum(words.values())
+        cases = model.case_probabilities()
+        letters = Counter()
+        for word, weight in words.items():
+            p_word = weight / total
+            letters[word] += p_word * cases['lower']
+            letters[word.capitalize()] += p_word * cases['capitalized']
+            letters[word.upper()] += p_word * cases['upper']
+            for variation in self._generate_leet_variations(word):
+                letters[variation] += p_word * cases['lower'] * leet_weight / 2
+        return letters, digits
+
+    def iter_candidates(self, personal_info, options, model=None, limit=None):
+        """Yield candidates one at a time: most likely first with a PCFGModel, else longest first (iter_wordlist)"""
+        if model is not None:
+            letters, digits = self._ranked_terms(personal_info, model)
+            if letters:
+                for guess, _ in model.iter_guesses(letters, digits, limit):
+                    yield guess
+            return
+        yield from itertools.islice(self.iter_wordlist(personal_info, options), limit)
+
+    def generate_ranked(self, personal_info, model, limit=10000):
+        """Generate candidates in descending probability under a trained PCFGModel"""
+        letters, digits = self._ranked_terms(personal_info, model)
+        if not letters:
+            return []
+        return [guess for guess, _ in model.iter_guesses(letters, digits, limit)]
+
+class PCFGModel:
+    """Password grammar learned from a corpus, after Weir et al.'s PCFG cracker.
+
+    Each training password is split into runs: 'John1990!' is the structure
+    L D4 S1. Digit and symbol runs keep the strings seen in the corpus; letter
+    runs keep only their case pattern, because at generation time they are
+    filled with the target's personal-info words.
+    """
+    RUNS = re.compile(r'[a-zA-Z]+|[0-9]+|[^a-zA-Z0-9]+')
+
+    def __init__(self, max_terminals=5000, personal_weight=0.5):
+        self.structures = Counter()
+        self.terminals = defaultdict(Counter)  # {'D4': Counter({'1990': 812, ...})}
+        self.cases = Counter()
+        self.total = 0
+        self.max_terminals = max_terminals  # Per slot; deeper terminals are never reached in practice
+        self.personal_weight = personal_weight  # Share of a digit slot given to the target's own dates
+
+    @staticmethod
+    def case_pattern(letters):
+        if letters.islower():
+            return 'lower'
+        if letters.isupper():
+            return 'upper'
+        if letters[0].isupper() and letters[1:].islower():
+            return 'capitalized'
+        return 'other'
+
+    def parse(self, password):
+        """Return the structure and the runs of a password"""
+        runs = self.RUNS.findall(password)
+        structure = []
+        for run in runs:
+            if run[0].isalpha():
+                structure.append('L')
+            elif run[0].isdigit():
+                structure.append(f"D{len(run)}")
+            else:
+                structure.append(f"S{len(run)}")
+        return tuple(structure), runs
+
+    def train(self, passwords):
+        for password in passwords:
+            password = password.rstrip('\r\n')
+            if not password:
+                continue
+            structure, runs = self.parse(password)
+            for slot, run in zip(structure, runs):
+                if slot == 'L':
+                    self.cases[self.case_pattern(run)] += 1
+                else:
+                    self.terminals[slot][run] += 1
+            self.structures[structure] += 1
+            self.total += 1
+        return self
+
+    def train_file(self, path):
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            return self.train(f)
+
+    def case_probabilities(self):
+        total = sum(self.cases.values()) or 1
+        return {case: self.cases[case] / total for case in ('lower', 'capitalized', 'upper', 'other')}
+
+    def _slot_terminals(self, slot, personal):
+        """Terminals of a digit/symbol slot as [(probability, text)], most likely first"""
+        counts = self.terminals[slot]
+        total = sum(counts.values())
+        own = [token for token in personal if slot == f"D{len(token)}" and token.isdigit()]
+        corpus_share = 1 - self.personal_weight if own else 1.0
+        probabilities = Counter({text: corpus_share * count / total
+                                 for text, count in counts.most_common(self.max_terminals)})
+        for token in own:
+            probabilities[token] += self.personal_weight / len(own)
+        return sorted(((p, text) for text, p in probabilities.items()), reverse=True)
+
+    def iter_guesses(self, letters, personal_digits=(), limit=None):
+        """Yield (guess, probability) in descending probability, without enumerating everything.
+
+        ``letters`` maps letter-slot strings to their probability. Uses the
+        "next" function of the PCFG cracker: a max-heap of partially
+        expanded structures, where popping one pushes its successors with a
+        pivot so that every combination is reached exactly once.
+        """
+        letter_terms = sorted(((p, text) for text, p in letters.items() if p > 0), reverse=True)
+        slot_cache = {'L': letter_terms}
+        heap = []
+        for structure_id, (structure, count) in enumerate(self.structures.items()):
+            if 'L' not in structure:
+                continue  # Every guess is built on at least one personal word
+            lists = []
+            for slot in structure:
+                if slot not in slot_cache:
+                    slot_cache[slot] = self._slot_terminals(slot, personal_digits)
+                lists.append(slot_cache[slot])
+            if all(lists):
+                indices = (0,) * len(structure)
+                probability = count / self.total * self._product(lists, indices)
+                heap.append((-probability, structure_id, indices, 0, lists))
+        heapq.heapify(heap)
+
+        seen = set()
+        while heap and (limit is None or len(seen) < limit):
+            negative, structure_id, indices, pivot, lists = heapq.heappop(heap)
+            guess = ''.join(lists[i][index][1] for i, index in enumerate(indices))
+            if guess not in seen:  # Leet letters can rebuild what another structure already made
+                seen.add(guess)
+                yield guess, -negative
+            base = -negative / self._product(lists, indices)
+            for i in range(pivot, len(indices)):
+                if indices[i] + 1 < len(lists[i]):
+                    child = indices[:i] + (indices[i] + 1,) + indices[i + 1:]
+                    heapq.heappush(heap, (-base * self._product(lists, child), structure_id, child, i, lists))
+
+    @staticmethod
+    def _product(lists, indices):
+        probability = 1.0
+        for terms, index in zip(lists, indices):
+            probability *= terms[index][0]
+        return probability
+
+def _md4(data):
+    """Pure-Python MD4 (RFC 1320), for NTLM when OpenSSL no longer ships MD4"""
+    def rotl(x, n):
+        x &= 0xffffffff
+        return ((x << n) | (x >> (32 - n))) & 0xffffffff
+
+    length = len(data)
+    data = data + b'\x80' + b'\x00' * ((55 - length) % 64) + struct.pack('<Q', length * 8)
+    h = [0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476]
+    for offset in range(0, len(data), 64):
+        x = struct.unpack('<16I', data[offset:offset + 64])
+        a, b, c, d = h
+        for i in (0, 4, 8, 12):
+            a = rotl(a + ((b & c) | (~b & d)) + x[i], 3)
+            d = rotl(d + ((a & b) | (~a & c)) + x[i + 1], 7)
+            c = rotl(c + ((d & a) | (~d & b)) + x[i + 2], 11)
+            b = rotl(b + ((c & d) | (~c & a)) + x[i + 3], 19)
+        for i in (0, 1, 2, 3):
+            a = rotl(a + ((b & c) | (b & d) | (c & d)) + x[i] + 0x5a827999, 3)
+            d = rotl(d + ((a & b) | (a & c) | (b & c)) + x[i + 4] + 0x5a827999, 5)
+            c = rotl(c + ((d & a) | (d & b) | (a & b)) + x[i + 8] + 0x5a827999, 9)
+            b = rotl(b + ((c & d) | (c & a) | (d & a)) + x[i + 12] + 0x5a827999, 13)
+        for i in (0, 2, 1, 3):
+            a = rotl(a + (b ^ c ^ d) + x[i] + 0x6ed9eba1, 3)
+            d = rotl(d + (a ^ b ^ c) + x[i + 8] + 0x6ed9eba1, 9)
+            c = rotl(c + (d ^ a ^ b) + x[i + 4] + 0x6ed9eba1, 11)
+            b = rotl(b + (c ^ d ^ a) + x[i + 12] + 0x6ed9eba1, 15)
+        h = [(v + n) & 0xffffffff for v, n in zip(h, (a, b, c, d))]
+    return struct.pack('<4I', *h)
+
+def _md4_digest(data):
+    try:
+        return hashlib.new('md4', data).digest()
+    except ValueError:
+        return _md4(data)
+
+# Fast unsalted digests: (how the candidate is encoded, encoded bytes -> raw digest)
+FAST_HASHES = {
+    'md5': ('utf-8', lambda data: hashlib.md5(data).digest()),
+    'sha1': ('utf-8', lambda data: hashlib.sha1(data).digest()),
+    'sha256': ('utf-8', lambda data: hashlib.sha256(data).digest()),
+    'ntlm': ('utf-16-le', _md4_digest)
+}
+
+_audit_targets = None  # Set in each worker process by _init_audit_worker
+
+def _init_audit_worker(targets):
+    global _audit_targets
+    _audit_targets = targets
+
+def _audit_batch(batch, slow):
+    """Hash one batch of candidates in a worker; returns (matches, candidates, busy seconds, pid)
+
+    Fast digests are looked up in the sets given to the pool; the bcrypt
+    hashes still uncracked come with each batch, so a cracked one stops
+    costing a bcrypt round per candidate.
+    """
+    start = time.process_time()
+    matches = []
+    fast = _audit_targets
+    encoded = {}  # Each encoding of the batch is built once and shared by the digests using it
+    for algorithm, digests in fast.items():
+        encoding, digest = FAST_HASHES[algorithm]
+        if encoding not in encoded:
+            encoded[encoding] = [candidate.encode(encoding) for candidate in batch]
+        for candidate, value in zip(batch, map(digest, encoded[encoding])):
+            if value in digests:
+                matches.append((algorithm, value.hex(), candidate))
+    for stored in slow:  # bcrypt: every candidate against every hash, salts differ
+        for candidate in batch:
+            if bcrypt.checkpw(candidate.encode('utf-8'), stored.encode('utf-8')):
+                matches.append(('bcrypt', stored, candidate))
+                break
+    return matches, len(batch), time.process_time() - start, os.getpid()
+
+class HashAuditor:
+    """Check candidate passwords against a hash file on all cores, without writing a wordlist.
+
+    Hash lines are 'hash' or 'user:hash', or pwdump 'user:rid:lm:nt:::' for
+    NTLM. A 32-hex-digit hash is checked as both MD5 and NTLM. Progress is the
+    number of candidates fully checked, saved to a state file so an
+    interrupted audit resumes from the same position.
+    """
+
+    def __init__(self, hash_file, processes=None, batch_size=2000, state_file=None):
+        self.hash_file = hash_file
+        self.processes = processes or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.state_file = state_file or hash_file + '.audit.json'
+        self.entries = self._load_hashes(hash_file)
+        self.position = 0
+        self.matches = []  # [{'user', 'algorithm', 'hash', 'password'}]
+        self.cracked = set()  # (user, hash) of every match
+
+    @staticmethod
+    def _load_hashes(path):
+        entries = []  # (user, algorithms, hash)
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                fields = line.split(':')
+                if '$2' in line:  # bcrypt hashes contain no ':', so anything before one is the user
+                    user, value = line[:line.find('$2')].rstrip(':'), line[line.find('$2'):]
+                elif len(fields) >= 4 and re.fullmatch(r'[0-9a-fA-F]{32}', fields[3]):
+                    entries.append((fields[0], ('ntlm',), fields[3].lower()))  # pwdump
+                    continue
+                else:
+                    user, value = line.rsplit(':', 1) if ':' in line else ('', line)
+                value = value.strip()
+                if value.startswith('$2'):
+                    entries.append((user, ('bcrypt',), value))
+                elif re.fullmatch(r'[0-9a-fA-F]+', value) and len(value) in (32, 40, 64):
+                    algorithms = {32: ('md5', 'ntlm'), 40: ('sha1',), 64: ('sha256',)}[len(value)]
+                    entries.append((user, algorithms, value.lower()))
+                else:
+                    print(f"Skipping unrecognised hash line: {line[:60]}")
+        return entries
+
+    def _targets(self):
+        fast = defaultdict(set)
+        slow = []
+        for user, algorithms, value in self.entries:
+            if (user, value) in self.cracked:
+                continue
+            if algorithms == ('bcrypt',):
+                slow.append(value)
+            else:
+                for algorithm in algorithms:
+                    fast[algorithm].add(bytes.fromhex(value))
+        if slow and not BCRYPT_AVAILABLE:
+            print("Warning: bcrypt not available, skipping bcrypt hashes. Install with: pip install bcrypt")
+            slow = []
+        return dict(fast), slow
+
+    def _record(self, algorithm, value, candidate):
+        for user, algorithms, stored in self.entries:
+            if stored == value and algorithm in algorithms and (user, stored) not in self.cracked:
+                self.cracked.add((user, stored))
+                self.matches.append({'user': user, 'algorithm': algorithm, 'hash': stored, 'password': candidate})
+                print(f"[Match] {user or stored[:16]} ({algorithm}): {candidate}")
+
+    def load_state(self, run_key):
+        """Restore position and matches if the state file belongs to this hash file and candidate stream"""
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get('run_key') != run_key:
+            print(f"Ignoring {self.state_file}: it is for a different hash file or candidate set")
+            return False
+        self.position = state['position']
+        self.matches = state['matches']
+        self.cracked = {(match['user'], match['hash']) for match in self.matches}
+        print(f"Resuming at candidate {self.position:,} with {len(self.matches)} match(es) already found")
+        return True
+
+    def save_state(self, run_key):
+        temp = self.state_file + '.tmp'
+        with open(temp, 'w') as f:
+            json.dump({'run_key': run_key, 'position': self.position, 'matches': self.matches}, f)
+        os.replace(temp, self.state_file)
+
+    def _uncracked_bcrypt(self, slow):
+        return [value for value in slow if not any(stored == value for _, stored in self.cracked)]
+
+    def _in_order(self, pool, batches, slow):
+        """Yield batch results in submission order with a bounded number of batches in flight.
+
+        Pool.imap would read the whole candidate stream into its task queue;
+        results in order mean position only ever covers fully checked candidates.
+        """
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.apply_async(_audit_batch, (batch, self._uncracked_bcrypt(slow))))
+            if len(pending) >= 2 * self.processes:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    def run(self, candidates, run_key, save_interval=5.0):
+        """Check an iterable of candidates starting at self.position; returns per-core stats"""
+        fast, slow = self._targets()
+        if not fast and not slow:
+            print("Nothing left to audit")
+            return {}
+        candidates = itertools.islice(candidates, self.position, None)
+        batches = iter(lambda: list(itertools.islice(candidates, self.batch_size)), [])
+        workers = {}  # {pid: [candidates, busy seconds]}
+        start = last_save = time.perf_counter()
+        with multiprocessing.Pool(self.processes, initializer=_init_audit_worker, initargs=(fast,)) as pool:
+            try:
+                for matches, count, busy, pid in self._in_order(pool, batches, slow):
+                    for algorithm, value, candidate in matches:
+                        self._record(algorithm, value, candidate)
+                    self.position += count
+                    stats = workers.setdefault(pid, [0, 0.0])
+                    stats[0] += count
+                    stats[1] += busy
+                    if time.perf_counter() - last_save >= save_interval:
+                        self.save_state(run_key)
+                        last_save = time.perf_counter()
+                    if len(self.matches) == len(self.entries):
+                        print("All hashes cracked")
+                        break
+            except KeyboardInterrupt:
+                print(f"Interrupted at candidate {self.position:,}; rerun with --resume to continue")
+                pool.terminate()
+        self.save_state(run_key)
+        elapsed = time.perf_counter() - start
+        checked = sum(stats[0] for stats in workers.values())
+        return {
+            'candidates': checked,
+            'seconds': elapsed,
+            'candidates_per_sec': checked / elapsed if elapsed else 0.0,
+            'per_core': {pid: count / busy if busy else 0.0 for pid, (count, busy) in workers.items()}
+        }
+
+def open_wordlist(path, mode='rb'):
+    """Open a wordlist in binary mode, gzip or zstd compressed by extension"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, compresslevel=6)
+    if path.endswith('.zst'):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard not available. Install with: pip install zstandard")
+        if 'r' in mode:
+            return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+        return zstandard.ZstdCompressor(threads=-1).stream_writer(open(path, 'wb'), closefd=True)
+    return open(path, mode)
+
+class WordlistMerger:
+    """Merge and deduplicate wordlists larger than memory with an external merge sort.
+
+    Words are handled as raw bytes, so lists in any encoding pass through
+    unchanged. Input is read in 1 MB blocks into a set (a Counter when
+    ordering by frequency) until the memory budget is reached, then written
+    out as a sorted run file; the runs are k-way merged with heapq.merge and
+    equal neighbours collapsed. Ordering by frequency needs the final
+    counts, so the merged (word, count) stream is sorted a second time.
+    """
+    ORDERS = ('lex', 'length', 'frequency')
+    ENTRY_OVERHEAD = 180  # Approximate bytes per distinct word held in memory, on top of its length
+    MAX_FAN_IN = 64  # Runs merged at once; more are merged in passes to stay under open-file limits
+
+    def __init__(self, memory_mb=256, temp_dir=None):
+        self.memory_limit = memory_mb * 1024 * 1024
+        self.temp_dir = temp_dir
+        self.stats = {'bytes_in': 0, 'words_in': 0, 'words_out': 0, 'bytes_out': 0, 'runs': 0}
+
+    def _blocks(self, sources):
+        """Yield lists of words from files and/or iterables of str candidates"""
+        for source in sources:
+            if isinstance(source, str):
+                with open_wordlist(source) as f:
+                    tail = b''
+                    while True:
+                        data = f.read(1 << 20)
+                        if not data:
+                            break
+                        self.stats['bytes_in'] += len(data)
+                        lines = (tail + data).split(b'\n')
+                        tail = lines.pop()
+                        yield self._clean(lines)
+                    if tail:
+                        yield self._clean([tail])
+            else:  # e.g. WordlistGenerator.iter_candidates
+                source = iter(source)
+                while True:
+                    words = [word.encode('utf-8') for word in itertools.islice(source, 65536)]
+                    if not words:
+                        break
+                    self.stats['bytes_in'] += sum(map(len, words)) + len(words)
+                    yield self._clean(words)
+
+    def _clean(self, lines):
+        if any(line.endswith(b'\r') for line in lines[:1] + lines[-1:]):
+            lines = [line.rstrip(b'\r') for line in lines]  # CRLF file
+        words = list(filter(None, lines))
+        self.stats['words_in'] += len(words)
+        return words
+
+    # Run files hold one word per line, or 'word<TAB>count' lines when counts are kept
+    @staticmethod
+    def _write_words(f, words):
+        for block in iter(lambda: list(itertools.islice(words, 65536)), []):
+            f.write(b'\n'.join(block) + b'\n')
+
+    @staticmethod
+    def _write_counted(f, records):
+        f.writelines(b'%s\t%d\n' % record for record in records)
+
+    @staticmethod
+    def _read_words(f):
+        return map(operator.itemgetter(slice(None, -1)), f)  # Drop the newline, without a Python loop
+
+    @staticmethod
+    def _read_counted(f):
+        for line in f:
+            word, count = line.rsplit(b'\t', 1)
+            yield word, int(count)
+
+    def _spill(self, items, write, work_dir):
+        fd, path = tempfile.mkstemp(suffix='.run', dir=work_dir)
+        with open(fd, 'wb', buffering=1 << 20) as f:
+            write(f, iter(items))
+        self.stats['runs'] += 1
+        return path
+
+    def _input_runs(self, sources, order, work_dir):
+        """First pass: sorted, deduplicated runs of the input, each built within the memory budget"""
+        counted = order == 'frequency'
+        runs, seen = [], Counter() if counted else set()
+
+        def spill():
+            if counted:  # Lex order so equal words meet in the merge; counts are summed there
+                return self._spill(((word, seen[word]) for word in sorted(seen)), self._write_counted, work_dir)
+            words = sorted(seen)
+            if order == 'length':
+                words.sort(key=len, reverse=True)  # Stable, so equal lengths stay in lex order
+            return self._spill(words, self._write_words, work_dir)
+
+        for words in self._blocks(sources):
+            seen.update(words)
+            average = self.stats['bytes_in'] / max(self.stats['words_in'], 1)
+            if len(seen) * (self.ENTRY_OVERHEAD + average) >= self.memory_limit:
+                runs.append(spill())
+                seen.clear()
+        if seen or not runs:
+            runs.append(spill())
+        return runs
+
+    def _merge(self, runs, read, write, combine, key, work_dir):
+        """Merge sorted runs (in passes of MAX_FAN_IN) and combine equal neighbours"""
+        while len(runs) > self.MAX_FAN_IN:
+            group, runs = runs[:self.MAX_FAN_IN], runs[self.MAX_FAN_IN:]
+            runs.append(self._spill(self._merge(group, read, write, combine, key, work_dir), write, work_dir))
+            for run in group:
+                os.remove(run)
+        files = [open(run, 'rb', buffering=1 << 20) for run in runs]
+        try:
+            yield from combine(heapq.merge(*(read(f) for f in files), key=key))
+        finally:
+            for f in files:
+                f.close()
+
+    @staticmethod
+    def _unique(words):
+        return map(operator.itemgetter(0), itertools.groupby(words))
+
+    @staticmethod
+    def _sum_counts(records):
+        for word, group in itertools.groupby(records, key=lambda record: record[0]):
+            yield word, sum(count for _, count in group)
+
+    def _by_frequency(self, records, work_dir):
+        """Second pass for frequency order: runs sorted by count, merged by (-count, word)"""
+        runs, chunk = [], []
+        average = self.stats['bytes_in'] / max(self.stats['words_in'], 1)
+        for record in records:
+            chunk.append(record)
+            if len(chunk) * (self.ENTRY_OVERHEAD + average) >= self.memory_limit:
+                chunk.sort(key=lambda record: record[1], reverse=True)  # Records arrive in lex order
+                runs.append(self._spill(chunk, self._write_counted, work_dir))
+                chunk = []
+        chunk.sort(key=lambda record: record[1], reverse=True)
+        runs.append(self._spill(chunk, self._write_counted, work_dir))
+        del chunk
+        return self._merge(runs, self._read_counted, self._write_counted, iter,
+                           lambda record: (-record[1], record[0]), work_dir)
+
+    def merge(self, sources, output, order='lex'):
+        """Merge files and/or candidate iterables into one deduplicated output wordlist"""
+        if order not in self.ORDERS:
+            raise ValueError(f"Unknown order {order!r}, expected one of {', '.join(self.ORDERS)}")
+        start = time.perf_counter()
+        work_dir = tempfile.mkdtemp(prefix='wordlist-merge-', dir=self.temp_dir)
+        try:
+            runs = self._input_runs(sources, order, work_dir)
+            if order == 'frequency':
+                records = self._merge(runs, self._read_counted, self._write_counted, self._sum_counts, None,
+                                      work_dir)
+                words = (word for word, _ in self._by_frequency(records, work_dir))
+            else:
+                key = (lambda word: (-len(word), word)) if order == 'length' else None
+                words = self._merge(runs, self._read_words, self._write_words, self._unique, key, work_dir)
+            with open_wordlist(output, 'wb') as f:
+                # Written in blocks: compressors pay per write() call
+                for block in iter(lambda: list(itertools.islice(words, 65536)), []):
+                    data = b'\n'.join(block) + b'\n'
+                    f.write(data)
+                    self.stats['words_out'] += len(block)
+                    self.stats['bytes_out'] += len(data)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        elapsed = time.perf_counter() - start
+        self.stats['seconds'] = elapsed
+        self.stats['mb_per_sec'] = self.stats['bytes_in'] / 1e6 / elapsed if elapsed else 0.0
+        if resource:
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.stats['peak_memory_mb'] = peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+        return self.stats
+
 class PasswordAnalyzerGUI:
     def __init__(self, root):
         self.root = root
@@ -657,6 +1272,66 @@ def run_gui():
     app = PasswordAnalyzerGUI(root)
     root.mainloop()
 
+def run_audit(args, generator, personal_info, options, model):
+    """Stream candidates into HashAuditor and print matches and throughput"""
+    auditor = HashAuditor(args.audit, args.processes, args.batch_size, args.state)
+    if not auditor.entries:
+        print(f"Error: no usable hashes in {args.audit}")
+        return
+    print(f"Auditing {len(auditor.entries)} hash(es) with {auditor.processes} process(es)")
+    
+    # The saved position is only meaningful for the same hashes and the same candidate sequence
+    with open(args.audit, 'rb') as f:
+        hashes_digest = hashlib.sha256(f.read()).hexdigest()
+    run_key = hashlib.sha256(json.dumps([hashes_digest, personal_info, options, args.corpus,
+                                         args.top if model else None], sort_keys=True).encode()).hexdigest()
+    if args.resume:
+        auditor.load_state(run_key)
+    
+    limit = args.top if model else None
+    stats = auditor.run(generator.iter_candidates(personal_info, options, model, limit), run_key)
+    if stats:
+        print(f"Checked {stats['candidates']:,} candidates in {stats['seconds']:.1f}s "
+              f"({stats['candidates_per_sec']:,.0f}/s)")
+        for n, rate in enumerate(sorted(stats['per_core'].values(), reverse=True)):
+            print(f"  worker {n}: {rate:,.0f} candidates/s per core")
+    print(f"Position {auditor.position:,} saved to {auditor.state_file}")
+    print(f"Matches: {len(auditor.matches)}/{len(auditor.entries)}")
+    for match in auditor.matches:
+        print(f"- {match['user'] or match['hash'][:16]} ({match['algorithm']}): {match['password']}")
+
+def run_merge(args):
+    """Merge wordlists (plus generated words if personal info is given) and report throughput"""
+    sources = list(args.merge)
+    personal_info = {
+        'first_name': args.first_name or '',
+        'last_name': args.last_name or '',
+        'nickname': args.nickname or '',
+        'pet_name': args.pet_name or '',
+        'birthdate': args.birthdate or ''
+    }
+    if any(personal_info.values()):
+        generator = WordlistGenerator()
+        if args.corpus:
+            sources.append(generator.iter_candidates(personal_info, None, PCFGModel().train_file(args.corpus),
+                                                     args.top))
+        else:
+            sources.append(generator.iter_candidates(personal_info, {}))
+    
+    merger = WordlistMerger(args.memory, args.temp_dir)
+    try:
+        stats = merger.merge(sources, args.output, args.order)
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}")
+        return
+    print(f"Merged {stats['words_in']:,} words into {stats['words_out']:,} unique "
+          f"({stats['words_in'] - stats['words_out']:,} duplicates removed), {args.order} order")
+    print(f"Read {stats['bytes_in'] / 1e6:,.1f} MB in {stats['seconds']:.1f}s ({stats['mb_per_sec']:.1f} MB/s), "
+          f"{stats['runs']} sorted run(s)")
+    if 'peak_memory_mb' in stats:
+        print(f"Peak memory: {stats['peak_memory_mb']:.0f} MB (budget {args.memory} MB)")
+    print(f"Saved to: {args.output}")
+
 def run_cli():
     """Run in command line interface mode"""
     parser = argparse.ArgumentParser(description='Password Strength Analyzer & Wordlist Generator')
@@ -672,6 +1347,26 @@ def run_cli():
     parser.add_argument('--pet-name', help='Pet name for wordlist')
     parser.add_argument('--birthdate', help='Birthdate (YYYY-MM-DD) for wordlist')
     parser.add_argument('--output', '-o', default='wordlist.txt', help='Output filename')
+    parser.add_argument('--corpus', metavar='FILE', help='Password corpus (one per line) to train a PCFG model; '
+                                                         'candidates are then written most likely first')
+    parser.add_argument('--top', type=int, default=10000, help='Number of candidates with --corpus')
+    
+    # Hash audit mode: candidates go straight to the hashing workers, no wordlist file
+    parser.add_argument('--audit', metavar='HASHFILE', help='Check generated candidates against MD5/SHA-1/SHA-256/'
+                                                            'NTLM/bcrypt hashes (authorized audits only)')
+    parser.add_argument('--processes', type=int, help='Hashing processes (default: all cores)')
+    parser.add_argument('--batch-size', type=int, default=2000, help='Candidates per batch sent to a worker')
+    parser.add_argument('--state', metavar='FILE', help='Audit progress file (default: HASHFILE.audit.json)')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted audit from its saved position')
+    
+    # Merge mode: external sort, so inputs may be far larger than memory
+    parser.add_argument('--merge', nargs='+', metavar='FILE', help='Merge and deduplicate wordlists (.gz/.zst '
+                                                                   'read and written by extension) into --output; '
+                                                                   'personal info options add generated words')
+    parser.add_argument('--order', choices=WordlistMerger.ORDERS, default='lex',
+                        help='Merged order: lex, length (longest first) or frequency across inputs')
+    parser.add_argument('--memory', type=int, default=256, help='Memory budget in MB for --merge')
+    parser.add_argument('--temp-dir', help='Directory for --merge sorted runs (default: system temp)')
     
     args = parser.parse_args()
     
@@ -689,7 +1384,10 @@ def run_cli():
         for feedback in result['feedback']:
             print(f"- {feedback}")
     
-    elif args.generate:
+    elif args.merge:
+        run_merge(args)
+    
+    elif args.generate or args.audit:
         # Generate wordlist
         personal_info = {
             'first_name': args.first_name or '',
@@ -704,14 +1402,27 @@ def run_cli():
             return
         
         generator = WordlistGenerator()
-        wordlist = generator.generate_wordlist(personal_info, {
+        options = {
             'leet_speak': True,
             'common_suffixes': True,
             'append_years': True,
             'common_patterns': True,
             'start_year': 1970,
             'end_year': 2024
-        })
+        }
+        model = None
+        if args.corpus:
+            model = PCFGModel().train_file(args.corpus)
+            print(f"Trained on {model.total:,} passwords ({len(model.structures):,} structures)")
+        
+        if args.audit:
+            run_audit(args, generator, personal_info, options, model)
+            return
+        
+        if model:
+            wordlist = generator.generate_ranked(personal_info, model, args.top)
+        else:
+            wordlist = generator.generate_wordlist(personal_info, options)
         
         with open(args.output, 'w') as f:
             for word in wordlist:
@@ -721,7 +1432,7 @@ def run_cli():
         print(f"Saved to: {args.output}")
     
     else:
-        print("Please specify either --analyze or --generate option")
+        print("Please specify --analyze, --generate, --audit or --merge option")
         print("Use --help for more information")
 
 if __name__ == "__main__":
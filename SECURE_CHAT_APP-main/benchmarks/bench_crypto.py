@@ -0,0 +1,133 @@
+# benchmarks/bench_crypto.py
+# Micro-benchmarks for every CryptoUtils primitive across payload and key sizes.
+#   python benchmarks/bench_crypto.py --json baseline.json
+#   python benchmarks/bench_crypto.py --compare baseline.json   # exit 1 on regression
+import argparse
+import base64
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import metrics
+from utils.crypto import CryptoUtils
+
+PAYLOAD_SIZES = (16, 256, 4096, 65536)
+RSA_KEY_SIZES = (2048, 3072, 4096)
+
+
+def measure(func, min_time, min_runs=3):
+    """Run func repeatedly for at least min_time seconds; returns seconds per call."""
+    func() # Warm-up
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time and runs >= min_runs:
+            return elapsed / runs
+
+
+def run_benchmarks(args):
+    results = {}
+
+    def record(name, func, size=0):
+        seconds = measure(func, args.min_time)
+        results[name] = {'seconds': seconds, 'bytes': size}
+        throughput = f"{size / seconds / 1e6:10.1f} MB/s" if size else ''
+        print(f"{name:<36}{seconds * 1e6:14.1f} us{throughput}")
+
+    for key_size in args.key_sizes:
+        record(f"generate_rsa_key_pair[{key_size}]", lambda: CryptoUtils.generate_rsa_key_pair(key_size))
+        private_key, public_key = CryptoUtils.generate_rsa_key_pair(key_size)
+        public_pem = CryptoUtils.serialize_public_key(public_key)
+        private_pem = CryptoUtils.serialize_private_key(private_key)
+        record(f"serialize_public_key[{key_size}]", lambda: CryptoUtils.serialize_public_key(public_key))
+        record(f"deserialize_public_key[{key_size}]", lambda: CryptoUtils.deserialize_public_key(public_pem),
+               len(public_pem))
+        record(f"serialize_private_key[{key_size}]", lambda: CryptoUtils.serialize_private_key(private_key))
+        record(f"deserialize_private_key[{key_size}]", lambda: CryptoUtils.deserialize_private_key(private_pem),
+               len(private_pem))
+        # OAEP wraps a base64 AES key, as chat.js does
+        wrapped_key = base64.b64encode(CryptoUtils.generate_aes_key()).decode('utf-8')
+        wrapped = CryptoUtils.rsa_encrypt(public_key, wrapped_key)
+        record(f"rsa_encrypt[{key_size}]", lambda: CryptoUtils.rsa_encrypt(public_key, wrapped_key), len(wrapped_key))
+        record(f"rsa_decrypt[{key_size}]", lambda: CryptoUtils.rsa_decrypt(private_key, wrapped), len(wrapped))
+
+    aes_key = CryptoUtils.generate_aes_key()
+    record('generate_aes_key', CryptoUtils.generate_aes_key)
+    for size in args.payload_sizes:
+        plaintext = 'x' * size
+        raw = plaintext.encode('utf-8')
+        padded = CryptoUtils.pkcs7_pad(raw)
+        iv, ciphertext = CryptoUtils.aes_encrypt(aes_key, plaintext)
+        record(f"pkcs7_pad[{size}]", lambda: CryptoUtils.pkcs7_pad(raw), size)
+        record(f"pkcs7_unpad[{size}]", lambda: CryptoUtils.pkcs7_unpad(padded), len(padded))
+        record(f"aes_encrypt[{size}]", lambda: CryptoUtils.aes_encrypt(aes_key, plaintext), size)
+        record(f"aes_decrypt[{size}]", lambda: CryptoUtils.aes_decrypt(aes_key, iv, ciphertext), len(ciphertext))
+        record(f"hmac_sha256[{size}]", lambda: CryptoUtils.hmac_sha256(aes_key, raw), size)
+
+    x_private, x_public = CryptoUtils.generate_x25519_key_pair()
+    peer_private, peer_public = CryptoUtils.generate_x25519_key_pair()
+    shared = CryptoUtils.x25519_exchange(x_private, peer_public)
+    record('generate_x25519_key_pair', CryptoUtils.generate_x25519_key_pair)
+    record('x25519_exchange', lambda: CryptoUtils.x25519_exchange(x_private, peer_public))
+    record('hkdf[96]', lambda: CryptoUtils.hkdf(shared, length=96), len(shared))
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old and result['seconds'] > old['seconds'] * threshold:
+            regressions.append((name, old['seconds'], result['seconds']))
+    for name, old, new in regressions:
+        print(f"[Regression] {name}: {old * 1e6:.1f} us -> {new * 1e6:.1f} us ({new / old:.2f}x)")
+    if not regressions:
+        print(f"No regressions beyond {threshold:.2f}x of {baseline_path}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CryptoUtils primitive benchmarks')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds to spend per case')
+    parser.add_argument('--payload-sizes', type=int, nargs='+', default=list(PAYLOAD_SIZES))
+    parser.add_argument('--key-sizes', type=int, nargs='+', default=list(RSA_KEY_SIZES))
+    parser.add_argument('--json', metavar='FILE', help='Write results to FILE')
+    parser.add_argument('--compare', metavar='FILE', help='Baseline JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25, help='Allowed slowdown vs baseline')
+    parser.add_argument('--metrics', action='store_true', help='Also run with utils.metrics enabled and '
+                                                               'print the Prometheus export')
+    args = parser.parse_args()
+
+    print(f"{'operation':<36}{'per call':>17}{'throughput':>15}")
+    results = run_benchmarks(args)
+
+    if args.metrics:
+        metrics.instrument()
+        print("\nWith instrumentation enabled:")
+        instrumented = run_benchmarks(args)
+        overhead = [instrumented[n]['seconds'] - results[n]['seconds'] for n in results]
+        print(f"\nMedian instrumentation overhead: {sorted(overhead)[len(overhead) // 2] * 1e6:.2f} us/call\n")
+        print(metrics.registry.to_prometheus())
+        metrics.uninstrument()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': results}, f, indent=4)
+        print(f"Results written to {args.json}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
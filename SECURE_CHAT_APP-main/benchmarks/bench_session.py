@@ -0,0 +1,66 @@
+# benchmarks/bench_session.py
+# Compares the per-message RSA key wrapping path against the session ratchet.
+#   python benchmarks/bench_session.py --messages 500 --size 256
+import argparse
+import base64
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.crypto import CryptoUtils
+from utils.session import SecureSession
+
+
+def bench_per_message_rsa(private_key, public_key, plaintext, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        # Sender: fresh AES key per message, wrapped with the recipient's RSA key
+        aes_key = CryptoUtils.generate_aes_key()
+        iv, ciphertext = CryptoUtils.aes_encrypt(aes_key, plaintext)
+        wrapped = CryptoUtils.rsa_encrypt(public_key, base64.b64encode(aes_key).decode('utf-8'))
+        # Recipient: RSA private-key unwrap, then AES
+        unwrapped = base64.b64decode(CryptoUtils.rsa_decrypt(private_key, wrapped))
+        CryptoUtils.aes_decrypt(unwrapped, iv, ciphertext)
+    return time.perf_counter() - start
+
+
+def bench_session(private_key, public_key, plaintext, count, mode):
+    start = time.perf_counter()
+    # One asymmetric exchange for the whole conversation
+    if mode == 'x25519':
+        alice_priv, alice_pub = CryptoUtils.generate_x25519_key_pair()
+        bob_priv, bob_pub = CryptoUtils.generate_x25519_key_pair()
+        alice = SecureSession.from_x25519(alice_priv, bob_pub, initiator=True)
+        bob = SecureSession.from_x25519(bob_priv, alice_pub, initiator=False)
+    else:
+        alice, wrapped = SecureSession.create_rsa_wrapped(public_key)
+        bob = SecureSession.accept_rsa_wrapped(private_key, wrapped)
+    for _ in range(count):
+        bob.decrypt(alice.encrypt(plaintext))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-message RSA vs session ratchet throughput')
+    parser.add_argument('--messages', type=int, default=500, help='Messages per run')
+    parser.add_argument('--size', type=int, default=256, help='Plaintext size in bytes')
+    args = parser.parse_args()
+
+    private_key, public_key = CryptoUtils.generate_rsa_key_pair()
+    plaintext = 'x' * args.size
+
+    results = [('per-message RSA', bench_per_message_rsa(private_key, public_key, plaintext, args.messages))]
+    for mode in ('rsa-wrapped', 'x25519'):
+        results.append((f"session ({mode})", bench_session(private_key, public_key, plaintext, args.messages, mode)))
+
+    baseline = results[0][1]
+    print(f"{args.messages} messages of {args.size} bytes")
+    print(f"{'path':<24}{'seconds':>10}{'msg/s':>12}{'speedup':>10}")
+    for name, elapsed in results:
+        print(f"{name:<24}{elapsed:>10.3f}{args.messages / elapsed:>12.0f}{baseline / elapsed:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
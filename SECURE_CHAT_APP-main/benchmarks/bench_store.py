@@ -0,0 +1,96 @@
+# benchmarks/bench_store.py
+# Ingest and history-paging benchmark for utils/store.py.
+#   python benchmarks/bench_store.py --messages 2000000 --conversations 20000
+import argparse
+import base64
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.store import MessageStore
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MessageStore ingest and history read benchmark')
+    parser.add_argument('--messages', type=int, default=1000000, help='Messages to ingest')
+    parser.add_argument('--conversations', type=int, default=10000, help='Distinct user pairs')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per write transaction')
+    parser.add_argument('--page-size', type=int, default=50, help='Messages per history page')
+    parser.add_argument('--reads', type=int, default=2000, help='History pages to read')
+    parser.add_argument('--db', help='Database path (default: temporary file)')
+    args = parser.parse_args()
+
+    workdir = None
+    db_path = args.db
+    if not db_path:
+        workdir = tempfile.mkdtemp(prefix='store-bench-')
+        db_path = os.path.join(workdir, 'bench.db')
+
+    # Typical chat.js envelope: RSA-2048 wrapped key, 16-byte IV, short message
+    template = {
+        'encryptedAesKey': base64.b64encode(os.urandom(256)).decode('ascii'),
+        'iv': base64.b64encode(os.urandom(16)).decode('ascii'),
+        'ciphertext': base64.b64encode(os.urandom(96)).decode('ascii'),
+        'timestamp': '2024-01-01T12:00:00.000Z',
+    }
+    pairs = [(f"user{i}", f"user{i + 1}") for i in range(args.conversations)]
+    rng = random.Random(1)
+
+    store = MessageStore(db_path, batch_size=args.batch_size, flush_interval=3600)
+    start = time.perf_counter()
+    for _ in range(args.messages):
+        a, b = pairs[rng.randrange(len(pairs))]
+        message = dict(template)
+        message['sender'], message['recipient'] = (a, b) if rng.random() < 0.5 else (b, a)
+        store.append(message)
+    store.flush()
+    ingest_time = time.perf_counter() - start
+
+    json_size = args.messages * (len(template['encryptedAesKey']) + len(template['iv'])
+                                 + len(template['ciphertext']) + len(template['timestamp']) + 90)
+    db_size = sum(os.path.getsize(db_path + suffix) for suffix in ('', '-wal') if os.path.exists(db_path + suffix))
+
+    first_page, deep_page = [], []
+    for _ in range(args.reads):
+        a, b = pairs[rng.randrange(len(pairs))]
+        t0 = time.perf_counter()
+        messages, cursor = store.history(a, b, limit=args.page_size)
+        first_page.append(time.perf_counter() - t0)
+        # Scroll back as a client would and time the oldest page, read with the last cursor handed out
+        deepest = None
+        while cursor:
+            t0 = time.perf_counter()
+            messages, cursor = store.history(b, a, before=cursor, limit=args.page_size)
+            deepest = time.perf_counter() - t0
+        if deepest is not None:
+            deep_page.append(deepest)
+    store.close()
+
+    print(f"ingest: {args.messages:,} messages in {ingest_time:.1f}s "
+          f"({args.messages / ingest_time:,.0f} msg/s, batch {args.batch_size})")
+    print(f"size: {db_size / args.messages:.0f} bytes/message on disk "
+          f"(~{json_size / args.messages:.0f} as base64 JSON)")
+    for name, samples in (('latest page', first_page), ('deep page', deep_page)):
+        if samples:
+            print(f"{name} ({args.page_size} msgs): p50 {statistics.median(samples) * 1000:.2f} ms, "
+                  f"p99 {percentile(samples, 99) * 1000:.2f} ms, max {max(samples) * 1000:.2f} ms")
+
+    if workdir:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        os.rmdir(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# benchmarks/load_relay.py
+# Simulates many chat clients against relay.py on localhost.
+#   python relay.py --port 8765 --workers 4 &
+#   python benchmarks/load_relay.py --clients 2000 --messages 20 --procs 4
+# Use --spawn to start a relay (with --workers processes) for the test.
+# Thousands of clients need a matching open-file limit (ulimit -n).
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websockets.asyncio.client import connect
+
+import relay
+
+FAKE_KEY = '-----BEGIN PUBLIC KEY-----\n' + 'A' * 392 + '\n-----END PUBLIC KEY-----'
+CIPHERTEXT = 'B' * 172 # Roughly a short base64 AES-CBC message
+NEW_MESSAGE_PREFIX = '{"event":"new_message"'
+
+
+async def run_client(username, args, usernames, ready, start, latencies, counters):
+    uri = f"ws://{args.host}:{args.port}/?username={username}"
+    async with connect(uri, max_size=2 ** 24, open_timeout=120, compression=None) as websocket:
+        async def receive():
+            async for raw in websocket:
+                # Skip presence/key broadcasts without paying for a JSON parse
+                if not raw.startswith(NEW_MESSAGE_PREFIX):
+                    continue
+                frame = json.loads(raw)
+                if frame['data']['recipient'] == username:
+                    latencies.append(time.perf_counter() - float(frame['data']['timestamp']))
+                    counters['received'] += 1
+
+        # Read continuously, like a browser tab, so presence broadcasts do not back up
+        receiver = asyncio.ensure_future(receive())
+        await websocket.send(relay.encode('register_public_key', {'publicKey': FAKE_KEY}))
+        ready.release()
+        await start.wait()
+        for _ in range(args.messages):
+            await websocket.send(relay.encode('send_message', {
+                'recipient': random.choice(usernames),
+                'encryptedAesKey': CIPHERTEXT,
+                'iv': 'C' * 24,
+                'ciphertext': CIPHERTEXT,
+                'timestamp': repr(time.perf_counter()),
+            }))
+            counters['sent'] += 1
+            if args.interval:
+                await asyncio.sleep(args.interval)
+        await asyncio.sleep(args.drain)
+        receiver.cancel()
+
+
+async def run_group(own_names, args, usernames, barrier):
+    ready = asyncio.Semaphore(0)
+    start = asyncio.Event()
+    latencies = []
+    counters = {'sent': 0, 'received': 0, 'errors': 0}
+    tasks = []
+    for i, username in enumerate(own_names):
+        tasks.append(asyncio.ensure_future(run_client(username, args, usernames, ready, start, latencies, counters)))
+        if i % 100 == 99:
+            await asyncio.sleep(0.05) # Avoid overflowing the listen backlog
+    for _ in own_names:
+        await ready.acquire()
+    # Every process starts sending at the same moment
+    await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+    start.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    counters['errors'] = sum(1 for r in results if isinstance(r, Exception))
+    return counters, latencies
+
+
+def _group_process(own_names, args, usernames, barrier, results):
+    results.put(asyncio.run(run_group(own_names, args, usernames, barrier)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test for relay.py')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--clients', type=int, default=1000, help='Simulated users')
+    parser.add_argument('--messages', type=int, default=20, help='Messages sent per user')
+    parser.add_argument('--interval', type=float, default=0.0, help='Pause between sends per user (s)')
+    parser.add_argument('--drain', type=float, default=2.0, help='Seconds to wait for in-flight messages')
+    parser.add_argument('--procs', type=int, default=max(1, (os.cpu_count() or 2) // 2), help='Client processes')
+    parser.add_argument('--spawn', action='store_true', help='Start a relay for the duration of the test')
+    parser.add_argument('--workers', type=int, default=1, help='Relay workers when using --spawn')
+    args = parser.parse_args()
+
+    relay_process = None
+    if args.spawn:
+        relay_process = subprocess.Popen(
+            [sys.executable, relay.__file__, '--host', args.host, '--port', str(args.port),
+             '--workers', str(args.workers)],
+            start_new_session=True)
+        time.sleep(1.0)
+
+    usernames = [f"user{i}" for i in range(args.clients)]
+    barrier = multiprocessing.Barrier(args.procs + 1)
+    results = multiprocessing.Queue()
+    processes = []
+    connect_start = time.perf_counter()
+    for p in range(args.procs):
+        process = multiprocessing.Process(target=_group_process,
+                                          args=(usernames[p::args.procs], args, usernames, barrier, results))
+        process.start()
+        processes.append(process)
+    barrier.wait()
+    run_start = time.perf_counter()
+    connect_time = run_start - connect_start
+
+    sent = received = errors = 0
+    latencies = []
+    for _ in processes:
+        counters, group_latencies = results.get()
+        sent += counters['sent']
+        received += counters['received']
+        errors += counters['errors']
+        latencies.extend(group_latencies)
+    for process in processes:
+        process.join()
+    # Senders finish, then every client idles for --drain seconds
+    run_time = max(time.perf_counter() - run_start - args.drain, 1e-9)
+
+    print(f"clients: {args.clients} in {args.procs} processes, connected in {connect_time:.2f}s")
+    print(f"sent: {sent}, received: {received}, client errors: {errors}")
+    print(f"throughput: {received / run_time:,.0f} msg/s")
+    if latencies:
+        latencies.sort()
+        print(f"latency ms: p50 {statistics.median(latencies) * 1000:.1f}, "
+              f"p99 {latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000:.1f}, "
+              f"max {latencies[-1] * 1000:.1f}")
+    if relay_process is not None:
+        # Takes the hub and every worker down with the parent
+        os.killpg(relay_process.pid, signal.SIGTERM)
+
+
+if __name__ == '__main__':
+    main()
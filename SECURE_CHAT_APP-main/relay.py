@@ -0,0 +1,409 @@
+# relay.py
+# Asyncio websocket relay for the events used by static/js/chat.js.
+#
+# Frames are JSON objects {"event": ..., "data": ...}. Clients connect with
+# ws://host:port/?username=<name> and then emit register_public_key and
+# send_message; the relay answers with public_keys_exchange, new_public_key,
+# user_list_update, status_message and new_message. With --db, fetch_history
+# {peer, before, limit} is answered with history_page {peer, messages, cursor}.
+# The relay only ever sees ciphertext.
+#
+#   python relay.py --port 8765                # single process
+#   python relay.py --port 8765 --workers 4    # local multi-process fan-out
+#   python relay.py --port 8765 --db chat.db   # persist history (utils/store.py)
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+from urllib.parse import parse_qs, urlsplit
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from utils.store import MessageStore
+
+QUEUE_SIZE = 256        # Outbound frames buffered per user
+SEND_TIMEOUT = 5.0      # Seconds a sender waits on a full recipient queue
+USER_LIST_DELAY = 0.05  # Coalesce bursts of joins/leaves into one broadcast
+HISTORY_PAGE_LIMIT = 200
+
+
+def encode(event, data):
+    return json.dumps({'event': event, 'data': data}, separators=(',', ':'))
+
+
+class Client:
+    def __init__(self, username, websocket, queue_size=QUEUE_SIZE):
+        self.username = username
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    async def enqueue(self, frame, timeout=SEND_TIMEOUT):
+        """Queue a frame; waits for room (backpressure) and returns False on a stuck consumer."""
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self.queue.put(frame), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def writer(self):
+        while True:
+            frame = await self.queue.get()
+            if frame is None:
+                break
+            try:
+                await self.websocket.send(frame)
+            except ConnectionClosed:
+                break
+
+
+class RelayServer:
+    def __init__(self, queue_size=QUEUE_SIZE, send_timeout=SEND_TIMEOUT, hub_path=None, store=None):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.hub_path = hub_path
+        self.store = store
+        self.clients = {}       # Local connections: {username: Client}
+        self.public_keys = {}   # Directory for all workers: {username: PEM}
+        self.online = {}        # Open sessions per online user, across all workers
+        self.hub_writer = None
+        self._user_list_task = None
+        self.stats = {'delivered': 0, 'routed': 0, 'dropped': 0, 'slow_disconnects': 0}
+
+    # --- Fan-out helpers ---
+
+    async def deliver(self, username, frame):
+        client = self.clients.get(username)
+        if client is not None:
+            if await client.enqueue(frame, self.send_timeout):
+                self.stats['delivered'] += 1
+            else:
+                self.stats['slow_disconnects'] += 1
+                print(f"[Relay] Disconnecting slow consumer {username}")
+                await client.websocket.close(1013, 'slow consumer')
+        elif username in self.online and self.hub_writer is not None:
+            self._send_hub({'type': 'route', 'recipient': username, 'frame': frame})
+            self.stats['routed'] += 1
+        else:
+            self.stats['dropped'] += 1
+
+    def deliver_local(self, username, frame):
+        # For frames routed from other workers: the hub reader serves every remote sender,
+        # so one full queue must not stall it; a client that cannot keep up is cut off
+        client = self.clients.get(username)
+        if client is None:
+            self.stats['dropped'] += 1
+            return
+        try:
+            client.queue.put_nowait(frame)
+            self.stats['delivered'] += 1
+        except asyncio.QueueFull:
+            self.stats['slow_disconnects'] += 1
+            print(f"[Relay] Disconnecting slow consumer {username}")
+            asyncio.ensure_future(client.websocket.close(1013, 'slow consumer'))
+
+    def broadcast_local(self, frame, exclude=None):
+        # Broadcasts never block a sender: a client that cannot keep up is cut off
+        for username, client in list(self.clients.items()):
+            if username == exclude:
+                continue
+            try:
+                client.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self.stats['slow_disconnects'] += 1
+                asyncio.ensure_future(client.websocket.close(1013, 'slow consumer'))
+
+    def schedule_user_list_update(self):
+        if self._user_list_task is None or self._user_list_task.done():
+            self._user_list_task = asyncio.ensure_future(self._user_list_update())
+
+    async def _user_list_update(self):
+        await asyncio.sleep(USER_LIST_DELAY)
+        self.broadcast_local(encode('user_list_update', sorted(self.online)))
+
+    # --- Presence and key directory ---
+
+    def user_joined(self, username):
+        self.online[username] = self.online.get(username, 0) + 1
+        self.schedule_user_list_update()
+
+    def user_left(self, username):
+        # A reconnect can open the new session (maybe on another worker) before the
+        # old socket has closed; the user is only gone once no session is left
+        sessions = self.online.get(username, 0) - 1
+        if sessions > 0:
+            self.online[username] = sessions
+            return
+        self.online.pop(username, None)
+        self.public_keys.pop(username, None)
+        self.schedule_user_list_update()
+
+    def key_registered(self, username, public_key):
+        self.public_keys[username] = public_key
+        self.broadcast_local(encode('new_public_key', {'username': username, 'publicKey': public_key}),
+                             exclude=username)
+
+    # --- Client events ---
+
+    async def on_register_public_key(self, client, data):
+        public_key = data.get('publicKey') if isinstance(data, dict) else None
+        if not public_key or not isinstance(public_key, str):
+            return
+        self.key_registered(client.username, public_key)
+        self._send_hub({'type': 'key', 'username': client.username, 'publicKey': public_key})
+        await client.enqueue(encode('public_keys_exchange', self.public_keys), self.send_timeout)
+
+    async def on_send_message(self, client, data):
+        recipient = data.get('recipient') if isinstance(data, dict) else None
+        # A list or dict recipient is unhashable; either would end this connection's read loop
+        if not isinstance(recipient, str):
+            await client.enqueue(encode('status_message', {'text': "Malformed message rejected."}))
+            return
+        if recipient not in self.online:
+            await client.enqueue(encode('status_message', {'text': f"{recipient} is not online."}))
+            return
+        message = {
+            'sender': client.username,
+            'recipient': recipient,
+            'encryptedAesKey': data.get('encryptedAesKey'),
+            'iv': data.get('iv'),
+            'ciphertext': data.get('ciphertext'),
+            'timestamp': data.get('timestamp'),
+        }
+        if self.store is not None:
+            try:
+                self.store.append(message)
+            except (ValueError, TypeError):
+                await client.enqueue(encode('status_message', {'text': "Malformed message rejected."}))
+                return
+        frame = encode('new_message', message)
+        # Serialized once, delivered to the recipient and echoed to the sender
+        await self.deliver(recipient, frame)
+        if recipient != client.username:
+            await self.deliver(client.username, frame)
+
+    async def on_fetch_history(self, client, data):
+        peer = data.get('peer') if isinstance(data, dict) else None
+        if self.store is None or not peer or not isinstance(peer, str):
+            return
+        try:
+            limit = max(1, min(int(data.get('limit') or 50), HISTORY_PAGE_LIMIT))
+            messages, cursor = self.store.history(client.username, peer, before=data.get('before'), limit=limit)
+        except (ValueError, TypeError):
+            return
+        await client.enqueue(encode('history_page', {'peer': peer, 'messages': messages, 'cursor': cursor}),
+                             self.send_timeout)
+
+    async def _flush_store(self):
+        # Write batches also go out when traffic is too light to fill them
+        while True:
+            await asyncio.sleep(self.store.flush_interval)
+            self.store.flush()
+
+    async def handler(self, websocket):
+        query = parse_qs(urlsplit(websocket.request.path).query)
+        username = (query.get('username') or [''])[0].strip()
+        if not username:
+            await websocket.close(4000, 'username required')
+            return
+
+        previous = self.clients.get(username)
+        if previous is not None:
+            await previous.websocket.close(4001, 'replaced by new connection')
+
+        client = Client(username, websocket, self.queue_size)
+        self.clients[username] = client
+        writer = asyncio.ensure_future(client.writer())
+        self.user_joined(username)
+        self._send_hub({'type': 'join', 'username': username})
+        try:
+            async for raw in websocket:
+                try:
+                    frame = json.loads(raw)
+                    event, data = frame['event'], frame.get('data') or {}
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if event == 'register_public_key':
+                    await self.on_register_public_key(client, data)
+                elif event == 'send_message':
+                    await self.on_send_message(client, data)
+                elif event == 'fetch_history':
+                    await self.on_fetch_history(client, data)
+        except ConnectionClosed:
+            pass
+        finally:
+            if self.clients.get(username) is client:
+                del self.clients[username]
+            self.user_left(username)
+            self._send_hub({'type': 'leave', 'username': username})
+            if client.queue.full():
+                writer.cancel()
+            else:
+                client.queue.put_nowait(None)
+            await asyncio.gather(writer, return_exceptions=True)
+
+    # --- Multi-process hub link ---
+
+    def _send_hub(self, message):
+        if self.hub_writer is not None:
+            self.hub_writer.write((json.dumps(message, separators=(',', ':')) + '\n').encode('utf-8'))
+
+    async def connect_hub(self):
+        reader, self.hub_writer = await asyncio.open_unix_connection(self.hub_path, limit=2 ** 24)
+        asyncio.ensure_future(self._hub_reader(reader))
+
+    async def _hub_reader(self, reader):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            kind = message['type']
+            if kind == 'route':
+                self.deliver_local(message['recipient'], message['frame'])
+            elif kind == 'join':
+                self.user_joined(message['username'])
+            elif kind == 'leave':
+                self.user_left(message['username'])
+            elif kind == 'key':
+                self.key_registered(message['username'], message['publicKey'])
+
+    async def run(self, host, port, reuse_port=False):
+        if self.hub_path:
+            await self.connect_hub()
+        if self.store is not None:
+            asyncio.ensure_future(self._flush_store())
+        async with serve(self.handler, host, port, reuse_port=reuse_port, max_size=2 ** 20,
+                         compression=None): # Ciphertext does not compress
+            print(f"[Relay] pid {os.getpid()} listening on ws://{host}:{port}")
+            await asyncio.Future()
+
+
+class RelayHub:
+    """Forwards presence to every worker and routes messages to the worker owning the recipient."""
+
+    def __init__(self):
+        self.workers = []   # StreamWriters of connected workers
+        self.owners = {}    # {username: StreamWriter}
+        self.sessions = {}  # {StreamWriter: {username: open sessions}}
+        self.state = {}     # {username: public key or None}, replayed to late workers
+
+    def _write(self, writer, message):
+        writer.write((json.dumps(message, separators=(',', ':')) + '\n').encode('utf-8'))
+
+    def _release(self, writer, username):
+        # writer holds no more sessions of username: hand routing to a worker that
+        # still does, or forget the user
+        holders = [w for w, sessions in self.sessions.items() if username in sessions]
+        if not holders:
+            self.owners.pop(username, None)
+            self.state.pop(username, None)
+        elif self.owners.get(username) is writer:
+            self.owners[username] = holders[-1]
+
+    async def handle_worker(self, reader, writer):
+        self.workers.append(writer)
+        # Late workers get one join per open session, so their counts match everyone else's
+        for sessions in list(self.sessions.values()):
+            for username, count in sessions.items():
+                for _ in range(count):
+                    self._write(writer, {'type': 'join', 'username': username})
+        for username, public_key in self.state.items():
+            if public_key:
+                self._write(writer, {'type': 'key', 'username': username, 'publicKey': public_key})
+        self.sessions[writer] = {}
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                kind = message['type']
+                if kind == 'route':
+                    owner = self.owners.get(message['recipient'])
+                    if owner is not None and owner is not writer:
+                        owner.write(line)
+                    continue
+                username = message['username']
+                sessions = self.sessions[writer]
+                if kind == 'join':
+                    sessions[username] = sessions.get(username, 0) + 1
+                    self.owners[username] = writer
+                    self.state[username] = None
+                elif kind == 'leave':
+                    if sessions.get(username, 0) > 1:
+                        sessions[username] -= 1
+                    else:
+                        sessions.pop(username, None)
+                        self._release(writer, username)
+                elif kind == 'key':
+                    self.state[username] = message['publicKey']
+                for other in self.workers:
+                    if other is not writer:
+                        other.write(line)
+        finally:
+            self.workers.remove(writer)
+            for username, count in self.sessions.pop(writer, {}).items():
+                self._release(writer, username)
+                for other in self.workers:
+                    for _ in range(count):
+                        self._write(other, {'type': 'leave', 'username': username})
+
+    async def run(self, path, ready=None):
+        server = await asyncio.start_unix_server(self.handle_worker, path, limit=2 ** 24)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+
+def _run_hub(path, ready):
+    asyncio.run(RelayHub().run(path, ready))
+
+
+def _run_worker(host, port, hub_path, queue_size, db_path=None):
+    store = MessageStore(db_path) if db_path else None
+    server = RelayServer(queue_size=queue_size, hub_path=hub_path, store=store)
+    asyncio.run(server.run(host, port, reuse_port=hub_path is not None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Encrypted chat message relay')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address')
+    parser.add_argument('--port', type=int, default=8765, help='Websocket port')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes sharing the port (SO_REUSEPORT)')
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE, help='Outbound frames buffered per user')
+    parser.add_argument('--db', help='SQLite file for persistent message history')
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        _run_worker(args.host, args.port, None, args.queue_size, args.db)
+        return
+
+    hub_path = os.path.join(tempfile.mkdtemp(prefix='relay-'), 'hub.sock')
+    ready = multiprocessing.Event()
+    processes = [multiprocessing.Process(target=_run_hub, args=(hub_path, ready), daemon=True)]
+    processes[0].start()
+    ready.wait()
+    for _ in range(args.workers):
+        process = multiprocessing.Process(target=_run_worker,
+                                          args=(args.host, args.port, hub_path, args.queue_size, args.db),
+                                          daemon=True)
+        process.start()
+        processes.append(process)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
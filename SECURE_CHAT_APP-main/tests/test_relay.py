@@ -0,0 +1,142 @@
+# tests/test_relay.py
+# RelayServer event handlers driven directly, without sockets.
+#   python -m pytest tests
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from relay import Client, RelayHub, RelayServer
+from utils.store import MessageStore
+
+
+class FakeWebsocket:
+    def __init__(self):
+        self.closed = None
+
+    async def close(self, code=1000, reason=''):
+        self.closed = (code, reason)
+
+
+def frames(client):
+    """Decoded frames waiting in a client's outbound queue."""
+    out = []
+    while not client.queue.empty():
+        out.append(json.loads(client.queue.get_nowait()))
+    return out
+
+
+def connect(server, username):
+    client = Client(username, FakeWebsocket(), server.queue_size)
+    server.clients[username] = client
+    server.user_joined(username)
+    return client
+
+
+def message(**overrides):
+    data = {'recipient': 'bob', 'encryptedAesKey': 'a2V5', 'iv': 'aXY=', 'ciphertext': 'Y3Q=',
+            'timestamp': '2024-01-01T00:00:00.000Z'}
+    data.update(overrides)
+    return data
+
+
+@pytest.mark.parametrize('timestamp', [1704067200000, ['2024-01-01'], {'at': 'now'}],
+                         ids=['number', 'list', 'dict'])
+def test_non_string_timestamp_is_rejected(tmp_path, timestamp):
+    async def run():
+        server = RelayServer(store=MessageStore(str(tmp_path / 'chat.db')))
+        alice, bob = connect(server, 'alice'), connect(server, 'bob')
+        await server.on_send_message(alice, message(timestamp=timestamp))
+        assert frames(alice) == [{'event': 'status_message', 'data': {'text': "Malformed message rejected."}}]
+        assert frames(bob) == []
+        assert server.store.history('alice', 'bob') == ([], None)
+    asyncio.run(run())
+
+
+def test_naive_timestamp_is_read_as_utc(tmp_path):
+    store = MessageStore(str(tmp_path / 'chat.db'))
+    store.append(dict(message(timestamp='2024-01-01T00:00:00'), sender='alice'))
+    messages, _ = store.history('alice', 'bob')
+    assert messages[0]['timestamp'] == '2024-01-01T00:00:00.000Z'
+
+
+@pytest.mark.parametrize('data', [['bob'], 'bob', message(recipient=['bob']), message(recipient={'name': 'bob'})],
+                         ids=['list-data', 'string-data', 'list-recipient', 'dict-recipient'])
+def test_malformed_send_message_is_rejected(data):
+    async def run():
+        server = RelayServer()
+        alice, bob = connect(server, 'alice'), connect(server, 'bob')
+        await server.on_send_message(alice, data)
+        assert frames(alice) == [{'event': 'status_message', 'data': {'text': "Malformed message rejected."}}]
+        assert frames(bob) == []
+    asyncio.run(run())
+
+
+def test_malformed_history_request_is_ignored(tmp_path):
+    async def run():
+        server = RelayServer(store=MessageStore(str(tmp_path / 'chat.db')))
+        alice = connect(server, 'alice')
+        server.store.append(dict(message(), sender='alice'))
+        for data in (['bob'], {'peer': ['bob']}, {'peer': 'bob', 'before': ['1']}):
+            await server.on_fetch_history(alice, data)
+        assert frames(alice) == []
+    asyncio.run(run())
+
+
+def test_reconnect_on_another_worker_keeps_user_online():
+    async def run():
+        worker_a, worker_b = RelayServer(), RelayServer()
+        connect(worker_a, 'alice')
+        worker_b.user_joined('alice')          # Hub join from worker A
+        connect(worker_b, 'alice')             # Reconnect lands on worker B...
+        worker_a.user_joined('alice')          # ...and worker A hears about it
+        worker_a.user_left('alice')            # Then the old socket on A finishes closing
+        worker_b.user_left('alice')            # Hub leave from worker A
+        assert 'alice' in worker_a.online and 'alice' in worker_b.online
+        worker_b.user_left('alice')
+        worker_a.user_left('alice')
+        assert 'alice' not in worker_a.online and 'alice' not in worker_b.online
+    asyncio.run(run())
+
+
+def test_hub_routes_to_the_worker_still_holding_a_session(tmp_path):
+    async def run():
+        path = str(tmp_path / 'hub.sock')
+        hub = RelayHub()
+        ready = asyncio.Event()
+        hub_task = asyncio.ensure_future(hub.run(path, ready))
+        await ready.wait()
+
+        async def worker():
+            return await asyncio.open_unix_connection(path)
+
+        async def send(link, **message):
+            link[1].write((json.dumps(message) + '\n').encode('utf-8'))
+            await link[1].drain()
+
+        async def receive(link):
+            return json.loads(await asyncio.wait_for(link[0].readline(), 1))
+
+        a, b, c = await worker(), await worker(), await worker()
+        # c sees every presence message, so each one is waited for in order
+        for link, kind in ((b, 'join'), (a, 'join'), (a, 'leave')): # Newer session on A, then A closes
+            await send(link, type=kind, username='alice')
+            assert (await receive(c))['type'] == kind
+        assert [(await receive(b))['type'] for _ in range(2)] == ['join', 'leave']
+        await send(c, type='route', recipient='alice', frame='hello')
+        assert (await receive(b))['frame'] == 'hello'
+
+        late = await worker()
+        assert await receive(late) == {'type': 'join', 'username': 'alice'}
+        await send(b, type='leave', username='alice')
+        assert await receive(late) == {'type': 'leave', 'username': 'alice'}
+        assert hub.owners == {} and hub.state == {}
+        for link in (a, b, c, late):
+            link[1].close()
+        hub_task.cancel()
+        await asyncio.gather(hub_task, return_exceptions=True)
+    asyncio.run(run())
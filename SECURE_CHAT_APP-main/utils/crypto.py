@@ -1,6 +1,9 @@
 # utils/crypto.py
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import rsa, padding, x25519
+from cryptography.hazmat.primitives import padding as sym_padding
+from cryptography.hazmat.primitives import hmac
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
@@ -9,10 +12,10 @@ import os
 
 class CryptoUtils:
     @staticmethod
-    def generate_rsa_key_pair():
+    def generate_rsa_key_pair(key_size=2048):
         private_key = rsa.generate_private_key(
             public_exponent=65537,
-            key_size=2048,
+            key_size=key_size,
             backend=default_backend()
         )
         public_key = private_key.public_key()
@@ -76,14 +79,23 @@ class CryptoUtils:
     def generate_aes_key():
         return os.urandom(32) # 256-bit key
 
+    @staticmethod
+    def pkcs7_pad(data):
+        # PKCS7 padding for AES
+        padder = sym_padding.PKCS7(algorithms.AES.block_size).padder()
+        return padder.update(data) + padder.finalize()
+
+    @staticmethod
+    def pkcs7_unpad(data):
+        unpadder = sym_padding.PKCS7(algorithms.AES.block_size).unpadder()
+        return unpadder.update(data) + unpadder.finalize()
+
     @staticmethod
     def aes_encrypt(key, plaintext):
         iv = os.urandom(16) # 128-bit IV
         cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
         encryptor = cipher.encryptor()
-        # PKCS7 padding for AES
-        padder = padding.PKCS7(algorithms.AES.block_size).padder()
-        padded_data = padder.update(plaintext.encode('utf-8')) + padder.finalize()
+        padded_data = CryptoUtils.pkcs7_pad(plaintext.encode('utf-8'))
         ciphertext = encryptor.update(padded_data) + encryptor.finalize()
         return iv, ciphertext
 
@@ -92,7 +104,42 @@ class CryptoUtils:
         cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
         decryptor = cipher.decryptor()
         padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
-        # Unpadding PKCS7
-        unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
-        plaintext = unpadder.update(padded_plaintext) + unpadder.finalize()
-        return plaintext.decode('utf-8')
\ No newline at end of file
+        plaintext = CryptoUtils.pkcs7_unpad(padded_plaintext)
+        return plaintext.decode('utf-8')
+
+    @staticmethod
+    def generate_x25519_key_pair():
+        private_key = x25519.X25519PrivateKey.generate()
+        public_key = private_key.public_key()
+        return private_key, public_key
+
+    @staticmethod
+    def serialize_x25519_public_key(public_key):
+        return public_key.public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+
+    @staticmethod
+    def deserialize_x25519_public_key(public_key_bytes):
+        return x25519.X25519PublicKey.from_public_bytes(public_key_bytes)
+
+    @staticmethod
+    def x25519_exchange(private_key, peer_public_key):
+        return private_key.exchange(peer_public_key)
+
+    @staticmethod
+    def hkdf(key_material, length=32, salt=None, info=b''):
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=length,
+            salt=salt,
+            info=info,
+            backend=default_backend()
+        ).derive(key_material)
+
+    @staticmethod
+    def hmac_sha256(key, data):
+        h = hmac.HMAC(key, hashes.SHA256(), backend=default_backend())
+        h.update(data)
+        return h.finalize()
@@ -0,0 +1,160 @@
+# utils/metrics.py
+# Opt-in per-operation metrics for CryptoUtils.
+#
+#   from utils import metrics
+#   metrics.instrument()          # wrap every CryptoUtils method
+#   ...
+#   print(metrics.registry.to_prometheus())
+#   metrics.uninstrument()
+#
+# Nothing is wrapped until instrument() is called, so the default path pays no
+# overhead. Timings are inclusive: aes_encrypt includes its pkcs7_pad call.
+import bisect
+import functools
+import json
+import threading
+import time
+
+from utils.crypto import CryptoUtils
+
+# Latency histogram bucket upper bounds in seconds (Prometheus "le" labels)
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                   0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Which positional argument carries the data being processed, per method
+PAYLOAD_ARG = {
+    'deserialize_public_key': 0,
+    'deserialize_private_key': 0,
+    'rsa_encrypt': 1,
+    'rsa_decrypt': 1,
+    'pkcs7_pad': 0,
+    'pkcs7_unpad': 0,
+    'aes_encrypt': 1,
+    'aes_decrypt': 2,
+    'hkdf': 0,
+    'hmac_sha256': 1,
+}
+
+
+class OperationStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.bytes = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1) # Last slot is +Inf
+
+    def observe(self, seconds, size, failed):
+        self.count += 1
+        self.errors += failed
+        self.total_seconds += seconds
+        self.bytes += size
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_seconds': self.total_seconds,
+            'mean_seconds': self.total_seconds / self.count if self.count else 0.0,
+            'bytes': self.bytes,
+            'buckets': dict(zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], self.buckets)),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = {} # {method name: OperationStats}
+
+    def observe(self, name, seconds, size, failed=False):
+        with self.lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = OperationStats()
+            stats.observe(seconds, size, failed)
+
+    def reset(self):
+        with self.lock:
+            self.operations = {}
+
+    def to_json(self, indent=None):
+        with self.lock:
+            return json.dumps({name: stats.to_dict() for name, stats in sorted(self.operations.items())},
+                              indent=indent)
+
+    def to_prometheus(self):
+        lines = [
+            '# HELP crypto_operation_seconds Latency of CryptoUtils operations.',
+            '# TYPE crypto_operation_seconds histogram',
+        ]
+        with self.lock:
+            items = sorted(self.operations.items())
+            for name, stats in items:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f'crypto_operation_seconds_bucket{{op="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'crypto_operation_seconds_bucket{{op="{name}",le="+Inf"}} {stats.count}')
+                lines.append(f'crypto_operation_seconds_sum{{op="{name}"}} {stats.total_seconds!r}')
+                lines.append(f'crypto_operation_seconds_count{{op="{name}"}} {stats.count}')
+            lines.append('# HELP crypto_operation_bytes_total Payload bytes processed by CryptoUtils operations.')
+            lines.append('# TYPE crypto_operation_bytes_total counter')
+            for name, stats in items:
+                lines.append(f'crypto_operation_bytes_total{{op="{name}"}} {stats.bytes}')
+            lines.append('# HELP crypto_operation_errors_total CryptoUtils operations that raised.')
+            lines.append('# TYPE crypto_operation_errors_total counter')
+            for name, stats in items:
+                lines.append(f'crypto_operation_errors_total{{op="{name}"}} {stats.errors}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+_originals = {} # {method name: original staticmethod}
+
+
+def _payload_size(name, args):
+    index = PAYLOAD_ARG.get(name)
+    if index is None or index >= len(args):
+        return 0
+    value = args[index]
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    return 0
+
+
+def _wrap(name, func, target):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            target.observe(name, time.perf_counter() - start, _payload_size(name, args), failed)
+    return wrapper
+
+
+def instrument(target=None):
+    """Wrap every CryptoUtils static method so calls are recorded in ``target``."""
+    target = target or registry
+    for name, attr in list(vars(CryptoUtils).items()):
+        if name.startswith('_') or not isinstance(attr, staticmethod) or name in _originals:
+            continue
+        _originals[name] = attr
+        setattr(CryptoUtils, name, staticmethod(_wrap(name, attr.__func__, target)))
+    return target
+
+
+def uninstrument():
+    for name, attr in _originals.items():
+        setattr(CryptoUtils, name, attr)
+    _originals.clear()
+
+
+def is_instrumented():
+    return bool(_originals)
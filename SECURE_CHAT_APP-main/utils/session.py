@@ -0,0 +1,99 @@
+# utils/session.py
+import base64
+import hmac as _hmac
+import os
+
+from utils.crypto import CryptoUtils
+
+ROOT_INFO = b'secure-chat root v1'
+CHAIN_INFO = b'secure-chat chain v1'
+MAX_SKIP = 1000 # Upper bound on cached keys for out-of-order messages
+
+
+class SymmetricRatchet:
+    """HKDF chain: every step yields one message key pair and replaces the chain key.
+
+    Old chain keys are overwritten as soon as they are used, so a compromise of the
+    current state does not reveal keys of earlier messages (forward secrecy).
+    """
+
+    def __init__(self, chain_key):
+        self.chain_key = chain_key
+        self.index = 0
+
+    def step(self):
+        okm = CryptoUtils.hkdf(self.chain_key, length=96, info=CHAIN_INFO)
+        self.chain_key = okm[:32]
+        index = self.index
+        self.index += 1
+        return index, okm[32:64], okm[64:]
+
+
+class SecureSession:
+    """One asymmetric exchange per conversation, symmetric crypto per message."""
+
+    def __init__(self, root_secret, initiator):
+        chains = CryptoUtils.hkdf(root_secret, length=64, info=ROOT_INFO)
+        if initiator:
+            send_key, recv_key = chains[:32], chains[32:]
+        else:
+            send_key, recv_key = chains[32:], chains[:32]
+        self.sending = SymmetricRatchet(send_key)
+        self.receiving = SymmetricRatchet(recv_key)
+        self.skipped_keys = {} # {index: (aes_key, mac_key)}
+
+    # --- Session establishment ---
+
+    @classmethod
+    def from_x25519(cls, own_private_key, peer_public_key, initiator):
+        shared = CryptoUtils.x25519_exchange(own_private_key, peer_public_key)
+        return cls(shared, initiator)
+
+    @classmethod
+    def create_rsa_wrapped(cls, peer_rsa_public_key):
+        # Same wrapping the per-message path uses, but only once per conversation
+        root_secret = os.urandom(32)
+        wrapped = CryptoUtils.rsa_encrypt(peer_rsa_public_key, base64.b64encode(root_secret).decode('utf-8'))
+        return cls(root_secret, initiator=True), wrapped
+
+    @classmethod
+    def accept_rsa_wrapped(cls, own_rsa_private_key, wrapped_secret):
+        root_secret = base64.b64decode(CryptoUtils.rsa_decrypt(own_rsa_private_key, wrapped_secret))
+        return cls(root_secret, initiator=False)
+
+    # --- Messages ---
+
+    @staticmethod
+    def _mac_input(counter, iv, ciphertext):
+        return counter.to_bytes(8, 'big') + iv + ciphertext
+
+    def encrypt(self, plaintext):
+        counter, aes_key, mac_key = self.sending.step()
+        iv, ciphertext = CryptoUtils.aes_encrypt(aes_key, plaintext)
+        mac = CryptoUtils.hmac_sha256(mac_key, self._mac_input(counter, iv, ciphertext))
+        return {'counter': counter, 'iv': iv, 'ciphertext': ciphertext, 'mac': mac}
+
+    def _receive_keys(self, counter):
+        if counter in self.skipped_keys:
+            return self.skipped_keys.pop(counter)
+        if counter < self.receiving.index:
+            raise ValueError(f"Message key {counter} already used or discarded")
+        if counter - self.receiving.index > MAX_SKIP:
+            raise ValueError(f"Message counter {counter} too far ahead")
+        while self.receiving.index < counter:
+            index, aes_key, mac_key = self.receiving.step()
+            self.skipped_keys[index] = (aes_key, mac_key)
+        while len(self.skipped_keys) > MAX_SKIP:
+            del self.skipped_keys[min(self.skipped_keys)]
+        _, aes_key, mac_key = self.receiving.step()
+        return aes_key, mac_key
+
+    def decrypt(self, message):
+        counter = message['counter']
+        aes_key, mac_key = self._receive_keys(counter)
+        expected = CryptoUtils.hmac_sha256(mac_key, self._mac_input(counter, message['iv'], message['ciphertext']))
+        if not _hmac.compare_digest(expected, message['mac']):
+            # Keep the key so a forged message cannot burn a genuine one
+            self.skipped_keys[counter] = (aes_key, mac_key)
+            raise ValueError("Message authentication failed")
+        return CryptoUtils.aes_decrypt(aes_key, message['iv'], message['ciphertext'])
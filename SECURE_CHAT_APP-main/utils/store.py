@@ -0,0 +1,150 @@
+# utils/store.py
+# Server-side history of opaque ciphertext envelopes, kept in SQLite.
+import base64
+import sqlite3
+import struct
+import time
+from datetime import datetime, timezone
+
+# version, len(encryptedAesKey), len(iv), then the three raw byte strings
+ENVELOPE_HEADER = struct.Struct('>BHB')
+ENVELOPE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY,
+    user_a TEXT NOT NULL,
+    user_b TEXT NOT NULL,
+    UNIQUE (user_a, user_b)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation INTEGER NOT NULL,
+    from_a INTEGER NOT NULL,
+    sent_at INTEGER NOT NULL,
+    envelope BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation, id);
+"""
+
+
+def encode_envelope(message):
+    """Pack the base64 fields sent by chat.js into one compact binary blob."""
+    wrapped_key = base64.b64decode(message.get('encryptedAesKey') or '')
+    iv = base64.b64decode(message.get('iv') or '')
+    ciphertext = base64.b64decode(message.get('ciphertext') or '')
+    # struct.error would escape the relay's malformed-message handling
+    if len(wrapped_key) > 0xFFFF:
+        raise ValueError(f"Wrapped key too long ({len(wrapped_key)} bytes)")
+    if len(iv) > 0xFF:
+        raise ValueError(f"IV too long ({len(iv)} bytes)")
+    return ENVELOPE_HEADER.pack(ENVELOPE_VERSION, len(wrapped_key), len(iv)) + wrapped_key + iv + ciphertext
+
+
+def decode_envelope(blob):
+    version, key_len, iv_len = ENVELOPE_HEADER.unpack_from(blob)
+    if version != ENVELOPE_VERSION:
+        raise ValueError(f"Unknown envelope version {version}")
+    offset = ENVELOPE_HEADER.size
+    wrapped_key = blob[offset:offset + key_len]
+    iv = blob[offset + key_len:offset + key_len + iv_len]
+    ciphertext = blob[offset + key_len + iv_len:]
+    return {
+        'encryptedAesKey': base64.b64encode(wrapped_key).decode('ascii'),
+        'iv': base64.b64encode(iv).decode('ascii'),
+        'ciphertext': base64.b64encode(ciphertext).decode('ascii'),
+    }
+
+
+def _timestamp_to_ms(timestamp):
+    if timestamp is None or timestamp == '':
+        return int(time.time() * 1000)
+    if not isinstance(timestamp, str):
+        raise ValueError(f"Timestamp must be an ISO string, not {type(timestamp).__name__}")
+    try:
+        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except ValueError:
+        return int(time.time() * 1000)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc) # chat.js sends UTC; never read it as server local time
+    return int(dt.timestamp() * 1000)
+
+
+def _ms_to_timestamp(ms):
+    dt = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    return dt.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+class MessageStore:
+    def __init__(self, path, batch_size=500, flush_interval=0.2):
+        self.conn = sqlite3.connect(path, timeout=30) # Relay workers may share the file
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.last_flush = time.monotonic()
+        self.conversations = {} # {(user_a, user_b): id}
+
+    def _conversation(self, user_1, user_2, create=True):
+        pair = (user_1, user_2) if user_1 <= user_2 else (user_2, user_1)
+        conv_id = self.conversations.get(pair)
+        if conv_id is not None:
+            return pair, conv_id
+        if create:
+            # OR IGNORE: another relay worker may have created it first
+            with self.conn:
+                self.conn.execute('INSERT OR IGNORE INTO conversations (user_a, user_b) VALUES (?, ?)', pair)
+        row = self.conn.execute('SELECT id FROM conversations WHERE user_a=? AND user_b=?', pair).fetchone()
+        if row is None:
+            return pair, None
+        conv_id = row[0]
+        self.conversations[pair] = conv_id
+        return pair, conv_id
+
+    def append(self, message):
+        """Queue a relayed new_message payload; written with the next batch."""
+        pair, conv_id = self._conversation(message['sender'], message['recipient'])
+        self.pending.append((conv_id, int(message['sender'] == pair[0]),
+                             _timestamp_to_ms(message.get('timestamp')), encode_envelope(message)))
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT INTO messages (conversation, from_a, sent_at, envelope) VALUES (?, ?, ?, ?)',
+                    self.pending)
+            self.pending = []
+        self.last_flush = time.monotonic()
+
+    def history(self, user_1, user_2, before=None, limit=50):
+        """Newest-first page of a conversation.
+
+        Returns (messages, cursor); pass cursor back as ``before`` for the next
+        page. cursor is None once the start of the conversation is reached.
+        """
+        self.flush()
+        pair, conv_id = self._conversation(user_1, user_2, create=False)
+        if conv_id is None:
+            return [], None
+        before_id = int(before) if before else 2 ** 62
+        rows = self.conn.execute(
+            'SELECT id, from_a, sent_at, envelope FROM messages '
+            'WHERE conversation=? AND id<? ORDER BY id DESC LIMIT ?',
+            (conv_id, before_id, limit)).fetchall()
+        messages = []
+        for message_id, from_a, sent_at, envelope in rows:
+            message = decode_envelope(envelope)
+            message['sender'], message['recipient'] = pair if from_a else (pair[1], pair[0])
+            message['timestamp'] = _ms_to_timestamp(sent_at)
+            message['id'] = message_id
+            messages.append(message)
+        cursor = str(rows[-1][0]) if len(rows) == limit else None
+        return messages, cursor
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -1,10 +1,37 @@
-from flask import Flask, render_template, request, redirect, url_for, session
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, abort, Response, stream_with_context
+from checkpoint import CrawlCheckpoint
 from core import WebVulnerabilityScanner
+from orchestrator import finish_trace
+from page_state import PageStateCache
+from profiling import ScanProfiler
+from rate_control import AdaptiveRateController
+from report_store import ReportStore, EXPORT_COLUMNS
+from scan_cache import ScanCache, normalize_target
 import os
+import io
+import csv
 import json
+import time
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24) # Used for session management
+# Findings live in SQLite (outside static/, so the database itself is not served)
+reports = ReportStore(os.environ.get('REPORT_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports.db')))
+# Checkpoints and page state hold crawled URLs, headers and findings, so they are kept out of static/, which is served
+SCAN_STATE_DIR = os.environ.get('SCAN_STATE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scan_state'))
+# SCAN_PROFILE=1 prints a per-phase summary after each scan and writes its Chrome trace
+# (profiling.py) to SCAN_STATE_DIR as report_<id>.trace.json
+SCAN_PROFILE = os.environ.get('SCAN_PROFILE', '') not in ('', '0')
+
+# Scan settings; part of the cache key, so changing them means a fresh scan
+SCAN_CONFIG = {'max_links': 20, 'initial_rate': 2.0, 'max_rate': 10.0}
+
+def _latest_scan(target_url, config):
+    report = reports.latest_report(target_url, config)
+    return (report['id'], report['finished_at']) if report else None
+
+# Refreshing the results page serves the last report instead of attacking the target again
+scan_cache = ScanCache(ttl=int(os.environ.get('SCAN_CACHE_TTL', 3600)), max_entries=200, load=_latest_scan)
 
 # Dummy vulnerable test application (for demonstration)
 @app.route('/vulnerable-app/')
@@ -36,32 +63,122 @@ def vulnerable_login():
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
-        target_url = request.form['target_url']
-        if not target_url.startswith('http://') and not target_url.startswith('https://'):
-            target_url = 'http://' + target_url # Prepend http:// if missing
-        session['target_url'] = target_url
+        session['target_url'] = normalize_target(request.form['target_url'])
         return redirect(url_for('scan_results'))
     return render_template('index.html')
 
+def run_scan(target_url):
+    """Scan a target now and store the report; returns the report id."""
+    state_name = f"report_{target_url.replace('http://', '').replace('https://', '').replace('/', '_')}"
+    # A scan interrupted by a restart picks up from its checkpoint instead of starting over
+    checkpoint = CrawlCheckpoint(os.path.join(SCAN_STATE_DIR, f"{state_name}.ckpt"))
+    # Pages unchanged since the last scan of this target are not re-tested
+    page_cache = PageStateCache(os.path.join(SCAN_STATE_DIR, f"{state_name}.state.json"))
+    # Start polite (2 req/s, as the old 0.5 sec delay) and adapt to how the target copes
+    rate_controller = AdaptiveRateController(initial_rate=SCAN_CONFIG['initial_rate'], max_rate=SCAN_CONFIG['max_rate'])
+    profiler = ScanProfiler() if SCAN_PROFILE else None
+    scanner = WebVulnerabilityScanner(target_url, checkpoint=checkpoint, page_cache=page_cache,
+                                      rate_controller=rate_controller, profiler=profiler)
+    vulnerabilities = scanner.crawl_and_scan(max_links=SCAN_CONFIG['max_links']) # Limit crawling for quick demo
+
+    # Save report
+    summary = {'findings': len(vulnerabilities), 'scan_config': SCAN_CONFIG}
+    if scanner.findings_diff is not None:
+        summary.update({kind: len(findings) for kind, findings in scanner.findings_diff.items()})
+        summary['fixed_findings'] = scanner.findings_diff['fixed']
+    report_id = reports.save_report(target_url, vulnerabilities, summary)
+    if profiler:
+        os.makedirs(SCAN_STATE_DIR, exist_ok=True)
+        finish_trace(profiler, os.path.join(SCAN_STATE_DIR, f"report_{report_id}.trace.json"))
+    return report_id
+
 @app.route('/scan_results')
 def scan_results():
     target_url = session.get('target_url')
     if not target_url:
         return redirect(url_for('index'))
+    report_id, how = scan_cache.get_or_scan(target_url, SCAN_CONFIG, lambda: run_scan(target_url))
+    print(f"[Scan cache] {target_url}: {how} report {report_id}")
+    return redirect(url_for('view_report', report_id=report_id))
 
-    # Initialize and run scanner
-    scanner = WebVulnerabilityScanner(target_url, delay=0.5) # Be polite with 0.5 sec delay
-    vulnerabilities = scanner.crawl_and_scan(max_links=20) # Limit crawling for quick demo
+@app.route('/reports/<int:report_id>/rescan', methods=['POST'])
+def rescan(report_id):
+    report = reports.get_report(report_id)
+    if report is None:
+        abort(404)
+    target_url = report['target_url']
+    session['target_url'] = target_url
+    new_id, how = scan_cache.get_or_scan(target_url, SCAN_CONFIG, lambda: run_scan(target_url), force=True)
+    print(f"[Scan cache] {target_url}: re-scan {how} report {new_id}")
+    return redirect(url_for('view_report', report_id=new_id))
 
-    # Save report
-    report_filename = f"static/reports/report_{target_url.replace('http://', '').replace('https://', '').replace('/', '_')}.json"
-    os.makedirs(os.path.dirname(report_filename), exist_ok=True)
-    with open(report_filename, 'w') as f:
-        json.dump(vulnerabilities, f, indent=4)
+def _report_filters():
+    return {
+        'finding_type': request.args.get('type') or None,
+        'severity': request.args.get('severity') or None,
+        'url_prefix': request.args.get('url') or None
+    }
+
+def _report_page(report_id):
+    report = reports.get_report(report_id)
+    if report is None:
+        abort(404)
+    sort = request.args.get('sort', 'severity')
+    descending = request.args.get('order') == 'desc'
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    try:
+        findings, next_cursor = reports.query(report_id, sort=sort, descending=descending,
+                                              after=request.args.get('after'), limit=limit, **_report_filters())
+    except ValueError as e:
+        abort(400, str(e))
+    return report, findings, next_cursor
+
+@app.route('/reports/<int:report_id>')
+def view_report(report_id):
+    report, findings, next_cursor = _report_page(report_id)
+    filters = _report_filters()
+    next_args = dict(request.args.to_dict(), after=next_cursor) if next_cursor else None
+    first_args = {k: v for k, v in request.args.to_dict().items() if k != 'after'}
+    scanned_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report['finished_at'])) if report['finished_at'] else None
+    return render_template('report.html', report=report, target_url=report['target_url'], vulnerabilities=findings,
+                           scanned_at=scanned_at,
+                           total=reports.count(report_id, **filters), facets=reports.facets(report_id),
+                           args=request.args, next_args=next_args, first_args=first_args)
+
+@app.route('/api/reports/<int:report_id>/findings')
+def api_report_findings(report_id):
+    report, findings, next_cursor = _report_page(report_id)
+    return jsonify({'report': report, 'findings': findings, 'next': next_cursor,
+                    'total': reports.count(report_id, **_report_filters())})
+
+@app.route('/reports/<int:report_id>/export.<fmt>')
+def export_report(report_id, fmt):
+    if reports.get_report(report_id) is None or fmt not in ('csv', 'ndjson'):
+        abort(404)
+    findings = reports.iter_findings(report_id, **_report_filters())
+
+    def generate():
+        if fmt == 'ndjson':
+            for finding in findings:
+                yield json.dumps(finding) + '\n'
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for finding in findings:
+            writer.writerow([finding.get(column, '') for column in EXPORT_COLUMNS])
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
 
-    return render_template('report.html', target_url=target_url, vulnerabilities=vulnerabilities)
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/csv'
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=report_{report_id}.{fmt}'})
 
 if __name__ == '__main__':
-    # Ensure the reports directory exists
+    # Ensure the reports and scan state directories exist
     os.makedirs('static/reports', exist_ok=True)
+    os.makedirs(SCAN_STATE_DIR, exist_ok=True)
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,184 @@
+# benchmarks/bench_scanner.py
+# Crawl/detection benchmark: scans a generated target farm (target_farm.py)
+# and records throughput, cost per finding, CPU, peak RSS and recall.
+#   python benchmarks/bench_scanner.py --pages 500 --sinks 25 --json results.json
+#   python benchmarks/bench_scanner.py --compare results.json   # exit 1 on regression
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import WebVulnerabilityScanner
+from profiling import ScanProfiler
+from rate_control import AdaptiveRateController
+from target_farm import TargetFarm, add_farm_options, config_from_args, serve
+
+# (metric, True if higher is better) checked by --compare
+COMPARED_METRICS = (('pages_per_sec', True), ('requests_per_sec', True), ('requests_per_finding', False),
+                    ('cpu_seconds', False), ('peak_rss_mb', False), ('recall', True))
+
+
+def sink_category(kind):
+    return 'xss' if kind.startswith('xss') else 'sqli'
+
+
+def finding_category(finding):
+    if 'XSS' in finding['type']:
+        return 'xss'
+    if 'SQL' in finding['type']:
+        return 'sqli'
+    return None # Passive/header findings are not scored
+
+
+def score(manifest, findings):
+    found = {(urlsplit(f['url']).path, finding_category(f)) for f in findings if finding_category(f)}
+    planted = {(sink['path'], sink_category(sink['kind'])) for sink in manifest}
+    by_kind = {}
+    for sink in manifest:
+        stats = by_kind.setdefault(sink['kind'], {'planted': 0, 'found': 0})
+        stats['planted'] += 1
+        stats['found'] += (sink['path'], sink_category(sink['kind'])) in found
+    return {
+        'planted': len(planted),
+        'found': len(planted & found),
+        'false_positive_locations': len(found - planted),
+        'recall': len(planted & found) / len(planted) if planted else 1.0,
+        'by_kind': by_kind
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(args):
+    config = config_from_args(args)
+    # The farm runs in its own process so its CPU time is not counted against the scanner
+    ready = multiprocessing.Queue()
+    farm_process = multiprocessing.Process(target=serve, args=(config,), kwargs={'ready': ready}, daemon=True)
+    farm_process.start()
+    target = f"http://127.0.0.1:{ready.get(timeout=30)}/"
+
+    rate_controller = AdaptiveRateController(initial_rate=args.rate, max_rate=args.max_rate) if args.adaptive else None
+    profiler = ScanProfiler() if args.trace else None
+    scanner = WebVulnerabilityScanner(target, delay=args.delay, rate_controller=rate_controller, profiler=profiler)
+    requests_sent = [0]
+    send = scanner._send
+
+    def counting_send(*send_args):
+        requests_sent[0] += 1
+        return send(*send_args)
+
+    scanner._send = counting_send
+
+    real_stdout = sys.stdout
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    try:
+        if not args.verbose:
+            sys.stdout = open(os.devnull, 'w') # The scanner prints every page and finding
+        findings = scanner.crawl_and_scan(max_links=args.max_links or config.pages)
+    finally:
+        if sys.stdout is not real_stdout:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+    elapsed = time.perf_counter() - start
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    farm_process.terminate()
+    farm_process.join()
+
+    if profiler:
+        print(profiler.summary_table())
+        profiler.write(args.trace)
+        print(f"Trace written to {args.trace}")
+
+    scored = score(TargetFarm(config).manifest(), findings)
+    injection_findings = sum(1 for f in findings if finding_category(f))
+    cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    return {
+        'pages': scanner.crawled_count,
+        'requests': requests_sent[0],
+        'findings': len(findings),
+        'injection_findings': injection_findings,
+        'seconds': elapsed,
+        'pages_per_sec': scanner.crawled_count / elapsed,
+        'requests_per_sec': requests_sent[0] / elapsed,
+        'requests_per_finding': requests_sent[0] / injection_findings if injection_findings else None,
+        'cpu_seconds': cpu,
+        'peak_rss_mb': usage_after.ru_maxrss / 1024, # ru_maxrss is KiB on Linux
+        **scored
+    }
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    for metric, higher_is_better in COMPARED_METRICS:
+        old, new = baseline.get(metric), results.get(metric)
+        if not old or new is None:
+            continue
+        worse = new < old / threshold if higher_is_better else new > old * threshold
+        if worse:
+            regressions.append((metric, old, new))
+    for metric, old, new in regressions:
+        print(f"[Regression] {metric}: {old:.3f} -> {new:.3f}")
+    if not regressions:
+        print(f"No regressions beyond {threshold:.2f}x of {baseline_path}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scanner benchmark against a generated target farm')
+    add_farm_options(parser)
+    parser.add_argument('--max-links', type=int, help='Pages to crawl (default: all pages)')
+    parser.add_argument('--delay', type=float, default=0.0, help='Scanner delay between requests')
+    parser.add_argument('--adaptive', action='store_true', help='Pace with AdaptiveRateController instead')
+    parser.add_argument('--rate', type=float, default=20.0, help='Starting rate with --adaptive')
+    parser.add_argument('--max-rate', type=float, default=500.0, help='Rate ceiling with --adaptive')
+    parser.add_argument('--verbose', action='store_true', help='Show scanner output')
+    parser.add_argument('--trace', metavar='FILE', help='Profile the scan and write a Chrome trace '
+                                                       '(OTLP/JSON if FILE contains "otlp")')
+    parser.add_argument('--json', metavar='FILE', help='Write results to FILE')
+    parser.add_argument('--compare', metavar='FILE', help='Baseline JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25, help='Allowed slowdown vs baseline')
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    print(f"crawl:    {results['pages']} pages, {results['requests']} requests in {results['seconds']:.1f}s "
+          f"({results['pages_per_sec']:.1f} pages/s, {results['requests_per_sec']:.0f} req/s)")
+    per_finding = results['requests_per_finding']
+    print(f"findings: {results['injection_findings']} injection ({results['findings']} total), "
+          f"{per_finding:.0f} requests/finding" if per_finding else "findings: none")
+    print(f"recall:   {results['found']}/{results['planted']} sinks ({results['recall']:.0%}), "
+          f"{results['false_positive_locations']} unplanted locations flagged")
+    for kind, stats in sorted(results['by_kind'].items()):
+        print(f"          {kind:<14}{stats['found']}/{stats['planted']}")
+    print(f"cost:     {results['cpu_seconds']:.2f}s CPU, {results['peak_rss_mb']:.0f} MB peak RSS")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'revision': git_revision(), 'python': platform.python_version(),
+                       'machine': platform.machine(), 'config': config_from_args(args).to_dict(),
+                       'scanner': {'delay': args.delay, 'adaptive': args.adaptive},
+                       'results': results}, f, indent=4)
+        print(f"Results written to {args.json}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
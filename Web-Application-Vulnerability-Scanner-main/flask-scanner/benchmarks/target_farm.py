@@ -0,0 +1,252 @@
+# benchmarks/target_farm.py
+# Generated local web app for measuring the scanner: a tree of pages with
+# forms, planted XSS/SQLi sinks and optional per-request latency.
+#   python benchmarks/target_farm.py --pages 500 --branching 4 --sinks 20 --port 8000
+#
+# Everything is derived from --seed, so the same options always produce the
+# same site and the same list of planted sinks (the ground truth for recall).
+import argparse
+import html
+import json
+import random
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SINK_KINDS = ('xss_param', 'xss_form', 'sqli_error', 'sqli_boolean', 'sqli_form')
+CONTEXT_SINK_KINDS = ('xss_attr', 'xss_js') # Reflections outside element text, with --contexts
+WORDS = ('alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel', 'india', 'juliet',
+         'kilo', 'lima', 'mike', 'november', 'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango')
+
+
+class FarmConfig:
+    def __init__(self, pages=200, branching=4, forms_per_page=1, sinks=10, latency_ms=0.0, seed=1, sitemap=False,
+                 contexts=False):
+        self.pages = pages
+        self.branching = branching
+        self.forms_per_page = forms_per_page
+        self.sinks = sinks
+        self.latency_ms = latency_ms
+        self.seed = seed
+        self.sitemap = sitemap
+        self.contexts = contexts
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class TargetFarm:
+    def __init__(self, config):
+        self.config = config
+        rng = random.Random(config.seed)
+        # Each page gets one extra link somewhere else in the site, so the crawl is not a pure tree
+        self.cross_links = [rng.randrange(config.pages) for _ in range(config.pages)]
+        self.text = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(30, 120)))
+                     for _ in range(config.pages)]
+        self.sinks = {} # {page: kind}
+        candidates = list(range(1, config.pages))
+        rng.shuffle(candidates)
+        kinds = SINK_KINDS + CONTEXT_SINK_KINDS if config.contexts else SINK_KINDS
+        for index, page in enumerate(candidates[:config.sinks]):
+            self.sinks[page] = kinds[index % len(kinds)]
+        self.db = sqlite3.connect(':memory:', check_same_thread=False)
+        self.db_lock = threading.Lock()
+        self.db.executescript("""
+            CREATE TABLE items (id INTEGER, name TEXT);
+            INSERT INTO items VALUES (1, 'first item'), (2, 'second item');
+            CREATE TABLE users (username TEXT, password TEXT);
+            INSERT INTO users VALUES ('admin', 'hunter2');
+        """)
+
+    def manifest(self):
+        """Planted sinks as (kind, path, parameter), what the scanner is expected to find."""
+        sinks = []
+        for page, kind in sorted(self.sinks.items()):
+            if kind in ('xss_param', 'xss_attr', 'xss_js'):
+                sinks.append({'kind': kind, 'path': f"/page/{page}", 'param': 'q'})
+            elif kind in ('sqli_error', 'sqli_boolean'):
+                sinks.append({'kind': kind, 'path': f"/page/{page}", 'param': 'id'})
+            elif kind == 'xss_form':
+                sinks.append({'kind': kind, 'path': f"/submit/{page}", 'param': 'comment'})
+            else:
+                sinks.append({'kind': kind, 'path': f"/login/{page}", 'param': 'password'})
+        return sinks
+
+    def _query(self, sql):
+        with self.db_lock:
+            try:
+                return self.db.execute(sql).fetchall()
+            except sqlite3.Error:
+                return None
+
+    def _page_link(self, page):
+        kind = self.sinks.get(page)
+        if kind in ('xss_param', 'xss_js'):
+            return f"/page/{page}?q=hello"
+        if kind == 'xss_attr':
+            return f"/page/{page}?q=hello&debug" # A parameter without '='
+        if kind in ('sqli_error', 'sqli_boolean'):
+            return f"/page/{page}?id=1"
+        return f"/page/{page}"
+
+    def robots(self):
+        return "User-agent: *\nDisallow: /admin/\nSitemap: /sitemap.xml\n"
+
+    def sitemap_xml(self, chunk=None, chunk_size=1000):
+        """Sitemap index over chunks of ``chunk_size`` pages, or one chunk's urlset."""
+        ns = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+        if chunk is None:
+            chunks = range((self.config.pages + chunk_size - 1) // chunk_size)
+            return (f"<?xml version='1.0' encoding='UTF-8'?><sitemapindex xmlns='{ns}'>" +
+                    ''.join(f"<sitemap><loc>/sitemap-{n}.xml</loc></sitemap>" for n in chunks) + "</sitemapindex>")
+        pages = range(chunk * chunk_size, min((chunk + 1) * chunk_size, self.config.pages))
+        return (f"<?xml version='1.0' encoding='UTF-8'?><urlset xmlns='{ns}'>" +
+                ''.join(f"<url><loc>{self._page_link(page)}</loc></url>" for page in pages) + "</urlset>")
+
+    def render_page(self, page, params):
+        config = self.config
+        kind = self.sinks.get(page)
+        body = [f"<h1>Page {page}</h1>", f"<p>{self.text[page]}</p>"]
+
+        if kind == 'xss_param':
+            body.append(f"<p>Results for {params.get('q', '')}</p>") # Planted: reflected unescaped
+        elif kind == 'xss_attr':
+            value = params.get('q', '').replace('<', '&lt;').replace('>', '&gt;')
+            body.append(f"<div title='{value}'>Results</div>") # Planted: quotes left unescaped
+        elif kind == 'xss_js':
+            value = params.get('q', '').replace('\\', '\\\\').replace('"', '\\"').replace('<', '\\x3c')
+            body.append(f"<script>var query = '{value}';</script>") # Planted: single quote left unescaped
+        elif kind == 'sqli_error':
+            value = params.get('id', '1')
+            if not value.isdigit():
+                body.append("<p>You have an error in your SQL syntax; check the manual near "
+                            f"'{html.escape(value)}'</p>") # Planted: verbose DB error
+            else:
+                body.append(f"<p>Item {value}</p>")
+        elif kind == 'sqli_boolean':
+            rows = self._query(f"SELECT name FROM items WHERE id={params.get('id', '1')}") # Planted
+            body.append(''.join(f"<div class='item'><h2>{name}</h2><p>In stock, ships tomorrow</p></div>"
+                                for name, in rows or []) or "<p>No items found</p>")
+        elif params:
+            body.append(f"<p>Filter: {html.escape(' '.join(params.values()))}</p>")
+
+        children = range(page * config.branching + 1, min(page * config.branching + config.branching + 1,
+                                                          config.pages))
+        links = [self._page_link(child) for child in children] + [self._page_link(self.cross_links[page])]
+        body.append('<ul>' + ''.join(f"<li><a href='{link}'>{link}</a></li>" for link in links) + '</ul>')
+
+        for form in range(config.forms_per_page):
+            body.append(f"<form method='post' action='/echo/{page}/{form}'>"
+                        "<input name='name'><input name='email' type='email'><textarea name='message'></textarea>"
+                        "<input type='submit'></form>")
+        if kind == 'xss_form':
+            body.append(f"<form method='post' action='/submit/{page}'><textarea name='comment'></textarea>"
+                        "<input type='submit'></form>")
+        elif kind == 'sqli_form':
+            body.append(f"<form method='post' action='/login/{page}'><input name='username'>"
+                        "<input name='password' type='password'><input type='submit'></form>")
+        return f"<html><head><title>Page {page}</title></head><body>{''.join(body)}</body></html>"
+
+    def handle_post(self, path, fields):
+        parts = path.strip('/').split('/')
+        if parts[0] == 'submit': # Planted: comment echoed unescaped
+            return f"<html><body><p>Thanks for your comment:</p>{fields.get('comment', '')}</body></html>"
+        if parts[0] == 'login': # Planted: credentials concatenated into SQL
+            rows = self._query(f"SELECT username FROM users WHERE username='{fields.get('username', '')}' "
+                               f"AND password='{fields.get('password', '')}'")
+            if rows:
+                return ("<html><body><h1>Welcome back</h1><p>Your dashboard, recent orders, saved "
+                        "addresses and account settings are below.</p></body></html>")
+            return "<html><body><p>Invalid username or password</p></body></html>"
+        return f"<html><body><p>Received: {html.escape(json.dumps(fields))}</p></body></html>"
+
+    def make_handler(self):
+        farm = self
+        latency = self.config.latency_ms / 1000.0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            wbufsize = 1 << 16 # Headers and body in one send; split writes hit delayed-ACK stalls
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, text, content_type='text/html; charset=utf-8'):
+                if latency:
+                    time.sleep(latency * random.uniform(0.8, 1.2))
+                data = text.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+                parts = url.path.strip('/').split('/')
+                if url.path == '/':
+                    return self._reply(200, farm.render_page(0, params))
+                if farm.config.sitemap and url.path == '/robots.txt':
+                    return self._reply(200, farm.robots(), 'text/plain')
+                if farm.config.sitemap and url.path == '/sitemap.xml':
+                    return self._reply(200, farm.sitemap_xml(), 'application/xml')
+                if farm.config.sitemap and url.path.startswith('/sitemap-') and url.path[9:-4].isdigit():
+                    return self._reply(200, farm.sitemap_xml(int(url.path[9:-4])), 'application/xml')
+                if len(parts) == 2 and parts[0] == 'page' and parts[1].isdigit() and int(parts[1]) < farm.config.pages:
+                    return self._reply(200, farm.render_page(int(parts[1]), params))
+                return self._reply(404, "<html><body>Not found</body></html>")
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                fields = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode('utf-8'),
+                                                         keep_blank_values=True).items()}
+                return self._reply(200, farm.handle_post(urlsplit(self.path).path, fields))
+
+        return Handler
+
+
+def serve(config, host='127.0.0.1', port=0, ready=None):
+    """Run the farm until the process exits; puts the bound port on ``ready`` (a Queue) if given."""
+    farm = TargetFarm(config)
+    server = ThreadingHTTPServer((host, port), farm.make_handler())
+    server.daemon_threads = True
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def add_farm_options(parser):
+    parser.add_argument('--pages', type=int, default=200, help='Pages in the site')
+    parser.add_argument('--branching', type=int, default=4, help='Child links per page')
+    parser.add_argument('--forms-per-page', type=int, default=1, help='Benign forms per page')
+    parser.add_argument('--sinks', type=int, default=10, help='Planted XSS/SQLi sinks')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Added latency per response')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--sitemap', action='store_true', help='Serve robots.txt and a sitemap index')
+    parser.add_argument('--contexts', action='store_true', help='Also plant attribute and JS string XSS sinks')
+
+
+def config_from_args(args):
+    return FarmConfig(args.pages, args.branching, args.forms_per_page, args.sinks, args.latency_ms, args.seed, args.sitemap,
+                      args.contexts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic vulnerable site for scanner benchmarks')
+    add_farm_options(parser)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--manifest', action='store_true', help='Print planted sinks as JSON and exit')
+    args = parser.parse_args()
+    config = config_from_args(args)
+    if args.manifest:
+        print(json.dumps(TargetFarm(config).manifest(), indent=4))
+        return
+    print(f"Serving {config.pages} pages with {config.sinks} planted sinks on http://127.0.0.1:{args.port}/")
+    serve(config, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
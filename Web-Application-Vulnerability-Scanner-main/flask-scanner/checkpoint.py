@@ -0,0 +1,71 @@
+# checkpoint.py
+# Periodic crawl checkpoints so an interrupted scan can resume where it stopped.
+#
+# A checkpoint is one zlib-compressed JSON document holding the crawl frontier
+# (with the page that was in progress),
+# the seen-URL set, the keys of test requests already sent, the findings so
+# far and the page state recorded for incremental rescans (page_state.py). Saves write to a temporary file and os.replace() it over the previous
+# checkpoint, so a crash mid-save never leaves a truncated file behind.
+import json
+import os
+import time
+import zlib
+
+CHECKPOINT_VERSION = 3
+
+
+class CrawlCheckpoint:
+    def __init__(self, path, interval=10):
+        self.path = path
+        self.interval = interval # Minimum seconds between saves
+        self.last_save = time.monotonic()
+        self.saves = 0
+        self.save_seconds = 0.0
+        self.last_size = 0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self, target_url):
+        """Return the saved state for target_url, or None if there is nothing usable."""
+        try:
+            with open(self.path, 'rb') as f:
+                state = json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            print(f"[Checkpoint] Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+        if state.get('version') != CHECKPOINT_VERSION or state.get('target_url') != target_url:
+            print(f"[Checkpoint] {self.path} belongs to another scan, starting fresh")
+            return None
+        return state
+
+    def due(self):
+        return time.monotonic() - self.last_save >= self.interval
+
+    def save(self, state):
+        start = time.perf_counter()
+        state = dict(state, version=CHECKPOINT_VERSION, saved_at=time.time())
+        data = zlib.compress(json.dumps(state, separators=(',', ':')).encode('utf-8'), 1)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.last_save = time.monotonic()
+        self.saves += 1
+        self.save_seconds += time.perf_counter() - start
+        self.last_size = len(data)
+
+    def discard(self):
+        for path in (self.path, f"{self.path}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def summary(self):
+        return (f"[Checkpoint] {self.saves} saves, {self.save_seconds * 1000:.1f} ms total, "
+                f"last {self.last_size / 1024:.1f} KiB")
@@ -1,55 +1,187 @@
+import hashlib
 import requests
 from bs4 import BeautifulSoup
 import re
 import json
 import time
+from contextlib import ExitStack
+from urllib.parse import quote_plus, urlencode
+
+from discovery import Frontier, iter_sitemap, parse_robots
+from fingerprint import Fingerprint
+from page_state import diff_findings
+from passive import PassiveAnalyzer, passive_input
+from payloads import (describe_context, encode_params, find_reflections, make_token, probe_value, split_url,
+                      sql_error, sqli_variants, url_with, value_kind, xss_candidates)
+from profiling import NULL_PROFILER
+from rate_control import BACKOFF_STATUSES
 
 class WebVulnerabilityScanner:
-    def __init__(self, target_url, delay=1):
+    def __init__(self, target_url, delay=1, scheduler=None, on_finding=None, checkpoint=None,
+                 page_cache=None, rate_controller=None, max_retries=2, profiler=None, discover=True,
+                 max_sitemap_urls=100000):
         self.target_url = target_url
         self.scanned_urls = set()
         self.vulnerabilities = []
         self.session = requests.Session()
         self.delay = delay # Delay between requests to be polite
+        self.scheduler = scheduler # Shared HostScheduler (orchestrator.py) replaces the fixed delay
+        self.rate_controller = rate_controller # AdaptiveRateController (rate_control.py) replaces the fixed delay
+        self.max_retries = max_retries # Retries after a 429/503 when pacing adaptively
+        self.profiler = profiler or NULL_PROFILER # ScanProfiler (profiling.py) records per-phase spans
+        self.on_finding = on_finding # Called with each finding as soon as it is recorded
+        self.checkpoint = checkpoint # Optional CrawlCheckpoint (checkpoint.py) for resumable scans
+        self.completed_tests = set() # Keys of test requests already sent, see _test_key
+        self.page_cache = page_cache # Optional PageStateCache (page_state.py) for incremental rescans
+        self.findings_diff = None # new/fixed/unchanged vs the previous run, set when page_cache is used
+        self.discover = discover # Seed the crawl from robots.txt and sitemaps (discovery.py)
+        self.max_sitemap_urls = max_sitemap_urls # Sitemap entries read at most, however large the index
+        self.frontier = None # Frontier (discovery.py), created by crawl_and_scan
+        self.current_url = None # Page being tested, re-queued first on resume
+        self.crawled_count = 0
+
+        # XSS and error/time SQLi payloads are chosen per parameter from the tables in payloads.py
+
+        # Boolean-based blind SQLi: (true, false, confirming true, confirming false) per quoting context.
+        # URL parameters usually hold a real value, so AND keeps the page as it was for true;
+        # form fields get dummy data that matches nothing, so OR is what changes the page.
+        self.sqli_boolean_pairs = {
+            'and': [
+                ("' AND '1'='1", "' AND '1'='2", "' AND 'a'='a", "' AND 'a'='b"),
+                ("\" AND \"1\"=\"1", "\" AND \"1\"=\"2", "\" AND \"a\"=\"a", "\" AND \"a\"=\"b"),
+                (" AND 1=1", " AND 1=2", " AND 2>1", " AND 1>2")
+            ],
+            'or': [
+                ("' OR '1'='1", "' OR '1'='2", "' OR 'a'='a", "' OR 'a'='b"),
+                ("\" OR \"1\"=\"1", "\" OR \"1\"=\"2", "\" OR \"a\"=\"a", "\" OR \"a\"=\"b"),
+                (" OR 1=1", " OR 1=2", " OR 2>1", " OR 1>2")
+            ]
+        }
+
+        # Header, cookie, CORS and banner checks, aggregated per host (passive.py)
+        self.passive = PassiveAnalyzer(on_new_finding=self._add_passive_finding)
+
+    def _add_vulnerability(self, vulnerability):
+        self.vulnerabilities.append(vulnerability)
+        if self.on_finding:
+            self.on_finding(vulnerability)
+
+    def _test_key(self, check, method, url, data=None):
+        # Short stable digest so the completed set stays small in the checkpoint
+        raw = json.dumps([check, method, url, data], sort_keys=True)
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=8).hexdigest()
+
+    def _mark_tested(self, key):
+        self.completed_tests.add(key)
+        self._checkpoint_tick()
+
+    def _checkpoint_state(self):
+        return {
+            'target_url': self.target_url,
+            'frontier': self.frontier.to_list(),
+            'current_url': self.current_url,
+            'scanned_urls': sorted(self.scanned_urls),
+            'crawled_count': self.crawled_count,
+            'completed_tests': sorted(self.completed_tests),
+            'vulnerabilities': self.vulnerabilities,
+            # Pages finished so far; without them the page state saved at the end
+            # of a resumed scan would lack their validators and findings
+            'page_state': self.page_cache.checkpoint_state() if self.page_cache else None
+        }
 
-        # Safe XSS payloads (Reflected XSS)
-        self.xss_payloads = [
-            "<script>alert(1)</script>",
-            "<img src=x onerror=alert(1)>",
-            "';alert(1)//"
-        ]
-
-        # Non-destructive SQLi payloads (Boolean-based, Error-based indicators)
-        self.sqli_payloads = [
-            "' OR '1'='1",
-            "\" OR \"1\"=\"1",
-            "1 OR 1=1",
-            "' OR 1=1 --",
-            "\" OR 1=1 --",
-            "SLEEP(5)", # Time-based, careful with this on production
-            "'", # Error-based
-            "\"" # Error-based
-        ]
-
-        self.security_headers_to_check = [
-            "Content-Security-Policy",
-            "X-Frame-Options",
-            "X-Content-Type-Options",
-            "Strict-Transport-Security",
-            "Referrer-Policy"
-        ]
-
-    def _make_request(self, url, method="GET", data=None):
+    def _checkpoint_tick(self, force=False):
+        if self.checkpoint and (force or self.checkpoint.due()):
+            with self.profiler.span('checkpoint'):
+                self.checkpoint.save(self._checkpoint_state())
+
+    def _restore_checkpoint(self):
+        state = self.checkpoint.load(self.target_url) if self.checkpoint else None
+        if not state:
+            return False
+        self.frontier.restore(state['frontier'])
+        if state['current_url']:
+            self.frontier.push(state['current_url'], priority=float('-inf')) # Finish it first
+        self.scanned_urls = set(state['scanned_urls'])
+        self.crawled_count = state['crawled_count']
+        self.completed_tests = set(state['completed_tests'])
+        self.vulnerabilities = state['vulnerabilities']
+        self.passive.adopt(self.vulnerabilities)
+        if self.page_cache and state['page_state']:
+            self.page_cache.restore(state['page_state'])
+        print(f"[Checkpoint] Resuming {self.target_url}: {self.crawled_count} pages done, "
+              f"{len(self.frontier)} queued, {len(self.completed_tests)} tests skipped, "
+              f"{len(self.vulnerabilities)} findings restored")
+        return True
+
+    def _reuse_page(self, url, response):
+        # Unchanged since the last scan: keep its findings, links and forms, skip the payload tests
+        print(f"[Unchanged] {url}")
+        page = self.page_cache.reuse(url, response)
+        if response.status_code == 304:
+            self.passive.analyze(url, page['passive'])
+        for vulnerability in page['findings']:
+            self._add_vulnerability(vulnerability)
+        return page['links'], page['forms']
+
+    def _send(self, url, method, data, headers=None, stream=False):
+        if method == "POST":
+            return self.session.post(url, data=data, headers=headers, timeout=10)
+        return self.session.get(url, headers=headers, timeout=10, stream=stream)
+
+    def _controller_for(self, url):
+        if self.rate_controller:
+            return self.rate_controller
+        return self.scheduler.controller_for(url) if self.scheduler else None
+
+    def _rate_status(self, url):
+        controller = self._controller_for(url)
+        return f" [{controller.status()}]" if controller else ''
+
+    def _timed_send(self, url, method, data, headers, stream=False):
+        profiler = self.profiler
+        with profiler.span('fetch', method=method, url=url):
+            response = self._send(url, method, data, headers, stream)
+        if profiler.enabled:
+            profiler.count('requests')
+            profiler.count(f"status.{response.status_code}")
+            if not stream: # Reading a streamed body here would defeat the streaming
+                profiler.count('bytes_received', len(response.content))
+        return response
+
+    def _paced_send(self, url, method, data, headers, controller, stream=False):
         try:
-            if method == "POST":
-                response = self.session.post(url, data=data, timeout=10)
+            if self.scheduler:
+                with ExitStack() as slot:
+                    with self.profiler.span('wait'):
+                        slot.enter_context(self.scheduler.slot(url))
+                    response = self._timed_send(url, method, data, headers, stream)
+            elif controller:
+                with self.profiler.span('wait'):
+                    controller.wait()
+                response = self._timed_send(url, method, data, headers, stream)
             else:
-                response = self.session.get(url, timeout=10)
-            time.sleep(self.delay)
-            return response
+                response = self._timed_send(url, method, data, headers, stream)
+                with self.profiler.span('sleep'):
+                    time.sleep(self.delay)
         except requests.exceptions.RequestException as e:
+            if controller:
+                controller.error()
+            self.profiler.count('request_errors')
             print(f"Error making request to {url}: {e}")
             return None
+        if controller:
+            controller.observe(response.status_code, response.elapsed.total_seconds(),
+                               response.headers.get('Retry-After'))
+        return response
+
+    def _make_request(self, url, method="GET", data=None, headers=None, stream=False):
+        controller = self._controller_for(url)
+        for attempt in range(self.max_retries + 1):
+            response = self._paced_send(url, method, data, headers, controller, stream)
+            if not controller or response is None or response.status_code not in BACKOFF_STATUSES:
+                break
+            print(f"[Rate] {response.status_code} from {url}, backing off{self._rate_status(url)}")
+        return response
 
     def _extract_links(self, html_content, base_url):
         soup = BeautifulSoup(html_content, 'lxml')
@@ -77,168 +209,327 @@ class WebVulnerabilityScanner:
             forms.append({'url': form_url, 'method': method, 'inputs': inputs})
         return forms
 
+    @staticmethod
+    def _excerpt(text, needle):
+        index = text.find(needle)
+        return text[max(0, index - 50):index + len(needle) + 50]
+
     def _test_xss(self, url, forms):
-        for payload in self.xss_payloads:
-            # Test in URL parameters
-            if "?" in url:
-                base_url, params = url.split("?", 1)
-                for param in params.split("&"):
-                    key, value = param.split("=", 1)
-                    test_url = f"{base_url}?{key}={payload}"
-                    response = self._make_request(test_url)
-                    if response and payload in response.text:
-                        self.vulnerabilities.append({
-                            'type': 'Reflected XSS',
-                            'url': test_url,
-                            'payload': payload,
-                            'severity': 'High',
-                            'evidence': response.text[max(0, response.text.find(payload)-50):min(len(response.text), response.text.find(payload)+50)]
-                        })
-                        print(f"[XSS Found] {test_url}")
+        # URL parameters: probe each one, then send only the payloads that fit where it is reflected
+        if "?" in url:
+            base_url, params = split_url(url)
+            encoded = encode_params(params)
+            for index, (key, value) in enumerate(params):
+                test_key = self._test_key('xss', 'GET', url, key)
+                if test_key in self.completed_tests:
+                    continue # Already sent before the last checkpoint
+                token = make_token()
+                response = self._make_request(url_with(base_url, encoded, index, quote_plus(probe_value(token))))
+                if response is not None:
+                    for context, family, payload, encoded_payload in xss_candidates(find_reflections(response.text, token)):
+                        test_url = url_with(base_url, encoded, index, encoded_payload)
+                        response = self._make_request(test_url)
+                        if response is not None and payload in response.text:
+                            self._add_vulnerability({
+                                'type': 'Reflected XSS',
+                                'url': test_url,
+                                'payload': payload,
+                                'severity': 'High',
+                                'context': describe_context(context),
+                                'evidence': self._excerpt(response.text, payload)
+                            })
+                            print(f"[XSS Found] {test_url} ({describe_context(context)})")
+                            break
+                self._mark_tested(test_key)
 
-            # Test in form fields
-            for form in forms:
-                form_data = {}
-                is_xss_testable = False
-                for input_field in form['inputs']:
-                    if input_field['type'] in ['text', 'search', 'email', 'url', 'textarea']:
-                        form_data[input_field['name']] = payload
-                        is_xss_testable = True
-                    else:
-                        form_data[input_field['name']] = "test" # Fill other fields with dummy data
-
-                if is_xss_testable:
+        # Form fields: one submission probes every text field, each with its own token
+        for form in forms:
+            base_data = {input_field['name']: "test" for input_field in form['inputs']} # Dummy data elsewhere
+            pending = {}
+            for input_field in form['inputs']:
+                if input_field['type'] in ['text', 'search', 'email', 'url', 'textarea']:
+                    test_key = self._test_key('xss', form['method'], form['url'], input_field['name'])
+                    if test_key not in self.completed_tests:
+                        pending[input_field['name']] = (test_key, make_token())
+            if not pending:
+                continue
+            probe_data = dict(base_data, **{name: probe_value(token) for name, (_, token) in pending.items()})
+            probe = self._make_request(form['url'], method=form['method'], data=probe_data)
+            for name, (test_key, token) in pending.items():
+                for context, family, payload, _ in (xss_candidates(find_reflections(probe.text, token))
+                                                    if probe is not None else []):
+                    form_data = dict(base_data, **{name: payload})
                     response = self._make_request(form['url'], method=form['method'], data=form_data)
-                    if response and payload in response.text:
-                        self.vulnerabilities.append({
+                    if response is not None and payload in response.text:
+                        self._add_vulnerability({
                             'type': 'Reflected XSS',
                             'url': form['url'],
                             'payload': payload,
                             'severity': 'High',
-                            'evidence': response.text[max(0, response.text.find(payload)-50):min(len(response.text), response.text.find(payload)+50)],
+                            'context': describe_context(context),
+                            'evidence': self._excerpt(response.text, payload),
                             'method': form['method'],
                             'form_data': form_data
                         })
-                        print(f"[XSS Found] {form['url']} (Form)")
+                        print(f"[XSS Found] {form['url']} (Form, {name}, {describe_context(context)})")
+                        break
+                self._mark_tested(test_key)
 
+    def _sqli_finding(self, response, family, payload, url, **extra):
+        """Record a finding if the response shows the payload worked; True if it did."""
+        marker = sql_error(response.text)
+        if marker:
+            finding = {'type': 'SQL Injection (Error-based)', 'evidence': self._excerpt(response.text, marker)}
+        elif family == 'time' and response.elapsed.total_seconds() > 4:
+            finding = {'type': 'SQL Injection (Time-based)',
+                       'evidence': f"Response time: {response.elapsed.total_seconds()}s"}
+        else:
+            return False
+        self._add_vulnerability({'type': finding['type'], 'url': url, 'payload': payload, 'severity': 'High',
+                                 'evidence': finding['evidence'], **extra})
+        return True
 
     def _test_sqli(self, url, forms):
-        for payload in self.sqli_payloads:
-            # Test in URL parameters
-            if "?" in url:
-                base_url, params = url.split("?", 1)
-                for param in params.split("&"):
-                    key, value = param.split("=", 1)
-                    test_url = f"{base_url}?{key}={value}{payload}"
+        # Boolean-based inference is done with fewer requests in _test_sqli_boolean
+        if "?" in url:
+            base_url, params = split_url(url)
+            encoded = encode_params(params)
+            for index, (key, value) in enumerate(params):
+                test_key = self._test_key('sqli', 'GET', url, key)
+                if test_key in self.completed_tests:
+                    continue
+                # Numeric and string values break out of different SQL contexts
+                for family, payload, encoded_payload, _ in sqli_variants(value_kind(value)):
+                    test_url = url_with(base_url, encoded, index, encoded[index][1] + encoded_payload)
                     response = self._make_request(test_url)
-                    if response:
-                        # Simple check for common SQL error messages or boolean-based response changes
-                        if "SQL syntax" in response.text or "mysql_fetch_array" in response.text or "ODBC" in response.text or "error in your SQL syntax" in response.text:
-                             self.vulnerabilities.append({
-                                'type': 'SQL Injection (Error-based)',
-                                'url': test_url,
-                                'payload': payload,
-                                'severity': 'High',
-                                'evidence': response.text[max(0, response.text.find("SQL syntax")-50):min(len(response.text), response.text.find("SQL syntax")+50)] if "SQL syntax" in response.text else response.text[:100]
-                            })
-                             print(f"[SQLi Found] {test_url}")
-                        elif "SLEEP(5)" in payload and response.elapsed.total_seconds() > 4: # Time-based SQLi
-                            self.vulnerabilities.append({
-                                'type': 'SQL Injection (Time-based)',
-                                'url': test_url,
-                                'payload': payload,
-                                'severity': 'High',
-                                'evidence': f"Response time: {response.elapsed.total_seconds()}s"
-                            })
-                            print(f"[SQLi Found] {test_url}")
-                        # Add more sophisticated boolean-based checks here if needed, comparing responses.
+                    if response is not None and self._sqli_finding(response, family, payload, test_url):
+                        print(f"[SQLi Found] {test_url}")
+                        break
+                self._mark_tested(test_key)
 
-            # Test in form fields
-            for form in forms:
-                form_data = {}
-                is_sqli_testable = False
-                for input_field in form['inputs']:
-                    if input_field['type'] in ['text', 'search', 'email', 'url', 'password', 'textarea']:
-                        form_data[input_field['name']] = f"test{payload}"
-                        is_sqli_testable = True
-                    else:
-                        form_data[input_field['name']] = "test"
-
-                if is_sqli_testable:
-                    response = self._make_request(form['url'], method=form['method'], data=form_data)
-                    if response:
-                        if "SQL syntax" in response.text or "mysql_fetch_array" in response.text or "ODBC" in response.text or "error in your SQL syntax" in response.text:
-                             self.vulnerabilities.append({
-                                'type': 'SQL Injection (Error-based)',
-                                'url': form['url'],
-                                'payload': payload,
-                                'severity': 'High',
-                                'evidence': response.text[max(0, response.text.find("SQL syntax")-50):min(len(response.text), response.text.find("SQL syntax")+50)] if "SQL syntax" in response.text else response.text[:100],
-                                'method': form['method'],
-                                'form_data': form_data
-                            })
-                             print(f"[SQLi Found] {form['url']} (Form)")
-                        elif "SLEEP(5)" in payload and response.elapsed.total_seconds() > 4:
-                            self.vulnerabilities.append({
-                                'type': 'SQL Injection (Time-based)',
-                                'url': form['url'],
-                                'payload': payload,
-                                'severity': 'High',
-                                'evidence': f"Response time: {response.elapsed.total_seconds()}s",
-                                'method': form['method'],
-                                'form_data': form_data
-                            })
-                            print(f"[SQLi Found] {form['url']} (Form)")
-
-
-    def _check_security_headers(self, url, headers):
-        missing_headers = []
-        for header_name in self.security_headers_to_check:
-            if header_name not in headers:
-                missing_headers.append(header_name)
-        if missing_headers:
-            self.vulnerabilities.append({
-                'type': 'Missing Security Headers',
-                'url': url,
-                'payload': f"Missing headers: {', '.join(missing_headers)}",
-                'severity': 'Medium',
-                'evidence': f"Headers received: {headers}"
-            })
-            print(f"[Missing Headers] {url}: {', '.join(missing_headers)}")
+        # Form fields: every text field carries the payload at once, appended to the string "test"
+        for form in forms:
+            base_data = {input_field['name']: "test" for input_field in form['inputs']}
+            fields = [input_field['name'] for input_field in form['inputs']
+                      if input_field['type'] in ['text', 'search', 'email', 'url', 'password', 'textarea']]
+            if not fields:
+                continue
+            test_key = self._test_key('sqli', form['method'], form['url'], sorted(fields))
+            if test_key in self.completed_tests:
+                continue
+            for family, payload, _, _ in sqli_variants('string'):
+                form_data = dict(base_data, **{name: f"test{payload}" for name in fields})
+                response = self._make_request(form['url'], method=form['method'], data=form_data)
+                if response is not None and self._sqli_finding(response, family, payload, form['url'],
+                                                               method=form['method'], form_data=form_data):
+                    print(f"[SQLi Found] {form['url']} (Form)")
+                    break
+            self._mark_tested(test_key)
 
-    def crawl_and_scan(self, max_links=50):
-        self.scanned_urls.add(self.target_url)
-        urls_to_scan = [self.target_url]
-        crawled_count = 0
 
-        while urls_to_scan and crawled_count < max_links:
-            current_url = urls_to_scan.pop(0)
-            print(f"Scanning: {current_url}")
-            response = self._make_request(current_url)
-            crawled_count += 1
+    def _infer_boolean(self, baseline, send, pairs):
+        """Return (true, false, evidence) when true/false conditions steer the page, else None.
+
+        ``send(suffix)`` appends suffix to the parameter under test and returns the response.
+        """
+        for true_cond, false_cond, true_check, false_check in pairs:
+            fingerprints = []
+            for suffix in (true_cond, false_cond):
+                response = send(suffix)
+                if response is None:
+                    return None
+                fingerprints.append(Fingerprint.of(response, (suffix,)))
+            true_fp, false_fp = fingerprints
+            # Exactly one side must look like the untouched page, and the two must differ
+            if true_fp.matches(false_fp) or true_fp.matches(baseline) == false_fp.matches(baseline):
+                continue
+            # Same context, different expressions: rules out pages that merely vary
+            confirmed = True
+            for suffix, expected in ((true_check, true_fp), (false_check, false_fp)):
+                response = send(suffix)
+                if response is None or not Fingerprint.of(response, (suffix,)).matches(expected):
+                    confirmed = False
+                    break
+            if confirmed:
+                evidence = f"true: {baseline.describe(true_fp)}; false: {baseline.describe(false_fp)} (baseline/test)"
+                return true_cond, false_cond, evidence
+        return None
+
+    def _test_sqli_boolean(self, url, forms, page_response):
+        # URL parameters: the page itself is the baseline for every parameter
+        if "?" in url and page_response is not None:
+            baseline = Fingerprint.of(page_response)
+            base_url, params = split_url(url)
+            for index, (key, value) in enumerate(params):
+                test_key = self._test_key('sqli-boolean', 'GET', url, key)
+                if test_key in self.completed_tests:
+                    continue
+
+                def send(suffix, index=index, key=key, value=value):
+                    test_params = list(params)
+                    test_params[index] = (key, value + suffix)
+                    return self._make_request(f"{base_url}?{urlencode(test_params)}")
+
+                hit = self._infer_boolean(baseline, send, self.sqli_boolean_pairs['and'])
+                if hit:
+                    true_cond, false_cond, evidence = hit
+                    self._add_vulnerability({
+                        'type': 'SQL Injection (Boolean-based)',
+                        'url': url,
+                        'payload': f"{key}: {true_cond} / {false_cond}",
+                        'severity': 'High',
+                        'evidence': evidence
+                    })
+                    print(f"[SQLi Found] {url} (Boolean, {key})")
+                self._mark_tested(test_key)
 
-            if response and response.status_code == 200:
-                # Check security headers
-                self._check_security_headers(current_url, response.headers)
+        # Form fields: one baseline submission per form, shared by all of its fields
+        for form in forms:
+            base_data = {input_field['name']: "test" for input_field in form['inputs']}
+            baseline = None
+            for input_field in form['inputs']:
+                if input_field['type'] not in ['text', 'search', 'email', 'url', 'password', 'textarea']:
+                    continue
+                name = input_field['name']
+                test_key = self._test_key('sqli-boolean', form['method'], form['url'], name)
+                if test_key in self.completed_tests:
+                    continue
+                if baseline is None:
+                    response = self._make_request(form['url'], method=form['method'], data=base_data)
+                    if response is None:
+                        break
+                    baseline = Fingerprint.of(response)
 
-                # Extract forms
+                def send(suffix, name=name):
+                    return self._make_request(form['url'], method=form['method'],
+                                              data=dict(base_data, **{name: "test" + suffix}))
+
+                hit = self._infer_boolean(baseline, send, self.sqli_boolean_pairs['or'])
+                if hit:
+                    true_cond, false_cond, evidence = hit
+                    self._add_vulnerability({
+                        'type': 'SQL Injection (Boolean-based)',
+                        'url': form['url'],
+                        'payload': f"{name}: {true_cond} / {false_cond}",
+                        'severity': 'High',
+                        'evidence': evidence,
+                        'method': form['method'],
+                        'form_data': dict(base_data, **{name: "test" + true_cond})
+                    })
+                    print(f"[SQLi Found] {form['url']} (Form, Boolean, {name})")
+                self._mark_tested(test_key)
+
+    def _add_passive_finding(self, vulnerability):
+        self._add_vulnerability(vulnerability)
+        print(f"[{vulnerability['type']}] {vulnerability['url']}: {vulnerability['payload']}")
+
+    def _enqueue(self, url, form_action=False):
+        if url.startswith(self.target_url) and url not in self.scanned_urls:
+            self.scanned_urls.add(url)
+            self.frontier.push(url, form_action)
+            return True
+        return False
+
+    def _discover_urls(self):
+        """Seed the frontier from robots.txt and the sitemaps it lists (or /sitemap.xml)."""
+        robots_url = requests.compat.urljoin(self.target_url, '/robots.txt')
+        sitemaps, paths = [], []
+        response = self._make_request(robots_url)
+        if response is not None and response.status_code == 200:
+            sitemaps, paths = parse_robots(response.text, robots_url)
+        seeded = sum(self._enqueue(path) for path in paths)
+
+        read = 0
+        for sitemap_url in sitemaps or [requests.compat.urljoin(self.target_url, '/sitemap.xml')]:
+            for url in iter_sitemap(lambda u: self._make_request(u, stream=True), sitemap_url):
+                seeded += self._enqueue(url)
+                read += 1
+                if read >= self.max_sitemap_urls:
+                    break
+            if read >= self.max_sitemap_urls:
+                print(f"[Discovery] Stopped after {read} sitemap URLs")
+                break
+        print(f"[Discovery] {len(paths)} robots.txt paths, {read} sitemap URLs, {seeded} new URLs queued "
+              f"({len(self.frontier)} kept)")
+
+    def _scan_page(self, current_url):
+        """Fetch and test one page; returns (links found on it, its forms)."""
+        profiler = self.profiler
+        conditional = self.page_cache.conditional_headers(current_url) if self.page_cache else None
+        response = self._make_request(current_url, headers=conditional)
+        new_links, forms = [], []
+
+        if response is not None and response.status_code == 304 and conditional:
+            new_links, forms = self._reuse_page(current_url, response)
+        elif response and response.status_code == 200:
+            # Passive checks cost no requests, so they run on every page
+            with profiler.span('check.passive'):
+                passive = passive_input(response)
+                self.passive.analyze(current_url, passive)
+
+            # Extract forms
+            with profiler.span('parse'):
                 forms = self._extract_forms(response.text, current_url)
 
+            if self.page_cache and self.page_cache.unchanged(current_url, response, forms):
+                new_links, forms = self._reuse_page(current_url, response)
+            else:
+                first_finding = len(self.vulnerabilities)
+
                 # Test for XSS
-                self._test_xss(current_url, forms)
+                with profiler.span('check.xss'):
+                    self._test_xss(current_url, forms)
 
                 # Test for SQLi
-                self._test_sqli(current_url, forms)
+                with profiler.span('check.sqli'):
+                    self._test_sqli(current_url, forms)
+                with profiler.span('check.sqli_boolean'):
+                    self._test_sqli_boolean(current_url, forms, response)
 
                 # Extract and add new links
-                new_links = self._extract_links(response.text, current_url)
-                for link in new_links:
-                    if link not in self.scanned_urls:
-                        urls_to_scan.append(link)
-                        self.scanned_urls.add(link)
-                        if len(self.scanned_urls) >= max_links:
-                            break # Limit crawling to max_links
+                with profiler.span('extract_links'):
+                    new_links = self._extract_links(response.text, current_url)
+                if self.page_cache:
+                    self.page_cache.record(current_url, response, forms, new_links, passive,
+                                           self.vulnerabilities[first_finding:])
+        return new_links, forms
+
+    def crawl_and_scan(self, max_links=50):
+        # Pages with parameters and forms are crawled first; the queue keeps the best few thousand
+        self.frontier = Frontier(max_size=max(10 * max_links, 1000))
+        if not self._restore_checkpoint():
+            self.scanned_urls.add(self.target_url)
+            self.frontier.push(self.target_url, priority=float('-inf'))
+            self.crawled_count = 0
+            if self.discover:
+                with self.profiler.span('discovery'):
+                    self._discover_urls()
+
+        while self.frontier and self.crawled_count < max_links:
+            # Kept in current_url until fully tested so a resume revisits it
+            current_url = self.current_url = self.frontier.pop()
+            print(f"Scanning: {current_url}{self._rate_status(current_url)}")
+            with self.profiler.span('page', url=current_url):
+                new_links, forms = self._scan_page(current_url)
+
+            for link in new_links:
+                self._enqueue(link)
+            for form in forms:
+                if form['method'] == 'GET': # POST targets are only tested, never crawled
+                    self._enqueue(form['url'], form_action=True)
+
+            self.current_url = None
+            self.crawled_count += 1
+            self._checkpoint_tick()
 
+        print(self.passive.summary())
+        if self.page_cache:
+            self.findings_diff = diff_findings(self.page_cache.previous_findings, self.vulnerabilities)
+            self.page_cache.save(self.vulnerabilities)
+            print(self.page_cache.summary(self.findings_diff))
+        if self.checkpoint:
+            print(self.checkpoint.summary())
+            self.checkpoint.discard() # Scan finished, nothing left to resume
         return self.vulnerabilities
 
     def generate_report(self, filename="vulnerability_report.json"):
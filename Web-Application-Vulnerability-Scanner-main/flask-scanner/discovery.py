@@ -0,0 +1,160 @@
+# discovery.py
+# Crawl seeding from robots.txt and sitemaps, and a priority frontier.
+#
+# Sitemaps are parsed as a stream (iterparse over the raw response, gunzipped
+# on the fly for .gz files) and each element is discarded once read, so a
+# sitemap index pointing at millions of URLs is walked in constant memory.
+# Only the best-ranked URLs are kept, so the link budget goes to pages with
+# query parameters and likely forms before static and repetitive ones.
+# Sitemaps and URLs on other hosts are outside the scan's scope and ignored.
+import gzip
+import heapq
+import itertools
+import re
+import xml.etree.ElementTree as ET
+from urllib.parse import parse_qsl, urljoin, urlsplit
+
+# Path words that usually mean a form or user input
+FORM_HINTS = re.compile(r'(login|signin|sign-in|register|signup|search|contact|comment|feedback|account|profile|'
+                        r'admin|upload|edit|submit|cart|checkout|subscribe|reset|query|filter)', re.I)
+STATIC_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.svg', '.ico', '.webp', '.css', '.js', '.woff', '.woff2',
+                     '.ttf', '.eot', '.pdf', '.zip', '.gz', '.mp4', '.mp3', '.avi', '.mov', '.xml', '.txt')
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1] # Drop the sitemap XML namespace
+
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+def parse_robots(text, base_url):
+    """Return (sitemap URLs, disallowed/allowed paths) from a robots.txt body, on base_url's host only."""
+    sitemaps, paths = [], []
+    host = _host(base_url)
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        field, value = (part.strip() for part in line.split(':', 1))
+        field = field.lower()
+        if field == 'sitemap' and value:
+            sitemap_url = urljoin(base_url, value)
+            if _host(sitemap_url) == host:
+                sitemaps.append(sitemap_url)
+        elif field in ('disallow', 'allow') and value and value != '/':
+            # Hidden areas are attack surface; wildcards are cut back to their literal prefix
+            path = value.split('*', 1)[0].rstrip('$')
+            if path and path != '/' and _host(urljoin(base_url, path)) == host:
+                paths.append(urljoin(base_url, path))
+    return sitemaps, list(dict.fromkeys(paths))
+
+
+def iter_sitemap(fetch, url, max_sitemaps=1000):
+    """Yield page URLs from a sitemap or sitemap index, following nested indexes.
+
+    ``fetch(url)`` returns a streaming requests response (or None). Nested
+    sitemaps and page URLs on a host other than ``url``'s are skipped.
+    """
+    host = _host(url)
+    pending, seen = [url], set()
+    while pending and len(seen) < max_sitemaps:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        response = fetch(sitemap_url)
+        if response is None or response.status_code != 200:
+            continue
+        response.raw.decode_content = True
+        stream = response.raw
+        if urlsplit(sitemap_url).path.endswith('.gz'):
+            stream = gzip.GzipFile(fileobj=stream)
+        try:
+            parent = None
+            for event, element in ET.iterparse(stream, events=('start', 'end')):
+                tag = _local(element.tag)
+                if event == 'start':
+                    if tag in ('url', 'sitemap'):
+                        parent = tag
+                    continue
+                if tag == 'loc' and element.text:
+                    loc = urljoin(sitemap_url, element.text.strip()) # Tolerate relative locs
+                    if _host(loc) != host:
+                        pass # Out of scope: never fetched or crawled
+                    elif parent == 'sitemap':
+                        pending.append(loc)
+                    else:
+                        yield loc
+                if tag in ('url', 'sitemap', 'loc'):
+                    element.clear() # Keep memory flat on huge sitemaps
+        except (ET.ParseError, OSError, EOFError) as e:
+            print(f"[Discovery] Could not parse sitemap {sitemap_url}: {e}")
+        finally:
+            response.close()
+
+
+def url_priority(url, form_action=False, repeats=0):
+    """Lower is crawled sooner: parameters and likely forms first, static files last."""
+    parts = urlsplit(url)
+    path = parts.path.lower()
+    if path.endswith(STATIC_EXTENSIONS):
+        return 100.0
+    score = 50.0
+    params = len(parse_qsl(parts.query, keep_blank_values=True))
+    if params:
+        score -= 20 + 3 * min(params, 5)
+    if form_action:
+        score -= 25
+    if FORM_HINTS.search(path):
+        score -= 10
+    # /item?id=1, /item?id=2 ... add nothing new after the first few
+    score += 8 * min(repeats, 5)
+    # Shallow paths first among otherwise equal URLs
+    return score + 0.5 * min(path.count('/'), 20)
+
+
+def url_shape(url):
+    parts = urlsplit(url)
+    return parts.path, tuple(sorted(key for key, _ in parse_qsl(parts.query, keep_blank_values=True)))
+
+
+class Frontier:
+    """Priority queue of URLs to crawl, bounded to the best ``max_size`` entries."""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.heap = [] # (priority, sequence, url)
+        self.sequence = itertools.count() # FIFO among equal priorities
+        self.shapes = {} # {url_shape: times seen}, to push down repetitive URLs
+        self.max_shapes = 20 * max_size # Stop tracking new shapes past this, to bound memory
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, url, form_action=False, priority=None):
+        shape = url_shape(url)
+        repeats = self.shapes.get(shape, 0)
+        if repeats or len(self.shapes) < self.max_shapes:
+            self.shapes[shape] = repeats + 1
+        if priority is None:
+            priority = url_priority(url, form_action, repeats)
+        heapq.heappush(self.heap, (priority, next(self.sequence), url))
+        if len(self.heap) > 2 * self.max_size:
+            # Trim in bulk so the amortised cost stays O(log n) per push
+            self.heap = heapq.nsmallest(self.max_size, self.heap)
+
+    def pop(self):
+        return heapq.heappop(self.heap)[2]
+
+    def to_list(self):
+        return [list(entry) for entry in self.heap]
+
+    def restore(self, entries):
+        self.heap = [tuple(entry) for entry in entries]
+        heapq.heapify(self.heap)
+        self.sequence = itertools.count(max((entry[1] for entry in self.heap), default=-1) + 1)
+        for _, _, url in self.heap:
+            shape = url_shape(url)
+            self.shapes[shape] = self.shapes.get(shape, 0) + 1
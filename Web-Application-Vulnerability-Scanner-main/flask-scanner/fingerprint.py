@@ -0,0 +1,82 @@
+# fingerprint.py
+# Cheap response fingerprints for boolean-based blind SQLi inference.
+#
+# Two responses are "the same page" when, after stripping content that changes
+# on every request (tokens, timestamps, comments, the reflected payload), they
+# hash identically, or fall in neighbouring length buckets and their simhashes
+# differ in only a few bits. That is far cheaper than a full text diff and
+# tolerant of small dynamic fragments.
+import hashlib
+import html
+import math
+import re
+from urllib.parse import quote, quote_plus
+
+DYNAMIC_PATTERNS = [
+    re.compile(r'<!--.*?-->', re.S),
+    re.compile(r'<input[^>]*type=["\']?hidden[^>]*>', re.I), # CSRF tokens, view state
+    re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?'), # ISO timestamps
+    re.compile(r'\b\d{1,2}:\d{2}:\d{2}\b'),
+    re.compile(r'\b\d{6,}\b'), # Epoch times, request ids
+    re.compile(r'[A-Za-z0-9+/_-]{24,}={0,2}') # Session ids, nonces, hashes
+]
+TOKEN_PATTERN = re.compile(r'\w+')
+LENGTH_BUCKET_BASE = math.log(1.05) # Buckets are 5% wide
+MAX_SIMHASH_DISTANCE = 3
+
+
+def reflected_forms(value):
+    """The ways an injected value may be echoed back in a page."""
+    escaped = html.escape(value)
+    return {value, escaped, escaped.replace('&#x27;', '&#39;'), quote(value), quote_plus(value)}
+
+
+def normalize(text, reflected=()):
+    for value in reflected:
+        for form in reflected_forms(value):
+            if form:
+                text = text.replace(form, '')
+    for pattern in DYNAMIC_PATTERNS:
+        text = pattern.sub('', text)
+    return text
+
+
+def simhash(text):
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    shingles = {' '.join(tokens[i:i + 3]) for i in range(max(len(tokens) - 2, 1))}
+    hashes = [format(int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+              for s in shingles]
+    if not hashes:
+        return 0
+    # Column-wise bit counts via zip keeps the per-bit work in C
+    half = len(hashes) / 2
+    bits = ''.join('1' if column.count('1') > half else '0' for column in zip(*hashes))
+    return int(bits, 2)
+
+
+class Fingerprint:
+    def __init__(self, text, status=200, reflected=()):
+        text = normalize(text, reflected)
+        self.status = status
+        self.length = len(text)
+        self.digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        self.bucket = int(math.log(self.length + 1) / LENGTH_BUCKET_BASE)
+        self.simhash = simhash(text)
+
+    @classmethod
+    def of(cls, response, reflected=()):
+        return cls(response.text, response.status_code, reflected)
+
+    def distance(self, other):
+        return bin(self.simhash ^ other.simhash).count('1')
+
+    def matches(self, other):
+        if self.status != other.status:
+            return False
+        if self.digest == other.digest:
+            return True
+        return abs(self.bucket - other.bucket) <= 1 and self.distance(other) <= MAX_SIMHASH_DISTANCE
+
+    def describe(self, other):
+        return (f"status {self.status}/{other.status}, length {self.length}/{other.length}, "
+                f"simhash distance {self.distance(other)}")
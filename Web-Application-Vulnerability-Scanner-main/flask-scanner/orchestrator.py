@@ -0,0 +1,567 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import socket
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Empty
+from urllib.parse import urlsplit
+
+from checkpoint import CrawlCheckpoint
+from core import WebVulnerabilityScanner
+from page_state import PageStateCache
+from profiling import ScanProfiler
+from rate_control import AdaptiveRateController
+
+
+def checkpoint_for(directory, target, interval=10):
+    """One checkpoint file per target so an interrupted sweep resumes each scan."""
+    if not directory:
+        return None
+    name = hashlib.sha1(target.encode('utf-8')).hexdigest()[:16]
+    return CrawlCheckpoint(os.path.join(directory, f"{name}.ckpt"), interval)
+
+
+def page_cache_for(directory, target):
+    """Page state from the previous sweep of target, for incremental rescans."""
+    if not directory:
+        return None
+    name = hashlib.sha1(target.encode('utf-8')).hexdigest()[:16]
+    return PageStateCache(os.path.join(directory, f"{name}.state.json"))
+
+
+def diff_counts(scanner):
+    if scanner.findings_diff is None:
+        return {}
+    return {kind: len(findings) for kind, findings in scanner.findings_diff.items()}
+
+
+def finish_trace(profiler, path):
+    print(profiler.summary_table())
+    profiler.write(path)
+    print(f"Trace written to {path}")
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+class HostScheduler:
+    """One global request budget shared fairly between hosts, with per-host pacing.
+
+    A request slot is granted to the waiting host with the fewest requests in
+    flight (ties go to the host served least recently), so a large site cannot
+    starve small ones. Each host is also limited to ``per_host_rate`` requests
+    per second and ``per_host_concurrency`` requests in flight.
+
+    With ``adaptive`` each host gets its own AdaptiveRateController that starts
+    at ``per_host_rate`` and moves between ``min_host_rate`` and
+    ``max_host_rate`` depending on how the host responds.
+    """
+
+    def __init__(self, concurrency=8, per_host_rate=2.0, per_host_concurrency=2, adaptive=False,
+                 min_host_rate=0.2, max_host_rate=20.0):
+        self.concurrency = concurrency
+        self.per_host_rate = per_host_rate
+        self.interval = 1.0 / per_host_rate if per_host_rate > 0 else 0.0
+        self.per_host_concurrency = per_host_concurrency
+        self.adaptive = adaptive
+        self.min_host_rate = min_host_rate
+        self.max_host_rate = max_host_rate
+        self.controllers = {} # {host: AdaptiveRateController} when adaptive
+        self.cond = threading.Condition()
+        self.in_flight = 0
+        self.host_in_flight = {}
+        self.next_time = {}   # {host: earliest monotonic time for its next request}
+        self.last_grant = {}  # {host: monotonic time of last grant}
+        self.waiting = {}     # {host: deque of waiting tickets}
+        self.requests = 0
+
+    def controller_for(self, url):
+        if not self.adaptive:
+            return None
+        host = host_of(url)
+        with self.cond:
+            controller = self.controllers.get(host)
+            if controller is None:
+                controller = self.controllers[host] = AdaptiveRateController(
+                    self.per_host_rate, self.min_host_rate, self.max_host_rate)
+            return controller
+
+    def _ready_time(self, host):
+        controller = self.controllers.get(host)
+        if controller is None:
+            return self.next_time.get(host, 0.0)
+        return max(self.next_time.get(host, 0.0), controller.hold_until)
+
+    def _interval(self, host):
+        controller = self.controllers.get(host)
+        return controller.interval() if controller else self.interval
+
+    def _eligible(self, host, now):
+        return (self.host_in_flight.get(host, 0) < self.per_host_concurrency
+                and self._ready_time(host) <= now)
+
+    def _pick(self, now):
+        best = None
+        for host in self.waiting:
+            if not self._eligible(host, now):
+                continue
+            key = (self.host_in_flight.get(host, 0), self.last_grant.get(host, 0.0))
+            if best is None or key < best[0]:
+                best = (key, host)
+        return best[1] if best else None
+
+    def _next_wakeup(self, now):
+        pending = [self._ready_time(h) - now for h in self.waiting
+                   if self.host_in_flight.get(h, 0) < self.per_host_concurrency]
+        pending = [t for t in pending if t > 0]
+        return min(pending) if pending else None
+
+    def acquire(self, host):
+        ticket = object()
+        with self.cond:
+            queue = self.waiting.setdefault(host, deque())
+            queue.append(ticket)
+            while True:
+                now = time.monotonic()
+                if self.in_flight < self.concurrency and queue[0] is ticket and self._pick(now) == host:
+                    break
+                self.cond.wait(self._next_wakeup(now) if self.in_flight < self.concurrency else None)
+            queue.popleft()
+            if not queue:
+                del self.waiting[host]
+            self.in_flight += 1
+            self.host_in_flight[host] = self.host_in_flight.get(host, 0) + 1
+            self.last_grant[host] = now
+            self.next_time[host] = max(now, self.next_time.get(host, 0.0)) + self._interval(host)
+            self.requests += 1
+            self.cond.notify_all()
+
+    def release(self, host):
+        with self.cond:
+            self.in_flight -= 1
+            self.host_in_flight[host] -= 1
+            self.cond.notify_all()
+
+    @contextmanager
+    def slot(self, url):
+        host = host_of(url)
+        self.acquire(host)
+        try:
+            yield
+        finally:
+            self.release(host)
+
+
+class ScanOrchestrator:
+    """Scan many targets in one process; every scanner shares one HostScheduler."""
+
+    def __init__(self, targets, concurrency=8, per_host_rate=2.0, per_host_concurrency=2,
+                 max_links=50, max_active_targets=None, on_finding=None, on_target_done=None,
+                 checkpoint_dir=None, checkpoint_interval=10, state_dir=None, adaptive=False,
+                 max_host_rate=20.0, trace=None):
+        self.targets = list(dict.fromkeys(targets))
+        self.max_links = max_links
+        self.max_active_targets = max_active_targets or max(concurrency * 2, 1)
+        self.scheduler = HostScheduler(concurrency, per_host_rate, per_host_concurrency, adaptive=adaptive,
+                                       max_host_rate=max_host_rate)
+        self.on_finding = on_finding
+        self.on_target_done = on_target_done
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_interval = checkpoint_interval
+        self.state_dir = state_dir
+        self.trace = trace # Chrome trace / OTLP file path; profiling is off without it
+        self.profiler = ScanProfiler() if trace else None
+        self.lock = threading.Lock() # Serializes callbacks from scanner threads
+        self.results = {}
+
+    def _scan(self, target):
+        def report(finding):
+            with self.lock:
+                if self.on_finding:
+                    self.on_finding(target, finding)
+
+        started = time.time()
+        scanner = WebVulnerabilityScanner(target, scheduler=self.scheduler, on_finding=report,
+                                          checkpoint=checkpoint_for(self.checkpoint_dir, target,
+                                                                    self.checkpoint_interval),
+                                          page_cache=page_cache_for(self.state_dir, target),
+                                          profiler=self.profiler)
+        error = None
+        try:
+            scanner.crawl_and_scan(max_links=self.max_links)
+        except Exception as e: # One broken target must not stop the sweep
+            error = str(e)
+            print(f"[Orchestrator] {target} failed: {e}")
+        summary = {'target': target, 'findings': len(scanner.vulnerabilities),
+                   'seconds': round(time.time() - started, 2), 'error': error, **diff_counts(scanner)}
+        with self.lock:
+            self.results[target] = scanner.vulnerabilities
+            if self.on_target_done:
+                self.on_target_done(summary)
+        return summary
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=self.max_active_targets) as pool:
+            list(pool.map(self._scan, self.targets))
+        if self.profiler:
+            finish_trace(self.profiler, self.trace)
+        return self.results
+
+
+# --- Multi-core: targets are partitioned by host so per-host limits stay local ---
+
+def partition_by_host(targets, buckets):
+    groups = {}
+    for target in targets:
+        groups.setdefault(host_of(target), []).append(target)
+    partitions = [[] for _ in range(buckets)]
+    # Largest hosts first onto the least loaded partition
+    for host_targets in sorted(groups.values(), key=len, reverse=True):
+        min(partitions, key=len).extend(host_targets)
+    return [p for p in partitions if p]
+
+
+def _process_worker(targets, options, events):
+    orchestrator = ScanOrchestrator(
+        targets,
+        on_finding=lambda target, finding: events.put(('finding', target, finding)),
+        on_target_done=lambda summary: events.put(('done', summary['target'], summary)),
+        **options)
+    orchestrator.run()
+    events.put(('exit', None, None))
+
+
+def run_parallel(targets, processes, concurrency=8, per_host_rate=2.0, per_host_concurrency=2,
+                 max_links=50, on_finding=None, on_target_done=None, checkpoint_dir=None,
+                 checkpoint_interval=10, state_dir=None, adaptive=False, max_host_rate=20.0, trace=None):
+    """Spread targets over ``processes`` worker processes sharing ``concurrency`` between them."""
+    partitions = partition_by_host(list(dict.fromkeys(targets)), processes)
+    share = max(1, concurrency // max(len(partitions), 1))
+    options = {'concurrency': share, 'per_host_rate': per_host_rate,
+               'per_host_concurrency': per_host_concurrency, 'max_links': max_links,
+               'checkpoint_dir': checkpoint_dir, 'checkpoint_interval': checkpoint_interval,
+               'state_dir': state_dir, 'adaptive': adaptive, 'max_host_rate': max_host_rate}
+    events = multiprocessing.Queue()
+    workers = []
+    for index, part in enumerate(partitions):
+        # One trace file per process: scan.trace.json -> scan.trace.0.json, ...
+        part_trace = '{0}.{2}{1}'.format(*os.path.splitext(trace), index) if trace else None
+        workers.append(multiprocessing.Process(target=_process_worker,
+                                               args=(part, dict(options, trace=part_trace), events)))
+    for worker in workers:
+        worker.start()
+    running = len(workers)
+    while running:
+        try:
+            kind, target, payload = events.get(timeout=1)
+        except Empty:
+            # A worker that died (killed, crashed, out of memory) never sends 'exit'
+            if not any(worker.is_alive() for worker in workers) and events.empty():
+                break
+            continue
+        if kind == 'finding' and on_finding:
+            on_finding(target, payload)
+        elif kind == 'done' and on_target_done:
+            on_target_done(payload)
+        elif kind == 'exit':
+            running -= 1
+    for worker in workers:
+        worker.join()
+        if worker.exitcode:
+            print(f"[Orchestrator] Worker {worker.pid} exited with code {worker.exitcode}; "
+                  "its unfinished targets were not scanned")
+
+
+# --- Multi-node: a shared SQLite file acts as the work queue ---
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS targets (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    host TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    node TEXT,
+    claimed_at REAL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_targets_status ON targets (status, host);
+CREATE TABLE IF NOT EXISTS findings (
+    target_id INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+
+class TargetQueue:
+    """Work queue for several scanner nodes sharing one SQLite file.
+
+    A node only claims a target whose host is not being scanned by another
+    node, so per-host rate limits hold across nodes. A node renews its claim
+    while it scans (see ``leased``); claims not renewed for ``lease`` seconds
+    are treated as abandoned and handed out again.
+
+    WAL needs shared memory between the processes using the file, so it is
+    only used on local disk; with ``network_fs`` (a file on NFS shared by
+    several machines) the rollback journal and file locks are used instead.
+    """
+
+    def __init__(self, path, node=None, lease=600, network_fs=False):
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={'DELETE' if network_fs else 'WAL'}")
+        self.conn.executescript(QUEUE_SCHEMA)
+        self.node = node or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease = lease
+        self.lock = threading.Lock()
+
+    def enqueue(self, targets):
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO targets (url, host) VALUES (?, ?)',
+                                  [(t, host_of(t)) for t in targets])
+
+    def claim(self):
+        with self.lock:
+            now = time.time()
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.execute("UPDATE targets SET status='pending', node=NULL "
+                                  "WHERE status='running' AND claimed_at < ?", (now - self.lease,))
+                row = self.conn.execute(
+                    "SELECT id, url FROM targets WHERE status='pending' AND host NOT IN "
+                    "(SELECT host FROM targets WHERE status='running') ORDER BY id LIMIT 1").fetchone()
+                if row:
+                    self.conn.execute("UPDATE targets SET status='running', node=?, claimed_at=? WHERE id=?",
+                                      (self.node, now, row[0]))
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            return row
+
+    def renew(self, target_id):
+        """Extend this node's claim on a running target; False if it was handed to another node."""
+        with self.lock, self.conn:
+            return self.conn.execute("UPDATE targets SET claimed_at=? WHERE id=? AND status='running' AND node=?",
+                                     (time.time(), target_id, self.node)).rowcount == 1
+
+    @contextmanager
+    def leased(self, target_id):
+        """Renew the claim on target_id every lease/3 seconds while the body runs."""
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(self.lease / 3):
+                if not self.renew(target_id):
+                    print(f"[Queue] Lost the claim on target {target_id}")
+                    return
+
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def add_finding(self, target_id, finding):
+        data = zlib.compress(json.dumps(finding).encode('utf-8'))
+        with self.lock, self.conn:
+            self.conn.execute('INSERT INTO findings (target_id, data) VALUES (?, ?)', (target_id, data))
+
+    def complete(self, target_id, error=None):
+        """Mark a target this node still holds as finished; False if the claim had been lost."""
+        with self.lock, self.conn:
+            return self.conn.execute("UPDATE targets SET status=?, finished_at=?, error=? "
+                                     "WHERE id=? AND status='running' AND node=?",
+                                     ('failed' if error else 'done', time.time(), error, target_id,
+                                      self.node)).rowcount == 1
+
+    def remaining(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM targets WHERE status IN ('pending', 'running')").fetchone()[0]
+
+    def status(self):
+        with self.lock:
+            return dict(self.conn.execute('SELECT status, COUNT(*) FROM targets GROUP BY status').fetchall())
+
+    def findings(self):
+        with self.lock:
+            rows = self.conn.execute('SELECT t.url, f.data FROM findings f JOIN targets t ON t.id = f.target_id '
+                                     'ORDER BY f.rowid').fetchall()
+        for url, data in rows:
+            yield url, json.loads(zlib.decompress(data))
+
+
+def run_node(queue, threads=4, concurrency=8, per_host_rate=2.0, per_host_concurrency=2,
+             max_links=50, on_finding=None, on_target_done=None, poll=5.0, checkpoint_dir=None,
+             checkpoint_interval=10, state_dir=None, adaptive=False, max_host_rate=20.0, trace=None):
+    """Claim and scan targets from ``queue`` until it is drained."""
+    scheduler = HostScheduler(concurrency, per_host_rate, per_host_concurrency, adaptive=adaptive,
+                              max_host_rate=max_host_rate)
+    profiler = ScanProfiler() if trace else None
+    callback_lock = threading.Lock()
+
+    def worker():
+        while True:
+            claimed = queue.claim()
+            if claimed is None:
+                if queue.remaining() == 0:
+                    return
+                time.sleep(poll) # Other nodes still hold the remaining hosts
+                continue
+            target_id, target = claimed
+
+            def report(finding, target=target, target_id=target_id):
+                queue.add_finding(target_id, finding)
+                with callback_lock:
+                    if on_finding:
+                        on_finding(target, finding)
+
+            started = time.time()
+            scanner = WebVulnerabilityScanner(target, scheduler=scheduler, on_finding=report,
+                                              checkpoint=checkpoint_for(checkpoint_dir, target,
+                                                                        checkpoint_interval),
+                                              page_cache=page_cache_for(state_dir, target),
+                                              profiler=profiler)
+            error = None
+            with queue.leased(target_id): # Long scans must not be reclaimed and run twice
+                try:
+                    scanner.crawl_and_scan(max_links=max_links)
+                except Exception as e:
+                    error = str(e)
+            if not queue.complete(target_id, error):
+                print(f"[Queue] {target} was reclaimed by another node, leaving its status to that node")
+            with callback_lock:
+                if on_target_done:
+                    on_target_done({'target': target, 'findings': len(scanner.vulnerabilities),
+                                    'seconds': round(time.time() - started, 2), 'error': error,
+                                    **diff_counts(scanner)})
+
+    pool = [threading.Thread(target=worker, daemon=True) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    if profiler:
+        finish_trace(profiler, trace)
+
+
+# --- CLI ---
+
+def read_targets(path):
+    targets = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if not line.startswith('http://') and not line.startswith('https://'):
+                line = 'http://' + line # Same default as the web UI
+            targets.append(line)
+    return targets
+
+
+class FindingStream:
+    """Writes findings and per-target summaries as NDJSON while the sweep runs."""
+
+    def __init__(self, path):
+        self.out = open(path, 'a')
+
+    def finding(self, target, finding):
+        self.out.write(json.dumps({'event': 'finding', 'target': target, **finding}) + '\n')
+        self.out.flush()
+
+    def target_done(self, summary):
+        self.out.write(json.dumps({'event': 'target_done', **summary}) + '\n')
+        self.out.flush()
+        print(f"[Done] {summary['target']}: {summary['findings']} findings in {summary['seconds']}s"
+              + (f" ({summary['new']} new, {summary['fixed']} fixed)" if 'new' in summary else '')
+              + (f" (error: {summary['error']})" if summary['error'] else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scan many targets with one shared request budget')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_scan_options(p):
+        p.add_argument('--concurrency', type=int, default=8, help='Requests in flight across all targets')
+        p.add_argument('--per-host-rate', type=float, default=2.0, help='Requests per second per host '
+                                                                         '(starting rate with --adaptive)')
+        p.add_argument('--adaptive', action='store_true', help='Raise each host\'s rate while it stays fast and '
+                                                               'back off on 429/503 or latency spikes')
+        p.add_argument('--max-host-rate', type=float, default=20.0, help='Rate ceiling per host with --adaptive')
+        p.add_argument('--trace', metavar='FILE', help='Profile the scan: print a per-phase summary and write a '
+                                                       'Chrome trace (OTLP/JSON if FILE contains "otlp")')
+        p.add_argument('--per-host-concurrency', type=int, default=2, help='Requests in flight per host')
+        p.add_argument('--max-links', type=int, default=50, help='Pages crawled per target')
+        p.add_argument('--out', default='findings.ndjson', help='Append NDJSON findings here')
+        p.add_argument('--checkpoint-dir', help='Save crawl progress here and resume interrupted targets')
+        p.add_argument('--checkpoint-interval', type=float, default=10, help='Seconds between checkpoints')
+        p.add_argument('--state-dir', help='Incremental mode: keep page state here and only retest '
+                                           'pages that changed since the last sweep')
+
+    p = sub.add_parser('scan', help='Scan targets from a file (one URL per line)')
+    p.add_argument('targets')
+    p.add_argument('--processes', type=int, default=1, help='Worker processes (targets split by host)')
+    add_scan_options(p)
+
+    def add_queue_options(p):
+        p.add_argument('queue')
+        p.add_argument('--network-fs', action='store_true', help='The queue file is on NFS or another network '
+                                                                 'filesystem (rollback journal instead of WAL)')
+
+    p = sub.add_parser('enqueue', help='Add targets to a shared SQLite queue')
+    add_queue_options(p)
+    p.add_argument('targets')
+
+    p = sub.add_parser('worker', help='Scan targets from a shared SQLite queue until it is empty')
+    add_queue_options(p)
+    p.add_argument('--threads', type=int, default=4, help='Targets scanned at once on this node')
+    add_scan_options(p)
+
+    p = sub.add_parser('status', help='Show queue progress, or dump findings with --findings')
+    add_queue_options(p)
+    p.add_argument('--findings', action='store_true')
+
+    args = parser.parse_args()
+
+    if args.command == 'enqueue':
+        targets = read_targets(args.targets)
+        TargetQueue(args.queue, network_fs=args.network_fs).enqueue(targets)
+        print(f"Queued {len(targets)} targets in {args.queue}")
+        return
+    if args.command == 'status':
+        queue = TargetQueue(args.queue, network_fs=args.network_fs)
+        if args.findings:
+            for target, finding in queue.findings():
+                print(json.dumps({'target': target, **finding}))
+        else:
+            print(json.dumps(queue.status()))
+        return
+
+    stream = FindingStream(args.out)
+    options = {'concurrency': args.concurrency, 'per_host_rate': args.per_host_rate,
+               'per_host_concurrency': args.per_host_concurrency, 'max_links': args.max_links,
+               'on_finding': stream.finding, 'on_target_done': stream.target_done,
+               'checkpoint_dir': args.checkpoint_dir, 'checkpoint_interval': args.checkpoint_interval,
+               'state_dir': args.state_dir, 'adaptive': args.adaptive, 'max_host_rate': args.max_host_rate,
+               'trace': args.trace}
+    if args.command == 'worker':
+        run_node(TargetQueue(args.queue, network_fs=args.network_fs), threads=args.threads, **options)
+    elif args.processes > 1:
+        run_parallel(read_targets(args.targets), args.processes, **options)
+    else:
+        ScanOrchestrator(read_targets(args.targets), **options).run()
+
+
+if __name__ == '__main__':
+    main()
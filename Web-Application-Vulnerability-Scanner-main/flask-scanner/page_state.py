@@ -0,0 +1,125 @@
+# page_state.py
+# Page-state cache for incremental rescans.
+#
+# After a scan, every visited page is stored with its ETag, Last-Modified,
+# a hash of the body, its forms and their signature, the links it contained, the
+# headers the passive checks read and the findings its payload tests produced.
+# The next scan sends conditional requests; a page that answers 304, or whose
+# body and forms hash the same as last time, is not re-tested and its previous
+# findings are carried forward.
+import hashlib
+import json
+import os
+import time
+
+STATE_VERSION = 3
+
+
+def finding_key(finding):
+    # Evidence often contains timings or full headers, so it is left out
+    return (finding.get('type'), finding.get('url'), finding.get('method', 'GET'), finding.get('payload'))
+
+
+def diff_findings(previous, current):
+    """Split findings into new / fixed / unchanged compared to the previous run."""
+    before = {finding_key(f): f for f in previous}
+    after = {finding_key(f): f for f in current}
+    return {
+        'new': [f for k, f in after.items() if k not in before],
+        'fixed': [f for k, f in before.items() if k not in after],
+        'unchanged': [f for k, f in after.items() if k in before]
+    }
+
+
+def form_signature(forms):
+    raw = json.dumps(forms, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class PageStateCache:
+    def __init__(self, path):
+        self.path = path
+        self.previous = {} # {url: page state} from the last completed scan
+        self.previous_findings = []
+        self.pages = {} # Pages seen during this scan
+        self.stats = {'not_modified': 0, 'same_content': 0, 'retested': 0}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[Incremental] Ignoring unreadable page state {self.path}: {e}")
+            return
+        if state.get('version') == STATE_VERSION:
+            self.previous = state.get('pages', {})
+            self.previous_findings = state.get('findings', [])
+
+    def conditional_headers(self, url):
+        page = self.previous.get(url)
+        if not page:
+            return None
+        headers = {}
+        if page.get('etag'):
+            headers['If-None-Match'] = page['etag']
+        if page.get('last_modified'):
+            headers['If-Modified-Since'] = page['last_modified']
+        return headers or None
+
+    def reuse(self, url, response=None):
+        """Carry the previous state of an unchanged page into this scan; returns it."""
+        page = dict(self.previous[url])
+        if response is not None and response.status_code == 304:
+            self.stats['not_modified'] += 1
+        else:
+            self.stats['same_content'] += 1
+        if response is not None:
+            # Validators may be refreshed even when the content is not
+            page['etag'] = response.headers.get('ETag', page.get('etag'))
+            page['last_modified'] = response.headers.get('Last-Modified', page.get('last_modified'))
+        self.pages[url] = page
+        return page
+
+    def unchanged(self, url, response, forms):
+        page = self.previous.get(url)
+        return bool(page) and page['content_hash'] == hashlib.sha256(response.content).hexdigest() \
+            and page['form_signature'] == form_signature(forms)
+
+    def record(self, url, response, forms, links, passive, findings):
+        self.stats['retested'] += 1
+        self.pages[url] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': hashlib.sha256(response.content).hexdigest(),
+            'form_signature': form_signature(forms),
+            'forms': forms, # GET form actions are crawled again when the page is reused
+            'links': links,
+            'passive': passive, # Headers the passive checks need, for 304 responses
+            'findings': findings
+        }
+
+    def checkpoint_state(self):
+        """Pages and counters of the scan so far, for CrawlCheckpoint."""
+        return {'pages': self.pages, 'stats': self.stats}
+
+    def restore(self, state):
+        self.pages.update(state['pages'])
+        self.stats.update(state['stats'])
+
+    def save(self, findings):
+        # Pages that disappeared are dropped, so their findings show up as fixed next time
+        state = {'version': STATE_VERSION, 'saved_at': time.time(), 'pages': self.pages, 'findings': findings}
+        tmp_path = f"{self.path}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def summary(self, diff):
+        return (f"[Incremental] {self.stats['not_modified']} pages not modified (304), "
+                f"{self.stats['same_content']} unchanged, {self.stats['retested']} retested; "
+                f"findings: {len(diff['new'])} new, {len(diff['fixed'])} fixed, "
+                f"{len(diff['unchanged'])} unchanged")
@@ -0,0 +1,161 @@
+# passive.py
+# Passive checks on response headers, run once per host and response class.
+#
+# Every crawled response is reduced to the few headers the checks look at
+# (see passive_input). Responses from the same host with the same reduced
+# headers share one cached result, and each issue becomes a single finding per
+# host whose ``affected_urls``/``count`` grow as more pages show it, instead of
+# one near-identical finding per page.
+import re
+from urllib.parse import urlsplit
+
+SECURITY_HEADERS = [
+    "Content-Security-Policy",
+    "X-Frame-Options",
+    "X-Content-Type-Options",
+    "Strict-Transport-Security",
+    "Referrer-Policy"
+]
+BANNER_HEADERS = ["Server", "X-Powered-By", "X-AspNet-Version", "X-AspNetMvc-Version", "X-Generator"]
+CORS_HEADERS = ["Access-Control-Allow-Origin", "Access-Control-Allow-Credentials"]
+MAX_AFFECTED_URLS = 50 # Stored per finding; 'count' keeps the full total
+
+VERSION_PATTERN = re.compile(r'\d+\.\d+')
+
+
+def _set_cookie_headers(response):
+    # requests folds repeated Set-Cookie headers into one string, which breaks on Expires dates
+    raw = getattr(response.raw, 'headers', None)
+    if raw is not None and hasattr(raw, 'getlist'):
+        return raw.getlist('Set-Cookie')
+    value = response.headers.get('Set-Cookie')
+    return [value] if value else []
+
+
+def _cookie_attributes(set_cookie):
+    parts = [p.strip() for p in set_cookie.split(';')]
+    name = parts[0].split('=', 1)[0]
+    flags = {}
+    for part in parts[1:]:
+        key, _, value = part.partition('=')
+        flags[key.lower()] = value
+    return name, flags
+
+
+def passive_input(response):
+    """The only parts of a response the passive checks need (small enough to cache)."""
+    wanted = SECURITY_HEADERS + BANNER_HEADERS + CORS_HEADERS
+    headers = {name: response.headers[name] for name in wanted if name in response.headers}
+    cookies = []
+    for set_cookie in _set_cookie_headers(response):
+        name, flags = _cookie_attributes(set_cookie)
+        cookies.append([name, sorted(k for k in flags if k in ('secure', 'httponly')),
+                        flags.get('samesite', '')])
+    return {'headers': headers, 'cookies': sorted(cookies)}
+
+
+class PassiveAnalyzer:
+    def __init__(self, on_new_finding=None):
+        self.on_new_finding = on_new_finding # Called once per distinct (host, issue)
+        self.findings = {} # {(host, type, payload): finding}
+        self.seen_urls = {} # {(host, type, payload): set of URLs}
+        self.classes = {} # {response class: [finding keys]}
+        self.stats = {'responses': 0, 'classes': 0}
+
+    def adopt(self, findings):
+        """Re-link aggregated findings restored from a checkpoint or earlier run."""
+        for finding in findings:
+            if 'affected_urls' not in finding:
+                continue
+            key = (urlsplit(finding['url']).netloc.lower(), finding['type'], finding['payload'])
+            self.findings[key] = finding
+            self.seen_urls[key] = set(finding['affected_urls'])
+
+    def analyze(self, url, data):
+        self.stats['responses'] += 1
+        host = urlsplit(url).netloc.lower()
+        scheme = urlsplit(url).scheme
+        response_class = (host, scheme, repr(sorted(data['headers'].items())), repr(data['cookies']))
+        keys = self.classes.get(response_class)
+        new_keys = []
+        if keys is None:
+            self.stats['classes'] += 1
+            keys = self.classes[response_class] = [
+                self._register(host, url, issue, new_keys) for issue in self._checks(scheme, data)]
+        for key in keys:
+            self._affect(key, url)
+        # Only once this URL is counted, so consumers that serialize the finding see it
+        if self.on_new_finding:
+            for key in new_keys:
+                self.on_new_finding(self.findings[key])
+
+    def _register(self, host, url, issue, new_keys):
+        issue_type, payload, severity, evidence = issue
+        key = (host, issue_type, payload)
+        if key not in self.findings:
+            finding = {
+                'type': issue_type,
+                'url': url,
+                'payload': payload,
+                'severity': severity,
+                'evidence': evidence,
+                'affected_urls': [],
+                'count': 0
+            }
+            self.findings[key] = finding
+            self.seen_urls[key] = set()
+            new_keys.append(key)
+        return key
+
+    def _affect(self, key, url):
+        urls = self.seen_urls[key]
+        if url in urls:
+            return
+        urls.add(url)
+        finding = self.findings[key]
+        finding['count'] += 1
+        if len(finding['affected_urls']) < MAX_AFFECTED_URLS:
+            finding['affected_urls'].append(url)
+
+    def _checks(self, scheme, data):
+        headers = data['headers']
+        issues = []
+
+        missing = [name for name in SECURITY_HEADERS if name not in headers]
+        if missing:
+            present = {name: headers[name] for name in SECURITY_HEADERS if name in headers}
+            issues.append(('Missing Security Headers', f"Missing headers: {', '.join(missing)}", 'Medium',
+                           f"Security headers received: {present}"))
+
+        for name, flags, samesite in data['cookies']:
+            missing_flags = [flag for flag, present in (('HttpOnly', 'httponly' in flags),
+                                                        ('Secure', 'secure' in flags or scheme != 'https'),
+                                                        ('SameSite', bool(samesite))) if not present]
+            if missing_flags:
+                issues.append(('Insecure Cookie Flags', f"Cookie {name} missing: {', '.join(missing_flags)}",
+                               'Medium' if 'HttpOnly' in missing_flags else 'Low',
+                               f"Set-Cookie {name} flags: {', '.join(flags) or 'none'}, "
+                               f"SameSite={samesite or 'unset'}"))
+
+        origin = headers.get('Access-Control-Allow-Origin')
+        credentials = headers.get('Access-Control-Allow-Credentials', '').lower() == 'true'
+        if origin == '*' and credentials:
+            issues.append(('Permissive CORS Policy', 'Access-Control-Allow-Origin: * with credentials', 'High',
+                           'Any site may read authenticated responses'))
+        elif origin == 'null':
+            issues.append(('Permissive CORS Policy', 'Access-Control-Allow-Origin: null', 'Medium',
+                           'Sandboxed iframes and file: pages are trusted'))
+        elif origin == '*':
+            issues.append(('Permissive CORS Policy', 'Access-Control-Allow-Origin: *', 'Low',
+                           'Any site may read these responses'))
+
+        for name in BANNER_HEADERS:
+            value = headers.get(name)
+            # A bare product name is fine; versions help attackers pick exploits
+            if value and (name != 'Server' or VERSION_PATTERN.search(value)):
+                issues.append(('Server Version Disclosure', f"{name}: {value}", 'Low', f"{name}: {value}"))
+        return issues
+
+    def summary(self):
+        return (f"[Passive] {self.stats['responses']} responses, {self.stats['classes']} analyzed, "
+                f"{len(self.findings)} host-level findings")
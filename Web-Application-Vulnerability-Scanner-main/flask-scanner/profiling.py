@@ -0,0 +1,170 @@
+# profiling.py
+# Timing spans and counters for crawl_and_scan.
+#
+#   profiler = ScanProfiler()
+#   scanner = WebVulnerabilityScanner(url, profiler=profiler)
+#   scanner.crawl_and_scan()
+#   print(profiler.summary_table())
+#   profiler.write_chrome_trace('scan.trace.json')   # chrome://tracing or ui.perfetto.dev
+#   profiler.write_otlp('scan.otlp.json')            # OTLP/JSON, e.g. for an OpenTelemetry collector
+#
+# Scanners without a profiler use NULL_PROFILER, whose span() hands back one
+# shared no-op context manager, so disabled profiling costs a method call.
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+_NULL_SPAN = nullcontext()
+
+
+class NullProfiler:
+    enabled = False
+
+    def span(self, name, **attributes):
+        return _NULL_SPAN
+
+    def count(self, name, value=1):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'attributes', 'start', 'child_time', 'span_id', 'parent_id')
+
+    def __init__(self, profiler, name, attributes):
+        self.profiler = profiler
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        self.parent_id = stack[-1].span_id if stack else None
+        self.span_id = self.profiler._next_id()
+        self.child_time = 0
+        stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        duration = end - self.start
+        stack = self.profiler._stack()
+        stack.pop()
+        if stack:
+            stack[-1].child_time += duration
+        self.profiler._record(self, end, duration)
+        return False
+
+
+class ScanProfiler:
+    enabled = True
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.spans = [] # (name, start ns, duration ns, thread id, span id, parent id, attributes)
+        self.phases = {} # {name: [count, total ns, self ns, max ns]}
+        self.counters = {}
+        self.ids = 0
+        self.origin = time.perf_counter_ns()
+        self.origin_unix = time.time_ns() # Maps perf_counter to wall-clock time for OTLP
+        self.last_end = self.origin
+
+    def span(self, name, **attributes):
+        return _Span(self, name, attributes)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def _next_id(self):
+        with self.lock:
+            self.ids += 1
+            return self.ids
+
+    def _record(self, span, end, duration):
+        with self.lock:
+            self.spans.append((span.name, span.start, duration, threading.get_ident(), span.span_id,
+                               span.parent_id, span.attributes))
+            phase = self.phases.get(span.name)
+            if phase is None:
+                phase = self.phases[span.name] = [0, 0, 0, 0]
+            phase[0] += 1
+            phase[1] += duration
+            phase[2] += duration - span.child_time
+            phase[3] = max(phase[3], duration)
+            self.last_end = max(self.last_end, end)
+
+    def summary_table(self):
+        wall = max(self.last_end - self.origin, 1)
+        lines = [f"{'phase':<20}{'count':>8}{'total s':>10}{'self s':>10}{'self %':>8}{'mean ms':>10}{'max ms':>10}"]
+        with self.lock:
+            phases = sorted(self.phases.items(), key=lambda item: item[1][2], reverse=True)
+            counters = sorted(self.counters.items())
+        for name, (count, total, self_time, longest) in phases:
+            lines.append(f"{name:<20}{count:>8}{total / 1e9:>10.2f}{self_time / 1e9:>10.2f}"
+                         f"{self_time / wall:>8.1%}{total / count / 1e6:>10.2f}{longest / 1e6:>10.1f}")
+        lines.append(f"{'wall':<20}{'':>8}{wall / 1e9:>10.2f}")
+        if counters:
+            lines.append('counters: ' + ', '.join(f"{name}={value}" for name, value in counters))
+        return '\n'.join(lines)
+
+    def to_chrome_trace(self):
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': f"scanner-{n}"}}
+                  for n, tid in enumerate(sorted({span[3] for span in self.spans}))]
+        for name, start, duration, tid, _, _, attributes in self.spans:
+            events.append({'name': name, 'cat': 'scan', 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': (start - self.origin) / 1000, 'dur': duration / 1000, 'args': attributes})
+        events.append({'name': 'counters', 'ph': 'C', 'pid': pid, 'tid': 0,
+                       'ts': (self.last_end - self.origin) / 1000, 'args': dict(self.counters)})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_otlp(self, service_name='flask-scanner'):
+        trace_id = os.urandom(16).hex()
+        offset = self.origin_unix - self.origin
+        spans = []
+        for name, start, duration, tid, span_id, parent_id, attributes in self.spans:
+            span = {
+                'traceId': trace_id,
+                'spanId': f"{span_id:016x}",
+                'name': name,
+                'kind': 1, # SPAN_KIND_INTERNAL
+                'startTimeUnixNano': str(start + offset),
+                'endTimeUnixNano': str(start + duration + offset),
+                'attributes': [{'key': key, 'value': {'stringValue': str(value)}}
+                               for key, value in attributes.items()] + [
+                    {'key': 'thread.id', 'value': {'intValue': str(tid)}}]
+            }
+            if parent_id:
+                span['parentSpanId'] = f"{parent_id:016x}"
+            spans.append(span)
+        return {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+            'scopeSpans': [{'scope': {'name': 'flask-scanner.profiling'}, 'spans': spans}]
+        }]}
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def write_otlp(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_otlp(), f)
+
+    def write(self, path):
+        """Chrome trace by default; OTLP/JSON when the file name contains 'otlp'."""
+        if 'otlp' in os.path.basename(path):
+            self.write_otlp(path)
+        else:
+            self.write_chrome_trace(path)
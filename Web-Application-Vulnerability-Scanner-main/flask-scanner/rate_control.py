@@ -0,0 +1,95 @@
+# rate_control.py
+# AIMD (additive increase, multiplicative decrease) request pacing.
+#
+# While responses are healthy the rate grows by roughly ``increase`` requests
+# per second every second. A 429/503, a timeout or a latency spike (latency
+# well above the target's own baseline) cuts the rate by ``decrease``. A
+# Retry-After header pauses all requests until the time the target asked for.
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+BACKOFF_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - (now or time.time()))
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class AdaptiveRateController:
+    def __init__(self, initial_rate=2.0, min_rate=0.2, max_rate=20.0, increase=0.5, decrease=0.5,
+                 latency_factor=2.0, max_retry_after=120):
+        self.rate = initial_rate # Requests per second
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor # Spike = latency above baseline * factor
+        self.max_retry_after = max_retry_after
+        self.lock = threading.Lock()
+        self.next_time = 0.0 # Earliest monotonic time for the next request
+        self.hold_until = 0.0 # Set from Retry-After
+        self.last_decrease = 0.0
+        self.latency = None # Recent latency (fast EWMA)
+        self.baseline = None # Healthy latency (slow EWMA)
+        self.samples = 0
+        self.backoffs = 0
+
+    def interval(self):
+        return 1.0 / self.rate
+
+    def wait(self):
+        """Block until the next request may be sent (single-target use; the
+        orchestrator's HostScheduler paces with interval()/hold_until instead)."""
+        with self.lock:
+            now = time.monotonic()
+            send_at = max(now, self.next_time, self.hold_until)
+            self.next_time = send_at + self.interval()
+        if send_at > now:
+            time.sleep(send_at - now)
+
+    def _backoff(self, now):
+        # One cut per cooldown, otherwise every in-flight response would cut again
+        if now - self.last_decrease < 1.0:
+            return
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.last_decrease = now
+        self.backoffs += 1
+
+    def observe(self, status, latency, retry_after=None):
+        with self.lock:
+            now = time.monotonic()
+            self.samples += 1
+            self.latency = latency if self.latency is None else 0.7 * self.latency + 0.3 * latency
+            if status in BACKOFF_STATUSES:
+                delay = parse_retry_after(retry_after)
+                if delay is not None:
+                    self.hold_until = max(self.hold_until, now + min(delay, self.max_retry_after))
+                self._backoff(now)
+                return
+            # Small absolute floor so sub-millisecond jitter on a fast target is not a spike
+            if self.baseline is not None and self.samples > 5 \
+                    and latency > max(self.baseline * self.latency_factor, self.baseline + 0.05):
+                self._backoff(now)
+                return
+            self.baseline = latency if self.baseline is None else 0.95 * self.baseline + 0.05 * latency
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def error(self):
+        # Timeouts and connection resets are the clearest overload signal
+        with self.lock:
+            self._backoff(time.monotonic())
+
+    def status(self):
+        latency = f"{self.latency * 1000:.0f} ms" if self.latency is not None else "-"
+        held = self.hold_until - time.monotonic()
+        return f"{self.rate:.1f} req/s, {latency}" + (f", paused {held:.0f}s" if held > 0 else '')
@@ -0,0 +1,177 @@
+# report_store.py
+# Scan reports in SQLite, indexed for paging, filtering and sorting.
+#
+# Each finding is one row: the columns the report view filters and sorts on
+# (type, severity, url) are indexed together with the report id, and the full
+# finding dict is kept as JSON in `data`. Pages are fetched with a keyset
+# cursor (the sort value and id of the last row shown), so page 2,000 of a
+# 100k-finding report costs the same as page 1.
+import base64
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    target_url TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reports_target ON reports (target_url, id);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    report_id INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    severity_rank INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_findings_type ON findings (report_id, type, id);
+CREATE INDEX IF NOT EXISTS idx_findings_type_severity ON findings (report_id, type, severity_rank, id);
+CREATE INDEX IF NOT EXISTS idx_findings_severity ON findings (report_id, severity_rank, id);
+CREATE INDEX IF NOT EXISTS idx_findings_url ON findings (report_id, url, id);
+"""
+
+SEVERITY_RANK = {'High': 0, 'Medium': 1, 'Low': 2}
+SORT_COLUMNS = {'severity': 'severity_rank', 'type': 'type', 'url': 'url', 'id': 'id'}
+EXPORT_COLUMNS = ['type', 'severity', 'url', 'method', 'payload', 'count', 'evidence']
+
+
+def encode_cursor(value, row_id):
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+class ReportStore:
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local() # One connection per Flask worker thread
+        self.facet_cache = {} # Finished reports never change, so their facets are computed once
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = self.local.db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+        return db
+
+    # --- Writing ---
+
+    def create_report(self, target_url):
+        with self._connect() as db:
+            return db.execute('INSERT INTO reports (target_url, started_at) VALUES (?, ?)',
+                              (target_url, time.time())).lastrowid
+
+    def add_findings(self, report_id, findings):
+        rows = [(report_id, f.get('type', ''), f.get('severity', ''), SEVERITY_RANK.get(f.get('severity'), 3),
+                 f.get('url', ''), json.dumps(f)) for f in findings]
+        with self._connect() as db:
+            db.executemany('INSERT INTO findings (report_id, type, severity, severity_rank, url, data) '
+                           'VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+    def finish_report(self, report_id, summary=None):
+        with self._connect() as db:
+            db.execute('UPDATE reports SET finished_at = ?, summary = ? WHERE id = ?',
+                       (time.time(), json.dumps(summary) if summary is not None else None, report_id))
+
+    def save_report(self, target_url, findings, summary=None, batch_size=5000):
+        report_id = self.create_report(target_url)
+        for start in range(0, len(findings), batch_size):
+            self.add_findings(report_id, findings[start:start + batch_size])
+        self.finish_report(report_id, summary)
+        return report_id
+
+    # --- Reading ---
+
+    def get_report(self, report_id):
+        row = self._connect().execute('SELECT id, target_url, started_at, finished_at, summary FROM reports '
+                                      'WHERE id = ?', (report_id,)).fetchone()
+        if row is None:
+            return None
+        return {'id': row[0], 'target_url': row[1], 'started_at': row[2], 'finished_at': row[3],
+                'summary': json.loads(row[4]) if row[4] else None}
+
+    def latest_report(self, target_url, scan_config=None, limit=20):
+        """Most recent finished report for a target (scanned with ``scan_config``, if given), or None."""
+        rows = self._connect().execute('SELECT id FROM reports WHERE target_url = ? AND finished_at IS NOT NULL '
+                                       'ORDER BY id DESC LIMIT ?', (target_url, limit)).fetchall()
+        for report_id, in rows:
+            report = self.get_report(report_id)
+            if scan_config is None or (report['summary'] or {}).get('scan_config') == scan_config:
+                return report
+        return None
+
+    def _where(self, report_id, finding_type=None, severity=None, url_prefix=None):
+        clauses, params = ['report_id = ?'], [report_id]
+        if finding_type:
+            clauses.append('type = ?')
+            params.append(finding_type)
+        if severity:
+            clauses.append('severity_rank = ?')
+            params.append(SEVERITY_RANK.get(severity, 3))
+        if url_prefix:
+            # A range instead of LIKE so the url index is usable
+            clauses.append('url >= ? AND url < ?')
+            params.extend([url_prefix, url_prefix + '\U0010ffff'])
+        return clauses, params
+
+    def count(self, report_id, **filters):
+        clauses, params = self._where(report_id, **filters)
+        return self._connect().execute(f"SELECT COUNT(*) FROM findings WHERE {' AND '.join(clauses)}",
+                                       params).fetchone()[0]
+
+    def facets(self, report_id):
+        """Finding counts per type and per severity, for the filter controls."""
+        cached = self.facet_cache.get(report_id)
+        if cached is not None:
+            return cached
+        db = self._connect()
+        types = db.execute('SELECT type, COUNT(*) FROM findings WHERE report_id = ? GROUP BY type ORDER BY type',
+                           (report_id,)).fetchall()
+        ranks = db.execute('SELECT severity_rank, severity, COUNT(*) FROM findings WHERE report_id = ? '
+                           'GROUP BY severity_rank ORDER BY severity_rank', (report_id,)).fetchall()
+        facets = {'type': types, 'severity': [(severity, count) for _, severity, count in ranks]}
+        report = self.get_report(report_id)
+        if report and report['finished_at']:
+            self.facet_cache[report_id] = facets
+        return facets
+
+    def query(self, report_id, sort='severity', descending=False, after=None, limit=50, **filters):
+        """Return (findings, next cursor or None) for one page."""
+        column = SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"Cannot sort by {sort!r}")
+        clauses, params = self._where(report_id, **filters)
+        if after:
+            value, row_id = decode_cursor(after)
+            clauses.append(f"({column}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend([value, row_id])
+        direction = 'DESC' if descending else 'ASC'
+        rows = self._connect().execute(
+            f"SELECT id, {column}, data FROM findings WHERE {' AND '.join(clauses)} "
+            f"ORDER BY {column} {direction}, id {direction} LIMIT ?", params + [limit + 1]).fetchall()
+        findings = [dict(json.loads(data), id=row_id) for row_id, _, data in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+        return findings, next_cursor
+
+    def iter_findings(self, report_id, sort='id', chunk_size=1000, **filters):
+        """Yield every matching finding without holding the result set in memory."""
+        cursor = None
+        while True:
+            findings, cursor = self.query(report_id, sort=sort, after=cursor, limit=chunk_size, **filters)
+            yield from findings
+            if cursor is None:
+                return
@@ -0,0 +1,113 @@
+# scan_cache.py
+# Finished scans, reused instead of re-scanning the same target.
+#
+# Entries map (normalized target, scan configuration) to a report id and are
+# kept for ``ttl`` seconds, least recently used first out once there are more
+# than ``max_entries``. Requests for a target that is already being scanned
+# wait for that scan instead of starting another one.
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_target(url):
+    """Canonical form of a target URL, so trivially different spellings share a cache entry."""
+    url = url.strip()
+    if not re.match(r'https?://', url, re.I):
+        url = 'http://' + url # Prepend http:// if missing
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, '')) # Fragments never reach the server
+
+
+class _PendingScan:
+    def __init__(self):
+        self.done = threading.Event()
+        self.report_id = None
+        self.error = None
+
+
+class ScanCache:
+    def __init__(self, ttl=3600, max_entries=100, load=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.load = load # Optional load(target, config) -> (report_id, finished_at) for entries not in memory
+        self.entries = OrderedDict() # {key: (report_id, finished_at)}, least recently used first
+        self.pending = {} # {key: _PendingScan} for scans in progress
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evicted': 0}
+
+    @staticmethod
+    def key(target, config):
+        return normalize_target(target), json.dumps(config, sort_keys=True)
+
+    def _fresh(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None and self.load:
+            entry = self.load(key[0], json.loads(key[1]))
+            if entry:
+                self._store(key, *entry)
+        if entry is None:
+            return None
+        if now - entry[1] > self.ttl:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def _store(self, key, report_id, finished_at):
+        self.entries[key] = (report_id, finished_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats['evicted'] += 1
+
+    def get_or_scan(self, target, config, scan, force=False):
+        """Return (report_id, how) where how is 'cached', 'scanned' or 'joined'.
+
+        ``scan()`` runs the scan and returns its report id; it is only called
+        when there is no fresh entry (or ``force`` is set) and no scan of the
+        same key is already running.
+        """
+        key = self.key(target, config)
+        with self.lock:
+            report_id = None if force else self._fresh(key, time.time())
+            if report_id is not None:
+                self.stats['hits'] += 1
+                return report_id, 'cached'
+            pending = self.pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self.pending[key] = _PendingScan()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            # Also for a re-scan: the scan in progress is as fresh as a new one would be
+            pending.done.wait()
+            if pending.error:
+                raise pending.error
+            return pending.report_id, 'joined'
+
+        try:
+            pending.report_id = scan()
+            with self.lock:
+                self._store(key, pending.report_id, time.time())
+            return pending.report_id, 'scanned'
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.pending[key]
+            pending.done.set()
@@ -0,0 +1,63 @@
+# tests/test_fingerprint.py
+# Page fingerprints (fingerprint.py) used by the boolean-based blind SQLi check.
+#   python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fingerprint import Fingerprint
+
+PRODUCTS = "".join(f"<li>Product {n}: a sturdy {colour} widget, in stock</li>"
+                   for n, colour in enumerate(['red', 'green', 'blue', 'black', 'white', 'grey'] * 4))
+
+
+def page(items, query='', token='a' * 32, when='2024-05-01 10:00:00', request_id='1000001'):
+    return (f"<html><body><!-- rendered {when} --><form><input type='hidden' name='csrf' value='{token}'>"
+            f"</form><p>Results for {query}</p><ul>{items}</ul>"
+            f"<footer>Request {request_id} at {when} session {token}</footer></body></html>")
+
+
+TRUE_PAGE = page(PRODUCTS, "1 AND 1=1")
+FALSE_PAGE = page("<li>No products found</li>", "1 AND 1=2")
+
+
+def test_same_page_with_fresh_tokens_matches():
+    again = page(PRODUCTS, "1 AND 1=1", token='b' * 32, when='2024-05-01 10:00:07', request_id='1000002')
+    assert Fingerprint(TRUE_PAGE).matches(Fingerprint(again))
+
+
+def test_reflected_payloads_are_ignored():
+    true_1 = Fingerprint(page(PRODUCTS, "1 AND 1=1"), reflected=["1 AND 1=1"])
+    true_2 = Fingerprint(page(PRODUCTS, "1 AND 2=2"), reflected=["1 AND 2=2"])
+    assert true_1.digest == true_2.digest
+    assert true_1.matches(true_2)
+
+
+def test_small_dynamic_fragment_still_matches():
+    # One product changed between requests: not identical, but close in length and simhash
+    changed = page(PRODUCTS.replace("Product 3: a sturdy black widget, in stock",
+                                    "Product 3: a sturdy black widget, 2 left"), "1 AND 1=1")
+    original, other = Fingerprint(TRUE_PAGE), Fingerprint(changed)
+    assert original.digest != other.digest
+    assert original.matches(other)
+
+
+def test_true_and_false_pages_differ():
+    true_page = Fingerprint(TRUE_PAGE, reflected=["1 AND 1=1"])
+    false_page = Fingerprint(FALSE_PAGE, reflected=["1 AND 1=2"])
+    assert not true_page.matches(false_page)
+    assert "simhash distance" in true_page.describe(false_page)
+
+
+def test_different_page_of_similar_length_differs():
+    # Neighbouring length buckets alone are not enough; the simhashes must be close too
+    archived = "".join(f"<li>Article {n}: archived {side} notice, withdrawn</li>"
+                       for n, side in enumerate(['north', 'south', 'east', 'west', 'upper', 'lower'] * 4))
+    true_page, other = Fingerprint(TRUE_PAGE), Fingerprint(page(archived, "1 AND 1=2"))
+    assert abs(true_page.bucket - other.bucket) <= 1
+    assert not true_page.matches(other)
+
+
+def test_status_code_must_match():
+    assert not Fingerprint(TRUE_PAGE, status=200).matches(Fingerprint(TRUE_PAGE, status=500))
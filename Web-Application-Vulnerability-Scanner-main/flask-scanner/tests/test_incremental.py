@@ -0,0 +1,120 @@
+# tests/test_incremental.py
+# Incremental rescans (page_state.py) of a site whose pages are reachable
+# only through a GET form action, including a scan resumed from a checkpoint.
+#   python -m pytest tests
+import hashlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import CrawlCheckpoint
+from core import WebVulnerabilityScanner
+from page_state import PageStateCache
+
+PAGES = {
+    # No links: /search is only reachable through the form action
+    '/': "<html><body><form method='get' action='/search'><input name='q'><input type='submit'></form></body></html>",
+    '/search': "<html><body><form method='post' action='/comment'><textarea name='comment'></textarea>"
+               "<input type='submit'></form></body></html>"
+}
+
+
+def make_handler(etags):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, text, status=200, etag=None):
+            data = text.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path not in PAGES:
+                return self._reply("<html><body>Not found</body></html>", 404)
+            etag = f'"{hashlib.sha256(PAGES[path].encode()).hexdigest()[:16]}"' if etags else None
+            if etag and self.headers.get('If-None-Match') == etag:
+                return self._reply('', 304, etag)
+            self._reply(PAGES[path], etag=etag)
+
+        def do_POST(self):
+            fields = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8'))
+            self._reply(f"<html><body>Thanks: {fields.get('comment', [''])[0]}</body></html>") # Planted XSS
+
+    return Handler
+
+
+@pytest.fixture(params=[False, True], ids=['same-content', 'not-modified'])
+def site(request):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(etags=request.param))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def scan(target, state_path):
+    cache = PageStateCache(state_path)
+    scanner = WebVulnerabilityScanner(target, delay=0, page_cache=cache, discover=False)
+    findings = scanner.crawl_and_scan(max_links=10)
+    return scanner, cache, findings
+
+
+def test_rescan_crawls_form_actions_of_unchanged_pages(site, tmp_path):
+    state_path = str(tmp_path / 'site.state.json')
+    first, _, first_findings = scan(site, state_path)
+    assert f"{site}search" in first.scanned_urls
+    assert any(f['type'] == 'Reflected XSS' for f in first_findings)
+
+    second, cache, second_findings = scan(site, state_path)
+    assert f"{site}search" in second.scanned_urls
+    assert cache.stats['retested'] == 0 # Both pages were reused, not re-tested
+    assert any(f['type'] == 'Reflected XSS' for f in second_findings)
+    assert second.findings_diff['fixed'] == []
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt(finding):
+    if finding['type'] == 'Reflected XSS': # Passive header findings come in on / already
+        raise Interrupted(finding['url'])
+
+
+def test_resumed_scan_keeps_page_state_of_pages_done_before_the_checkpoint(site, tmp_path):
+    state_path = str(tmp_path / 'site.state.json')
+    checkpoint = CrawlCheckpoint(str(tmp_path / 'site.ckpt'), interval=0)
+
+    # The XSS finding on /search stops the scan after / was finished and checkpointed
+    first = WebVulnerabilityScanner(site, delay=0, page_cache=PageStateCache(state_path), discover=False,
+                                    checkpoint=checkpoint, on_finding=interrupt)
+    with pytest.raises(Interrupted):
+        first.crawl_and_scan(max_links=10)
+    assert checkpoint.exists() and not os.path.exists(state_path)
+
+    resumed = WebVulnerabilityScanner(site, delay=0, page_cache=PageStateCache(state_path), discover=False,
+                                      checkpoint=checkpoint)
+    resumed.crawl_and_scan(max_links=10)
+    with open(state_path) as f:
+        assert set(json.load(f)['pages']) == {site, f"{site}search"}
+
+    rescan, cache, findings = scan(site, state_path)
+    assert cache.stats['retested'] == 0
+    assert any(f['type'] == 'Reflected XSS' for f in findings)
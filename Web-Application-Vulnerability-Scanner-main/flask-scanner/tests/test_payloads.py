@@ -0,0 +1,66 @@
+# tests/test_payloads.py
+# Reflection contexts and context-aware payload choice (payloads.py).
+#   python -m pytest tests
+import html
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from payloads import (describe_context, encode_params, find_reflections, probe_value, split_url, sqli_variants,
+                      url_with, value_kind, xss_candidates)
+
+TOKEN = 'vsc0123abcd'
+PROBE = probe_value(TOKEN)
+
+# One page per context: (page with the probe echoed at {}, context, a payload family expected for it)
+CONTEXTS = [
+    ("<p>Results for {}</p>", ('html', ''), 'script-tag'),
+    ('<input name="q" value="{}">', ('attr', '"'), 'close-attribute'),
+    ("<input name='q' value='{}'>", ('attr', "'"), 'event-handler'),
+    ("<input name=q value={} >", ('attr', ''), 'event-handler'),
+    ('<a href="{}">next</a>', ('url_attr', '"'), 'javascript-url'),
+    ("<script>var q = {};</script>", ('script', ''), 'expression'),
+    ("<script>var q = '{}';</script>", ('script', "'"), 'close-string'),
+    ("<script>var q = `{}`;</script>", ('script', '`'), 'template-expression'),
+    ("<textarea>{}</textarea>", ('rcdata', 'textarea'), 'close-textarea'),
+    ("<title>{}</title>", ('rcdata', 'title'), 'close-title'),
+    ("<!-- search: {} -->", ('comment', ''), 'close-comment'),
+    ("<div {}>", ('tag', ''), 'event-handler'),
+]
+
+
+@pytest.mark.parametrize('template, context, family', CONTEXTS, ids=[describe_context(c) for _, c, _ in CONTEXTS])
+def test_context_and_payload_family(template, context, family):
+    reflections = find_reflections(template.format(PROBE), TOKEN)
+    assert [found for found, _ in reflections] == [context]
+    candidates = xss_candidates(reflections)
+    assert family in [f for _, f, _, _ in candidates]
+    assert all(c == context for c, _, _, _ in candidates)
+
+
+def test_only_payloads_whose_characters_survive_are_sent():
+    # Angle brackets and quotes are entity-encoded, so no tag or attribute breakout can work
+    reflections = find_reflections(f"<p>{html.escape(PROBE)}</p>", TOKEN)
+    assert reflections and not reflections[0][1] & set('<>"\'')
+    assert xss_candidates(reflections) == []
+
+
+def test_probe_characters_do_not_fake_a_context():
+    # The probe's own quote must not look like an open attribute for a later reflection
+    page = f"<p>{PROBE}</p><p>{PROBE}</p>"
+    assert [context for context, _ in find_reflections(page, TOKEN)] == [('html', ''), ('html', '')]
+
+
+def test_parameters_without_value_are_kept():
+    base, params = split_url("http://example.test/search?debug&q=shoes")
+    assert params == [('debug', ''), ('q', 'shoes')]
+    assert url_with(base, encode_params(params), 1, 'x%27') == "http://example.test/search?debug=&q=x%27"
+
+
+def test_sqli_payloads_follow_the_value_kind():
+    assert value_kind('42') == 'numeric' and value_kind('shoes') == 'string'
+    assert [payload for _, payload, _, _ in sqli_variants('numeric')][-1] == " AND SLEEP(5)"
+    assert [payload for _, payload, _, _ in sqli_variants('string')][-1].startswith("'")
@@ -0,0 +1,113 @@
+# tests/test_scan_cache.py
+# Finished-scan cache (scan_cache.py): TTL, LRU eviction and coalescing of
+# concurrent requests for the same target.
+#   python -m pytest tests
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scan_cache
+from scan_cache import ScanCache
+
+CONFIG = {'max_links': 20}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scan_cache, 'time', clock) # scan_cache only calls time.time()
+    return clock
+
+
+def counting_scan():
+    calls = []
+
+    def scan():
+        calls.append(1)
+        return len(calls)
+    return scan, calls
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = ScanCache(ttl=60)
+    scan, calls = counting_scan()
+    assert cache.get_or_scan('example.com', CONFIG, scan) == (1, 'scanned')
+    clock.now += 59
+    assert cache.get_or_scan('http://EXAMPLE.com/', CONFIG, scan) == (1, 'cached') # Same normalized target
+    clock.now += 2
+    assert cache.get_or_scan('example.com', CONFIG, scan) == (2, 'scanned')
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ScanCache(ttl=60, max_entries=2)
+    scan, calls = counting_scan()
+    cache.get_or_scan('a.test', CONFIG, scan)
+    cache.get_or_scan('b.test', CONFIG, scan)
+    assert cache.get_or_scan('a.test', CONFIG, scan) == (1, 'cached') # a is now the most recently used
+    cache.get_or_scan('c.test', CONFIG, scan)
+    assert cache.stats['evicted'] == 1
+    assert cache.get_or_scan('a.test', CONFIG, scan) == (1, 'cached')
+    assert cache.get_or_scan('b.test', CONFIG, scan) == (4, 'scanned')
+
+
+def test_config_is_part_of_the_key(clock):
+    cache = ScanCache(ttl=60)
+    scan, calls = counting_scan()
+    cache.get_or_scan('a.test', CONFIG, scan)
+    assert cache.get_or_scan('a.test', {'max_links': 50}, scan) == (2, 'scanned')
+
+
+def test_concurrent_requests_share_one_scan():
+    cache = ScanCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_scan():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 7
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_scan('a.test', CONFIG, slow_scan)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_scan('a.test', CONFIG, slow_scan)))
+                 for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.stats['coalesced'] < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [(7, 'joined')] * 5 + [(7, 'scanned')]
+    assert cache.get_or_scan('a.test', CONFIG, slow_scan) == (7, 'cached')
+
+
+def test_failed_scan_is_not_cached():
+    cache = ScanCache(ttl=60)
+
+    def failing_scan():
+        raise RuntimeError('target unreachable')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_scan('a.test', CONFIG, failing_scan)
+    assert cache.get_or_scan('a.test', CONFIG, lambda: 3) == (3, 'scanned')
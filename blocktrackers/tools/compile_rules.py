@@ -0,0 +1,662 @@
+# tools/compile_rules.py
+# Offline compiler and matcher for the Tracker Blocker declarativeNetRequest rules.
+#
+#   # EasyList/EasyPrivacy/hosts files (and existing rules.json) -> rulesets
+#   python tools/compile_rules.py compile easylist.txt easyprivacy.txt rules.json \
+#       --out-dir . --manifest manifest.json
+#
+#   # Replay a URL log (one "url [resource_type [initiator_url]]" per line)
+#   python tools/compile_rules.py match --manifest manifest.json urls.log
+#
+#   # Synthetic 100k-rule / 1M-URL throughput run
+#   python tools/compile_rules.py bench --rules 100000 --urls 1000000
+import argparse
+import json
+import os
+import random
+import re
+import string
+import time
+
+# Chrome limits (chrome.declarativeNetRequest constants)
+MAX_RULES_PER_RULESET = 30000       # GUARANTEED_MINIMUM_STATIC_RULES
+MAX_REGEX_RULES_PER_RULESET = 1000  # MAX_NUMBER_OF_REGEX_RULES
+MAX_ENABLED_RULESETS = 50           # MAX_NUMBER_OF_ENABLED_STATIC_RULESETS
+DOMAINS_PER_RULE = 5000             # Keeps individual requestDomains lists manageable
+
+PRIORITY_BLOCK = 1
+PRIORITY_ALLOW = 2      # @@ exceptions override plain blocks
+PRIORITY_IMPORTANT = 3  # $important blocks override exceptions
+
+# At equal priority Chrome prefers allow over allowAllRequests over block
+ACTION_RANK = {'allow': 3, 'allowAllRequests': 2, 'block': 1}
+
+RESOURCE_TYPES = {
+    'script': 'script',
+    'image': 'image',
+    'stylesheet': 'stylesheet',
+    'css': 'stylesheet',
+    'object': 'object',
+    'object-subrequest': 'object',
+    'xmlhttprequest': 'xmlhttprequest',
+    'xhr': 'xmlhttprequest',
+    'subdocument': 'sub_frame',
+    'frame': 'sub_frame',
+    'document': 'main_frame',
+    'doc': 'main_frame',
+    'font': 'font',
+    'media': 'media',
+    'websocket': 'websocket',
+    'ping': 'ping',
+    'beacon': 'ping',
+    'other': 'other',
+}
+
+# Options that only matter to cosmetic filtering or have no DNR equivalent
+IGNORED_OPTIONS = {'collapse', '~collapse', 'genericblock'}
+
+HOSTS_PREFIXES = ('0.0.0.0', '127.0.0.1', '::', '::1')
+DOMAIN_RE = re.compile(r'^[a-z0-9-]+(\.[a-z0-9-]+)+$')
+SEPARATOR_CLASS = r'(?:[^A-Za-z0-9_\-.%]|$)'
+
+
+class UnsupportedFilter(Exception):
+    pass
+
+
+# --- Parsing ---
+
+def _split_options(line):
+    # Regex filters may contain "$" themselves: "/ads\d+$/$script"
+    if line.startswith('/'):
+        end = line.rfind('/')
+        if end > 0 and (end == len(line) - 1 or line[end + 1] == '$'):
+            return line[:end + 1], line[end + 2:]
+    index = line.rfind('$')
+    if index <= 0:
+        return line, ''
+    return line[:index], line[index + 1:]
+
+
+def parse_filter(line):
+    """Parse one filter-list line into (action, priority, condition) or None for comments/cosmetics."""
+    line = line.strip()
+    if not line or line.startswith(('!', '[', '#')):
+        return None
+    if '##' in line or '#@#' in line or '#?#' in line or '#$#' in line:
+        return None # Cosmetic filter
+
+    # hosts file entries and bare domain lists
+    parts = line.split()
+    if len(parts) >= 2 and parts[0] in HOSTS_PREFIXES:
+        domain = parts[1].lower()
+        if domain in ('localhost', 'localhost.localdomain', 'broadcasthost', '0.0.0.0'):
+            return None
+        return 'block', PRIORITY_BLOCK, {'requestDomains': [domain]}
+    if DOMAIN_RE.match(line.lower()) and not line.startswith('|'):
+        return 'block', PRIORITY_BLOCK, {'requestDomains': [line.lower()]}
+
+    action, priority = 'block', PRIORITY_BLOCK
+    if line.startswith('@@'):
+        action, priority = 'allow', PRIORITY_ALLOW
+        line = line[2:]
+
+    pattern, options = _split_options(line)
+    condition = {}
+    resource_types, excluded_types = [], []
+    for option in filter(None, options.split(',')):
+        option = option.strip().lower()
+        name, _, value = option.partition('=')
+        negated = name.startswith('~')
+        base = name.lstrip('~')
+        if base in RESOURCE_TYPES:
+            (excluded_types if negated else resource_types).append(RESOURCE_TYPES[base])
+        elif base in ('third-party', '3p'):
+            condition['domainType'] = 'firstParty' if negated else 'thirdParty'
+        elif base in ('first-party', '1p'):
+            condition['domainType'] = 'thirdParty' if negated else 'firstParty'
+        elif base == 'domain' and value:
+            included = [d for d in value.split('|') if d and not d.startswith('~')]
+            excluded = [d[1:] for d in value.split('|') if d.startswith('~')]
+            if included:
+                condition['initiatorDomains'] = sorted(set(included))
+            if excluded:
+                condition['excludedInitiatorDomains'] = sorted(set(excluded))
+        elif base == 'match-case':
+            condition['isUrlFilterCaseSensitive'] = True
+        elif base == 'important':
+            if action == 'block':
+                priority = PRIORITY_IMPORTANT
+        elif option in IGNORED_OPTIONS:
+            continue
+        else:
+            raise UnsupportedFilter(f"option ${option}")
+
+    if action == 'allow' and resource_types == ['main_frame']:
+        action = 'allowAllRequests'
+    if resource_types:
+        condition['resourceTypes'] = sorted(set(resource_types))
+    if excluded_types:
+        condition['excludedResourceTypes'] = sorted(set(excluded_types))
+
+    if not pattern or pattern in ('*', '|', '||'):
+        raise UnsupportedFilter('matches every URL')
+    if not pattern.isascii():
+        raise UnsupportedFilter('non-ASCII pattern')
+
+    if len(pattern) > 2 and pattern.startswith('/') and pattern.endswith('/'):
+        regex = pattern[1:-1]
+        try:
+            re.compile(regex)
+        except re.error:
+            raise UnsupportedFilter('invalid regex')
+        condition['regexFilter'] = regex
+        return action, priority, condition
+
+    # Plain "||domain^" (or "||domain") becomes a mergeable requestDomains entry
+    if pattern.startswith('||'):
+        host = pattern[2:]
+        if host.endswith('^'):
+            host = host[:-1]
+        if DOMAIN_RE.match(host.lower()) and not condition.get('isUrlFilterCaseSensitive'):
+            condition['requestDomains'] = [host.lower()]
+            return action, priority, condition
+    if pattern.startswith('||*'):
+        pattern = pattern[3:] # Not allowed by Chrome; "*x" and "x" match the same URLs
+    condition['urlFilter'] = pattern
+    return action, priority, condition
+
+
+def read_filter_lists(paths, stats):
+    """Yield (action, priority, condition) from filter lists and existing DNR JSON rulesets."""
+    for path in paths:
+        if path.endswith('.json'):
+            with open(path) as f:
+                for rule in json.load(f):
+                    stats['json_rules'] += 1
+                    yield rule['action']['type'], rule.get('priority', 1), dict(rule['condition'])
+            continue
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                stats['lines'] += 1
+                try:
+                    parsed = parse_filter(line)
+                except UnsupportedFilter as e:
+                    stats['unsupported'] += 1
+                    reason = str(e).split('=')[0]
+                    stats['unsupported_reasons'][reason] = stats['unsupported_reasons'].get(reason, 0) + 1
+                    continue
+                if parsed is None:
+                    stats['skipped'] += 1
+                else:
+                    yield parsed
+
+
+# --- Compiling ---
+
+def minimize_domains(domains):
+    """Drop domains already covered by a parent domain in the same set."""
+    kept = []
+    for domain in sorted(domains, key=lambda d: d.split('.')[::-1]):
+        labels = domain.split('.')
+        covered = False
+        for i in range(1, len(labels) - 1):
+            if '.'.join(labels[i:]) in domains:
+                covered = True
+                break
+        if not covered:
+            kept.append(domain)
+    return kept
+
+
+def _condition_key(condition):
+    return json.dumps(condition, sort_keys=True, separators=(',', ':'))
+
+
+def compile_rules(parsed_rules, domains_per_rule=DOMAINS_PER_RULE):
+    """Deduplicate and merge parsed rules into a list of DNR rule dicts (without ids)."""
+    domain_groups = {} # {(action, priority, other condition key): set(domains)}
+    unique = {}        # {(action, condition key): (priority, condition)}
+    for action, priority, condition in parsed_rules:
+        domains = condition.get('requestDomains')
+        if domains and 'urlFilter' not in condition and 'regexFilter' not in condition:
+            rest = {k: v for k, v in condition.items() if k != 'requestDomains'}
+            key = (action, priority, _condition_key(rest))
+            domain_groups.setdefault(key, set()).update(d.lower() for d in domains)
+            continue
+        key = (action, _condition_key(condition))
+        previous = unique.get(key)
+        # The same condition listed twice keeps only its strongest priority
+        if previous is None or priority > previous[0]:
+            unique[key] = (priority, condition)
+
+    # A domain blocked at a higher priority makes the same lower-priority entry redundant
+    by_strength = sorted(domain_groups.items(), key=lambda item: -item[0][1])
+    seen = {}
+    rules = []
+    for (action, priority, rest_key), domains in by_strength:
+        covered = seen.setdefault((action, rest_key), set())
+        remaining = minimize_domains(domains - covered)
+        covered.update(remaining)
+        rest = json.loads(rest_key)
+        for start in range(0, len(remaining), domains_per_rule):
+            condition = {'requestDomains': remaining[start:start + domains_per_rule]}
+            condition.update(rest)
+            rules.append({'priority': priority, 'action': {'type': action}, 'condition': condition})
+
+    for (action, _), (priority, condition) in sorted(unique.items(), key=lambda item: item[0]):
+        rules.append({'priority': priority, 'action': {'type': action}, 'condition': condition})
+    return rules
+
+
+def split_rulesets(rules, max_rules=MAX_RULES_PER_RULESET, max_regex=MAX_REGEX_RULES_PER_RULESET):
+    rulesets = [[]]
+    regex_count = 0
+    for rule in rules:
+        is_regex = 'regexFilter' in rule['condition']
+        if len(rulesets[-1]) >= max_rules or (is_regex and regex_count >= max_regex):
+            rulesets.append([])
+            regex_count = 0
+        rulesets[-1].append({'id': len(rulesets[-1]) + 1, 'priority': rule['priority'],
+                             'action': rule['action'], 'condition': rule['condition']})
+        regex_count += is_regex
+    return rulesets
+
+
+def write_rulesets(rulesets, out_dir, manifest_path=None, prefix='rules'):
+    paths = []
+    for index, ruleset in enumerate(rulesets, 1):
+        name = f"{prefix}_{index}.json"
+        with open(os.path.join(out_dir, name), 'w') as f:
+            json.dump(ruleset, f, separators=(',', ':'))
+        paths.append(name)
+    if manifest_path:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+        manifest.setdefault('declarative_net_request', {})['rule_resources'] = [
+            {
+                'id': f"ruleset_{index}",
+                'enabled': index <= MAX_ENABLED_RULESETS,
+                'path': os.path.relpath(os.path.join(out_dir, name), manifest_dir).replace(os.sep, '/'),
+            }
+            for index, name in enumerate(paths, 1)
+        ]
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.write('\n')
+    return paths
+
+
+# --- Matching ---
+
+def url_filter_to_regex(pattern, case_sensitive=False):
+    """Translate a DNR urlFilter ('||', '|', '*', '^') into a compiled regex."""
+    prefix, suffix = '', ''
+    if pattern.startswith('||'):
+        prefix = r'^[a-z][a-z0-9+.-]*:(?://)?(?:[^/?#]*\.)?'
+        pattern = pattern[2:]
+    elif pattern.startswith('|'):
+        prefix = '^'
+        pattern = pattern[1:]
+    if pattern.endswith('|'):
+        suffix = '$'
+        pattern = pattern[:-1]
+    body = []
+    for ch in pattern:
+        if ch == '*':
+            body.append('.*')
+        elif ch == '^':
+            body.append(SEPARATOR_CLASS)
+        else:
+            body.append(re.escape(ch))
+    return re.compile(prefix + ''.join(body) + suffix, 0 if case_sensitive else re.IGNORECASE)
+
+
+def _literal_keyword(pattern):
+    # Longest run of plain characters; any URL matching the filter must contain it
+    pieces = re.split(r'[*^|]+', pattern)
+    return max(pieces, key=len) if pieces else ''
+
+
+class AhoCorasick:
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for index, keyword in enumerate(keywords):
+            state = 0
+            for ch in keyword:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = nxt
+            self.output[state] = self.output[state] + (index,)
+        # Breadth-first fail links; outputs are merged so scanning never follows them
+        queue = list(self.goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                if self.output[self.fail[nxt]]:
+                    self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def search(self, text):
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        hits = []
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                hits.extend(output[state])
+        return hits
+
+
+def _host_of(url):
+    start = url.find('://')
+    start = start + 3 if start >= 0 else 0
+    end = len(url)
+    for sep in '/?#':
+        index = url.find(sep, start)
+        if 0 <= index < end:
+            end = index
+    host = url[start:end]
+    if '@' in host:
+        host = host.rsplit('@', 1)[1]
+    if host.startswith('['):
+        return host[1:host.find(']')].lower()
+    return host.split(':', 1)[0].lower()
+
+
+def _site_of(host):
+    # Approximation of the registrable domain (no public suffix list offline)
+    labels = host.split('.')
+    return '.'.join(labels[-2:]) if len(labels) >= 2 else host
+
+
+def _in_domains(host, domains):
+    labels = host.split('.')
+    for i in range(len(labels)):
+        if '.'.join(labels[i:]) in domains:
+            return True
+    return False
+
+
+class CompiledRule:
+    __slots__ = ('rule', 'rank', 'resource_types', 'excluded_types', 'domain_type',
+                 'initiators', 'excluded_initiators', 'regex')
+
+    def __init__(self, rule):
+        condition = rule['condition']
+        self.rule = rule
+        self.rank = (rule.get('priority', 1), ACTION_RANK.get(rule['action']['type'], 0))
+        self.resource_types = frozenset(condition.get('resourceTypes', ()))
+        excluded = condition.get('excludedResourceTypes')
+        if excluded is None and not self.resource_types:
+            excluded = ['main_frame'] # Chrome's default for rules without resourceTypes
+        self.excluded_types = frozenset(excluded or ())
+        self.domain_type = condition.get('domainType')
+        self.initiators = frozenset(condition.get('initiatorDomains', ())) or None
+        self.excluded_initiators = frozenset(condition.get('excludedInitiatorDomains', ())) or None
+        self.regex = None
+        if 'urlFilter' in condition:
+            self.regex = url_filter_to_regex(condition['urlFilter'], condition.get('isUrlFilterCaseSensitive', False))
+        elif 'regexFilter' in condition:
+            flags = 0 if condition.get('isUrlFilterCaseSensitive', False) else re.IGNORECASE
+            self.regex = re.compile(condition['regexFilter'], flags)
+
+    def applies(self, url, resource_type, host, initiator_host):
+        if self.resource_types and resource_type not in self.resource_types:
+            return False
+        if resource_type in self.excluded_types:
+            return False
+        if self.domain_type:
+            third_party = initiator_host is not None and _site_of(initiator_host) != _site_of(host)
+            if (self.domain_type == 'thirdParty') != third_party:
+                return False
+        if self.initiators is not None and (initiator_host is None or not _in_domains(initiator_host, self.initiators)):
+            return False
+        if self.excluded_initiators is not None and initiator_host and _in_domains(initiator_host, self.excluded_initiators):
+            return False
+        return self.regex is None or self.regex.search(url) is not None
+
+
+class RuleMatcher:
+    """Evaluates compiled rulesets the way Chrome does: best (priority, action) wins."""
+
+    def __init__(self, rules):
+        self.rules = [CompiledRule(rule) for rule in rules]
+        self.domain_trie = {}   # Reversed labels -> nested dicts; '' key holds rule indices
+        self.scan_always = []   # Rules without a usable literal
+        keywords, keyword_rules = [], []
+        for index, compiled in enumerate(self.rules):
+            condition = compiled.rule['condition']
+            if 'requestDomains' in condition:
+                # Domain rules may also carry a urlFilter; the trie only pre-selects them
+                for domain in condition['requestDomains']:
+                    node = self.domain_trie
+                    for label in reversed(domain.split('.')):
+                        node = node.setdefault(label, {})
+                    node.setdefault('', []).append(index)
+                continue
+            keyword = _literal_keyword(condition['urlFilter']).lower() if 'urlFilter' in condition else ''
+            if len(keyword) >= 3:
+                keywords.append(keyword)
+                keyword_rules.append(index)
+            else:
+                self.scan_always.append(index)
+        self.automaton = AhoCorasick(keywords)
+        self.keyword_rules = keyword_rules
+
+    def _domain_candidates(self, host):
+        candidates = []
+        node = self.domain_trie
+        for label in reversed(host.split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            if '' in node:
+                candidates.extend(node[''])
+        return candidates
+
+    def match(self, url, resource_type='other', initiator=None):
+        host = _host_of(url)
+        initiator_host = _host_of(initiator) if initiator else None
+        candidates = self._domain_candidates(host)
+        candidates.extend(self.keyword_rules[i] for i in set(self.automaton.search(url.lower())))
+        candidates.extend(self.scan_always)
+        best = None
+        for index in candidates:
+            compiled = self.rules[index]
+            if best is not None and compiled.rank <= best.rank:
+                continue
+            if compiled.applies(url, resource_type, host, initiator_host):
+                best = compiled
+        return best.rule if best is not None else None
+
+
+def load_rulesets(paths=None, manifest_path=None):
+    if manifest_path:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        base = os.path.dirname(os.path.abspath(manifest_path))
+        paths = [os.path.join(base, r['path'])
+                 for r in manifest.get('declarative_net_request', {}).get('rule_resources', []) if r.get('enabled')]
+    rules = []
+    for path in paths or []:
+        with open(path) as f:
+            rules.extend(json.load(f))
+    return rules
+
+
+def replay(matcher, lines):
+    counts = {'urls': 0, 'block': 0, 'allow': 0, 'allowAllRequests': 0, 'none': 0}
+    start = time.perf_counter()
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        url = parts[0]
+        resource_type = parts[1] if len(parts) > 1 else 'other'
+        initiator = parts[2] if len(parts) > 2 else None
+        rule = matcher.match(url, resource_type, initiator)
+        counts['urls'] += 1
+        counts[rule['action']['type'] if rule else 'none'] += 1
+    return counts, time.perf_counter() - start
+
+
+def print_replay(counts, elapsed):
+    print(f"URLs: {counts['urls']:,} in {elapsed:.2f}s ({counts['urls'] / max(elapsed, 1e-9):,.0f} URLs/s)")
+    print(f"blocked: {counts['block']:,}, allowed by exception: {counts['allow'] + counts['allowAllRequests']:,}, "
+          f"no match: {counts['none']:,}")
+
+
+# --- Synthetic benchmark data ---
+
+def _random_label(rng, low=4, high=12):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+
+def synthetic_filter_list(rng, count):
+    domains = [f"{_random_label(rng)}.{rng.choice(('com', 'net', 'io', 'org'))}" for _ in range(count)]
+    lines = ['[Adblock Plus 2.0]', '! Synthetic list']
+    for domain in domains:
+        roll = rng.random()
+        if roll < 0.85:
+            lines.append(f"||{domain}^")
+        elif roll < 0.92:
+            lines.append(f"||{domain}^$third-party,script")
+        elif roll < 0.97:
+            lines.append(f"/{_random_label(rng, 5, 8)}/{_random_label(rng, 3, 6)}*.js")
+        elif roll < 0.99:
+            lines.append(f"@@||cdn.{domain}^$script")
+        else:
+            lines.append(f"{domain}##.ad-banner")
+    return lines, domains
+
+
+def synthetic_urls(rng, domains, count):
+    for _ in range(count):
+        if rng.random() < 0.4:
+            host = f"{rng.choice(('www', 'cdn', 'static', 'px'))}.{rng.choice(domains)}"
+        else:
+            host = f"{_random_label(rng)}.{rng.choice(('com', 'net', 'io', 'org'))}"
+        path = '/'.join(_random_label(rng, 3, 8) for _ in range(rng.randint(1, 4)))
+        resource_type = rng.choice(('script', 'image', 'xmlhttprequest', 'sub_frame', 'stylesheet'))
+        yield f"https://{host}/{path}.js?v={rng.randint(0, 999)} {resource_type} https://news.example.org/"
+
+
+# --- CLI ---
+
+def _new_stats():
+    return {'lines': 0, 'json_rules': 0, 'skipped': 0, 'unsupported': 0, 'unsupported_reasons': {}}
+
+
+def cmd_compile(args):
+    stats = _new_stats()
+    start = time.perf_counter()
+    rules = compile_rules(read_filter_lists(args.inputs, stats), args.domains_per_rule)
+    rulesets = split_rulesets(rules, args.max_rules, args.max_regex)
+    elapsed = time.perf_counter() - start
+    os.makedirs(args.out_dir, exist_ok=True)
+    paths = write_rulesets(rulesets, args.out_dir, args.manifest, args.prefix)
+
+    domains = sum(len(r['condition'].get('requestDomains', ())) for r in rules)
+    print(f"Read {stats['lines']:,} filter lines and {stats['json_rules']:,} JSON rules "
+          f"({stats['skipped']:,} comments/cosmetic, {stats['unsupported']:,} unsupported)")
+    for reason, count in sorted(stats['unsupported_reasons'].items(), key=lambda item: -item[1])[:10]:
+        print(f"  unsupported {reason}: {count:,}")
+    print(f"Compiled {len(rules):,} rules ({domains:,} domains merged into requestDomains) "
+          f"in {elapsed:.2f}s -> {len(paths)} ruleset(s): {', '.join(paths)}")
+    if len(rules) > MAX_RULES_PER_RULESET:
+        print(f"Warning: {len(rules):,} rules exceed the {MAX_RULES_PER_RULESET:,} guaranteed static rules; "
+              f"the remainder depends on Chrome's shared global rule pool")
+    if len(paths) > MAX_ENABLED_RULESETS:
+        print(f"Warning: only the first {MAX_ENABLED_RULESETS} rulesets can be enabled at once")
+
+
+def cmd_match(args):
+    rules = load_rulesets(args.rulesets, args.manifest)
+    start = time.perf_counter()
+    matcher = RuleMatcher(rules)
+    print(f"Loaded {len(rules):,} rules in {time.perf_counter() - start:.2f}s")
+    with open(args.log, encoding='utf-8', errors='replace') as f:
+        counts, elapsed = replay(matcher, f)
+    print_replay(counts, elapsed)
+
+
+def cmd_bench(args):
+    rng = random.Random(args.seed)
+    lines, domains = synthetic_filter_list(rng, args.rules)
+    stats = _new_stats()
+
+    start = time.perf_counter()
+    parsed = []
+    for line in lines:
+        try:
+            result = parse_filter(line)
+        except UnsupportedFilter:
+            stats['unsupported'] += 1
+            continue
+        if result is not None:
+            parsed.append(result)
+    rules = compile_rules(parsed, args.domains_per_rule)
+    rulesets = split_rulesets(rules)
+    compile_time = time.perf_counter() - start
+    print(f"Compiled {len(lines):,} filters into {len(rules):,} rules / {len(rulesets)} ruleset(s) "
+          f"in {compile_time:.2f}s")
+
+    start = time.perf_counter()
+    matcher = RuleMatcher([rule for ruleset in rulesets for rule in ruleset])
+    print(f"Matcher built in {time.perf_counter() - start:.2f}s")
+    urls = list(synthetic_urls(rng, domains, args.urls))
+    counts, elapsed = replay(matcher, urls)
+    print_replay(counts, elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile filter lists to declarativeNetRequest rulesets')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('compile', help='Compile filter lists / hosts files / DNR JSON into rulesets')
+    p.add_argument('inputs', nargs='+', help='EasyList-style .txt, hosts files or existing rules .json')
+    p.add_argument('--out-dir', default='.', help='Directory for the generated rules_N.json files')
+    p.add_argument('--prefix', default='rules', help='Output filename prefix')
+    p.add_argument('--manifest', help='manifest.json whose rule_resources should be rewritten')
+    p.add_argument('--max-rules', type=int, default=MAX_RULES_PER_RULESET, help='Rules per ruleset')
+    p.add_argument('--max-regex', type=int, default=MAX_REGEX_RULES_PER_RULESET, help='Regex rules per ruleset')
+    p.add_argument('--domains-per-rule', type=int, default=DOMAINS_PER_RULE, help='requestDomains per merged rule')
+    p.set_defaults(func=cmd_compile)
+
+    p = sub.add_parser('match', help='Replay a URL log against compiled rulesets')
+    p.add_argument('log', help='File with "url [resource_type [initiator_url]]" per line')
+    p.add_argument('rulesets', nargs='*', help='Compiled ruleset JSON files')
+    p.add_argument('--manifest', help='Use the enabled rulesets listed in this manifest.json')
+    p.set_defaults(func=cmd_match)
+
+    p = sub.add_parser('bench', help='Synthetic compile and match throughput run')
+    p.add_argument('--rules', type=int, default=100000, help='Synthetic filters')
+    p.add_argument('--urls', type=int, default=1000000, help='Synthetic URLs to replay')
+    p.add_argument('--domains-per-rule', type=int, default=DOMAINS_PER_RULE)
+    p.add_argument('--seed', type=int, default=1)
+    p.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()